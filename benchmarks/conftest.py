@@ -0,0 +1,277 @@
+"""
+Fixtures for the KiLight benchmarks.
+
+The benchmarks run the integration against simulated devices, see tests/simulator.py, at
+several fleet sizes. They are not part of the test suite and are run on their own:
+
+    python -m pytest benchmarks --kilight-benchmark-json=results.json
+
+Each benchmark is measured in wall clock and process CPU time, and every result is written
+to the given JSON file at the end of the session, to compare runs against each other.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+import json
+import os
+from pathlib import Path
+import platform
+from time import perf_counter, process_time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.setup import async_setup_component
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import DOMAIN
+from tests.simulator import KiLightSimulatorFleet, SimulatorProfile
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Awaitable, Callable, Sequence
+
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.kilight.models import KiLightDeviceData
+    from tests.simulator import KiLightSimulator
+
+# Fleet sizes every benchmark is run at
+DEVICE_COUNTS: tuple[int, ...] = (1, 10, 100, 500)
+
+# Network conditions of the simulated devices, roughly those of a wired local network
+BENCHMARK_PROFILE = SimulatorProfile(latency=0.002, jitter=0.002, sensor_drift=0.5, seed=1)
+
+_RESULTS_KEY = pytest.StashKey[list["BenchmarkResult"]]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the option to export the benchmark results."""
+    parser.addoption(
+        "--kilight-benchmark-json",
+        metavar="PATH",
+        default=None,
+        help="Write the KiLight benchmark results to this JSON file",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Start collecting benchmark results."""
+    config.stash[_RESULTS_KEY] = []
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: pytest.Config) -> None:
+    """Show the benchmark results, and write them to the JSON file if one was given."""
+    results = config.stash.get(_RESULTS_KEY, [])
+    if not results:
+        return
+
+    terminalreporter.section("KiLight benchmarks")
+    for result in results:
+        terminalreporter.write_line(result.summary())
+
+    if (json_path := config.getoption("--kilight-benchmark-json")) is not None:
+        report = {
+            "datetime": datetime.now(UTC).isoformat(),
+            "machine": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "benchmarks": [asdict(result) for result in results],
+        }
+        Path(json_path).write_text(json.dumps(report, indent=2))
+        terminalreporter.write_line(f"Benchmark results written to {json_path}")
+
+
+def _percentile(values: Sequence[float], percent: float) -> float:
+    """Get a percentile of the values, using the nearest rank."""
+    ordered = sorted(values)
+    rank = max(round(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Summary of the values measured by one benchmark."""
+
+    name: str
+    devices: int
+    unit: str
+    rounds: int
+    min: float
+    max: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    extra: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_values(
+        cls,
+        name: str,
+        devices: int,
+        unit: str,
+        values: Sequence[float],
+        extra: dict[str, float] | None = None,
+    ) -> BenchmarkResult:
+        """
+        Summarize measured values.
+
+        :param str name: Name of the benchmark
+        :param int devices: Number of simulated devices the values were measured with
+        :param str unit: Unit of the values
+        :param Sequence[float] values: The measured values
+        :param dict[str, float] | None extra: Any other figures to report along with them
+        """
+        return cls(
+            name=name,
+            devices=devices,
+            unit=unit,
+            rounds=len(values),
+            min=min(values),
+            max=max(values),
+            mean=sum(values) / len(values),
+            p50=_percentile(values, 50),
+            p95=_percentile(values, 95),
+            p99=_percentile(values, 99),
+            extra=extra or {},
+        )
+
+    def summary(self) -> str:
+        """Get a line describing the result."""
+        extra = "".join(f" {key}={value:.6g}" for key, value in self.extra.items())
+        return (
+            f"{self.name:<28} devices={self.devices:<4} rounds={self.rounds:<4} "
+            f"mean={self.mean:.6g}{self.unit} p50={self.p50:.6g}{self.unit} "
+            f"p95={self.p95:.6g}{self.unit} p99={self.p99:.6g}{self.unit}{extra}"
+        )
+
+
+class BenchmarkRecorder:
+    """Measures and records benchmark results of one test."""
+
+    def __init__(self, results: list[BenchmarkResult]) -> None:
+        """
+        Initialize the recorder.
+
+        :param list[BenchmarkResult] results: Results of the session to add to
+        """
+        self._results: list[BenchmarkResult] = results
+
+    def record(
+        self,
+        name: str,
+        devices: int,
+        unit: str,
+        values: Sequence[float],
+        extra: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Record values that were measured by the benchmark itself.
+
+        :param str name: Name of the benchmark
+        :param int devices: Number of simulated devices the values were measured with
+        :param str unit: Unit of the values
+        :param Sequence[float] values: The measured values
+        :param dict[str, float] | None extra: Any other figures to report along with them
+        """
+        self._results.append(BenchmarkResult.from_values(name, devices, unit, values, extra))
+
+    async def measure(
+        self,
+        name: str,
+        devices: int,
+        func: Callable[[], Awaitable[Any]],
+        rounds: int = 1,
+    ) -> None:
+        """
+        Run a coroutine function a number of times, recording its wall clock and CPU time.
+
+        The CPU time is that of the whole process, so it includes the simulated devices. It
+        is also reported divided by the number of devices.
+
+        :param str name: Name of the benchmark
+        :param int devices: Number of simulated devices the function works with
+        :param Callable[[], Awaitable[Any]] func: Coroutine function to measure
+        :param int rounds: How many times to run it
+        """
+        wall_times: list[float] = []
+        cpu_times: list[float] = []
+        for _ in range(rounds):
+            wall_start, cpu_start = perf_counter(), process_time()
+            await func()
+            wall_times.append(perf_counter() - wall_start)
+            cpu_times.append(process_time() - cpu_start)
+
+        self.record(f"{name}.wall", devices, "s", wall_times)
+        self.record(f"{name}.cpu", devices, "s", cpu_times)
+        self.record(
+            f"{name}.cpu_per_device", devices, "s", [cpu_time / devices for cpu_time in cpu_times]
+        )
+
+
+# noinspection PyUnusedLocal
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: Any) -> None:
+    """Require the enable_custom_integrations fixture."""
+
+
+@pytest.fixture
+def kilight_benchmark(request: pytest.FixtureRequest) -> BenchmarkRecorder:
+    """Get a recorder for the results of the benchmark."""
+    return BenchmarkRecorder(request.config.stash[_RESULTS_KEY])
+
+
+@pytest.fixture
+async def start_kilight_fleet(
+    socket_enabled: None,
+) -> AsyncGenerator[Callable[[int], Awaitable[list[KiLightSimulator]]]]:
+    """Get a function that starts simulated KiLights, stopped after the benchmark."""
+    fleets: list[KiLightSimulatorFleet] = []
+
+    async def _start(count: int) -> list[KiLightSimulator]:
+        fleet = KiLightSimulatorFleet(count, BENCHMARK_PROFILE)
+        fleets.append(fleet)
+        await fleet.start()
+        return fleet.simulators
+
+    yield _start
+
+    for fleet in fleets:
+        await fleet.stop()
+
+
+def add_simulated_entries(
+    hass: HomeAssistant, simulators: Sequence[KiLightSimulator]
+) -> list[MockConfigEntry]:
+    """
+    Add a config entry for each of the simulated devices.
+
+    :param HomeAssistant hass: Home Assistant instance
+    :param Sequence[KiLightSimulator] simulators: The simulated devices
+    """
+    entries = []
+    for index, simulator in enumerate(simulators):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title=f"Simulated {index}",
+            unique_id=simulator.state.hardware_id,
+            data={CONF_HOST: simulator.host, CONF_PORT: simulator.port},
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+    return entries
+
+
+async def async_setup_simulated_entries(hass: HomeAssistant) -> None:
+    """Set up the integration with every config entry added, like on startup."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+
+def device_data(hass: HomeAssistant, entries: Sequence[MockConfigEntry]) -> list[KiLightDeviceData]:
+    """Get the device, coordinator and title of each of the config entries."""
+    return [hass.data[DOMAIN][entry.entry_id] for entry in entries]
@@ -0,0 +1,65 @@
+"""Benchmark converting light commands into KiLight channel levels."""
+
+from homeassistant.util.color import (
+    color_hs_to_RGB,
+    color_rgb_to_rgbww,
+    color_xy_brightness_to_RGB,
+)
+from kilight.client import MAX_COLOR_TEMP, MIN_COLOR_TEMP
+from kilight.client.util import color_temp_to_white_levels
+import pytest
+
+from custom_components.kilight.color import get_color_engine
+
+from .conftest import DEVICE_COUNTS, BenchmarkRecorder
+
+# Rounds of conversions measured, each converting one command for every device
+_ROUNDS = 50
+
+# Brightness gamma of the benchmarked color engine
+_GAMMA = 2.2
+
+
+def _commands(devices: int) -> list[tuple[tuple[float, float], tuple[float, float], int, int]]:
+    """Get an hs color, xy color, color temperature and brightness for every device."""
+    return [
+        (
+            ((index * 37) % 360, (index * 13) % 101),
+            (((index * 7) % 64) / 100 + 0.1, ((index * 11) % 64) / 100 + 0.1),
+            MIN_COLOR_TEMP + (index * 97) % (MAX_COLOR_TEMP - MIN_COLOR_TEMP),
+            index % 256,
+        )
+        for index in range(devices)
+    ]
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_color_conversion(kilight_benchmark: BenchmarkRecorder, devices: int) -> None:
+    """
+    Benchmark converting a command for every device, through the tables and per call.
+
+    The per call path is what converting the same commands took before the color engine:
+    Home Assistant turning hs and xy colors into RGB and then RGBWW for every command, and
+    the client library computing the white levels of color temperatures. Brightness was
+    sent unchanged, so it has no per call counterpart.
+    """
+    commands = _commands(devices)
+    color_engine = get_color_engine(brightness_gamma=_GAMMA)
+
+    async def _lookup() -> None:
+        for hs_color, xy_color, color_temp, brightness in commands:
+            color_engine.hs_to_rgbcw(hs_color)
+            color_engine.xy_to_rgbcw(xy_color)
+            color_engine.color_temp_to_rgbcw(color_temp)
+            color_engine.device_brightness(brightness)
+
+    async def _per_call() -> None:
+        for hs_color, xy_color, color_temp, _ in commands:
+            color_rgb_to_rgbww(*color_hs_to_RGB(*hs_color), MIN_COLOR_TEMP, MAX_COLOR_TEMP)
+            color_rgb_to_rgbww(
+                *color_xy_brightness_to_RGB(*xy_color, 255), MIN_COLOR_TEMP, MAX_COLOR_TEMP
+            )
+            color_temp_to_white_levels(color_temp)
+
+    await kilight_benchmark.measure("color.lookup", devices, _lookup, rounds=_ROUNDS)
+    await kilight_benchmark.measure("color.per_call", devices, _per_call, rounds=_ROUNDS)
@@ -0,0 +1,174 @@
+"""Benchmark sending commands to simulated KiLights."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.scene import DOMAIN as SCENE_DOMAIN
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_ENTITY_ID, ATTR_NAME, SERVICE_TURN_ON
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+import pytest
+
+from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.services import (
+    ATTR_ENTITIES,
+    SERVICE_APPLY_SCENE,
+    SERVICE_SAVE_PRESET,
+)
+from tests.simulator import KiLightSimulator
+
+from .conftest import (
+    DEVICE_COUNTS,
+    BenchmarkRecorder,
+    add_simulated_entries,
+    async_setup_simulated_entries,
+)
+
+# Brightness set by each round of the benchmark
+_BRIGHTNESS_ROUNDS: tuple[int, ...] = (50, 150, 250)
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_turn_on(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark the latency of turning on a light of every device at the same time.
+
+    Each service call is timed from being made until it returns, which is once the command
+    was written to the device and its state read back.
+    """
+    simulators = await start_kilight_fleet(devices)
+    entries = add_simulated_entries(hass, simulators)
+    await async_setup_simulated_entries(hass)
+    entity_ids = [
+        f"light.{entry.title.lower().replace(' ', '_')}_output_a_light" for entry in entries
+    ]
+    latencies: list[float] = []
+
+    async def _turn_on(entity_id: str, brightness: int) -> None:
+        start_time = perf_counter()
+        await hass.services.async_call(
+            LIGHT_DOMAIN,
+            SERVICE_TURN_ON,
+            {ATTR_ENTITY_ID: entity_id, ATTR_BRIGHTNESS: brightness},
+            blocking=True,
+        )
+        latencies.append(perf_counter() - start_time)
+
+    for brightness in _BRIGHTNESS_ROUNDS:
+        await asyncio.gather(*(_turn_on(entity_id, brightness) for entity_id in entity_ids))
+        await hass.async_block_till_done()
+
+    kilight_benchmark.record("turn_on.latency", devices, "s", latencies)
+
+    assert all(
+        simulator.state.output_a.brightness == _BRIGHTNESS_ROUNDS[-1] for simulator in simulators
+    )
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_apply_scene(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark a scene setting both outputs of every device through the apply_scene service.
+
+    Besides how long the service call takes, records the spread between the first and the
+    last device applying the scene, which is how far apart the lights visibly change.
+    """
+    simulators = await start_kilight_fleet(devices)
+    entries = add_simulated_entries(hass, simulators)
+    await async_setup_simulated_entries(hass)
+    entity_prefixes = [f"light.{entry.title.lower().replace(' ', '_')}" for entry in entries]
+    brightness_rounds = iter(_BRIGHTNESS_ROUNDS)
+    spreads: list[float] = []
+    latencies: list[float] = []
+
+    async def _apply_scene() -> None:
+        brightness = next(brightness_rounds)
+        entities = {
+            f"{entity_prefix}_output_{output}_light": {"state": "on", "brightness": brightness}
+            for entity_prefix in entity_prefixes
+            for output in ("a", "b")
+        }
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_APPLY_SCENE,
+            {ATTR_ENTITIES: entities},
+            blocking=True,
+            return_response=True,
+        )
+        latencies.extend(result["latency"] for result in response["devices"] if result["success"])
+        write_times = [
+            simulator.stats.last_write_time
+            for simulator in simulators
+            if simulator.stats.last_write_time is not None
+        ]
+        spreads.append(max(write_times) - min(write_times))
+        await hass.async_block_till_done()
+
+    await kilight_benchmark.measure(
+        "apply_scene", devices, _apply_scene, rounds=len(_BRIGHTNESS_ROUNDS)
+    )
+    kilight_benchmark.record("apply_scene.device_latency", devices, "s", latencies)
+    kilight_benchmark.record("apply_scene.spread", devices, "s", spreads)
+
+    assert all(
+        simulator.state.output_b.brightness == _BRIGHTNESS_ROUNDS[-1] for simulator in simulators
+    )
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_recall_preset(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark the latency of activating a preset scene of every device at the same time.
+
+    Each scene is timed from being activated until its preset was written to both outputs
+    of the device and the state read back.
+    """
+    simulators = await start_kilight_fleet(devices)
+    entries = add_simulated_entries(hass, simulators)
+    await async_setup_simulated_entries(hass)
+    device_registry = dr.async_get(hass)
+    for entry in entries:
+        device_entry = device_registry.async_get_device({(DOMAIN, entry.unique_id)})
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_SAVE_PRESET,
+            {ATTR_DEVICE_ID: device_entry.id, ATTR_NAME: "Benchmark"},
+            blocking=True,
+        )
+    await hass.async_block_till_done()
+    entity_ids = [f"scene.{entry.title.lower().replace(' ', '_')}_benchmark" for entry in entries]
+    latencies: list[float] = []
+
+    async def _activate(entity_id: str) -> None:
+        start_time = perf_counter()
+        await hass.services.async_call(
+            SCENE_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: entity_id}, blocking=True
+        )
+        latencies.append(perf_counter() - start_time)
+
+    for _ in _BRIGHTNESS_ROUNDS:
+        await asyncio.gather(*(_activate(entity_id) for entity_id in entity_ids))
+        await hass.async_block_till_done()
+
+    kilight_benchmark.record("recall_preset.latency", devices, "s", latencies)
+
+    assert all(
+        len(simulator.stats.writes) == len(_BRIGHTNESS_ROUNDS) * 2 for simulator in simulators
+    )
@@ -0,0 +1,31 @@
+"""Benchmark accumulating the energy drawn by a fleet of KiLights."""
+
+import pytest
+
+from custom_components.kilight.energy import EnergyMeter
+
+from .conftest import DEVICE_COUNTS, BenchmarkRecorder
+
+# Rounds of readings measured, each adding a reading to every meter of every device
+_ROUNDS = 200
+
+# Meters of each device, one per output and one for the whole device
+_METERS_PER_DEVICE = 3
+
+# Seconds between two readings, as if every device was polled at 10 Hz
+_READING_INTERVAL = 0.1
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_energy_accumulation(kilight_benchmark: BenchmarkRecorder, devices: int) -> None:
+    """Benchmark adding a power reading to every energy meter of the fleet."""
+    meters = [EnergyMeter() for _ in range(devices * _METERS_PER_DEVICE)]
+    powers = [float(index % 50) for index in range(len(meters))]
+    rounds = iter(range(_ROUNDS))
+
+    async def _accumulate() -> None:
+        now = next(rounds) * _READING_INTERVAL
+        for meter, power in zip(meters, powers, strict=True):
+            meter.add(power, now)
+
+    await kilight_benchmark.measure("energy.accumulate", devices, _accumulate, rounds=_ROUNDS)
@@ -0,0 +1,73 @@
+"""Benchmark the memory KiLights take once set up, and what handling their states allocates."""
+
+from collections.abc import Awaitable, Callable
+import gc
+import tracemalloc
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from tests.simulator import KiLightSimulator
+
+from .conftest import (
+    DEVICE_COUNTS,
+    BenchmarkRecorder,
+    add_simulated_entries,
+    async_setup_simulated_entries,
+    device_data,
+)
+from .test_polling import _warmer, pushing_devices  # noqa: F401 Fixture used by the benchmark
+
+# Number of state changes measured
+_ROUNDS = 10
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_memory(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    pushing_devices: Any,  # noqa: F811 Fixture imported above
+    devices: int,
+) -> None:
+    """
+    Benchmark the memory per device after setup, and the memory a state change allocates.
+
+    Memory is traced from just before the integration is set up, so it covers the devices,
+    coordinators and entities but not the simulated devices. Each state change is handed
+    to every device without the network, like in the fan-out benchmark, and the memory
+    allocated while its entities are updated is the peak traced memory above the memory in
+    use before. The memory kept is what is still in use after the change.
+    """
+    entries = add_simulated_entries(hass, await start_kilight_fleet(devices))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before_setup, _ = tracemalloc.get_traced_memory()
+        await async_setup_simulated_entries(hass)
+        gc.collect()
+        after_setup, _ = tracemalloc.get_traced_memory()
+
+        pushing = [data.device for data in device_data(hass, entries)]
+        states = [device.state for device in pushing]
+        allocated: list[float] = []
+        kept: list[float] = []
+        for round_number in range(1, _ROUNDS + 1):
+            gc.collect()
+            tracemalloc.reset_peak()
+            before_change, _ = tracemalloc.get_traced_memory()
+            for device, state in zip(pushing, states, strict=True):
+                device.push_state(_warmer(state, round_number / 10))
+            await hass.async_block_till_done()
+            after_change, peak = tracemalloc.get_traced_memory()
+            allocated.append((peak - before_change) / devices)
+            kept.append((after_change - before_change) / devices)
+    finally:
+        tracemalloc.stop()
+
+    kilight_benchmark.record(
+        "memory.per_device", devices, "B", [(after_setup - before_setup) / devices]
+    )
+    kilight_benchmark.record("memory.state_change_allocated_per_device", devices, "B", allocated)
+    kilight_benchmark.record("memory.state_change_kept_per_device", devices, "B", kept)
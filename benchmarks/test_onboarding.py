@@ -0,0 +1,80 @@
+"""Benchmark setting up many discovered KiLights at once through the config flow."""
+
+from collections.abc import Awaitable, Callable
+from ipaddress import IPv4Address
+from time import perf_counter
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_ADDRESS, CONF_DEVICES
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
+import pytest
+
+from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.discovery import async_get_discovery_cache
+from tests.simulator import KiLightSimulator
+
+from .conftest import DEVICE_COUNTS, BenchmarkRecorder
+
+
+def _announce(hass: HomeAssistant, simulators: list[KiLightSimulator]) -> None:
+    """Hand the discovery cache an announcement of every simulated device."""
+    discovery_cache = async_get_discovery_cache(hass)
+    for index, simulator in enumerate(simulators):
+        discovery_cache.async_announce(
+            simulator.state.hardware_id,
+            ZeroconfServiceInfo(
+                hostname=f"kilight-{index}.local.",
+                ip_address=IPv4Address(simulator.host),
+                port=simulator.port,
+                ip_addresses=[IPv4Address(simulator.host)],
+                type="_kilight._tcp.local.",
+                name=f"kilight-{index}",
+                properties={"hwid": simulator.state.hardware_id},
+            ),
+        )
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_bulk_onboarding(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark setting up every discovered device from the bulk step of the config flow.
+
+    Measured from starting the flow, through reading every device for the form, to every
+    selected device being set up. The time it took to read the devices for the form is
+    recorded on its own too.
+    """
+    simulators = await start_kilight_fleet(devices)
+    _announce(hass, simulators)
+    read_times: list[float] = []
+
+    async def _onboard() -> None:
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        if result["type"] is FlowResultType.MENU:
+            read_start = perf_counter()
+            result = await hass.config_entries.flow.async_configure(
+                result["flow_id"], {"next_step_id": "bulk"}
+            )
+            read_times.append(perf_counter() - read_start)
+            user_input = {CONF_DEVICES: [simulator.state.hardware_id for simulator in simulators]}
+        else:
+            # A single discovered device is picked on its own
+            user_input = {CONF_ADDRESS: simulators[0].state.hardware_id}
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], user_input)
+        assert result["type"] is FlowResultType.CREATE_ENTRY
+        await hass.async_block_till_done()
+
+    await kilight_benchmark.measure("bulk_onboarding", devices, _onboard)
+    if read_times:
+        kilight_benchmark.record("bulk_onboarding_read.wall", devices, "s", read_times)
+
+    assert len(hass.config_entries.async_entries(DOMAIN)) == devices
+    assert len(hass.states.async_all("light")) == devices * 2
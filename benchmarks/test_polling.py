@@ -0,0 +1,113 @@
+"""Benchmark polling simulated KiLights and fanning their state out to entities."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Generator
+from dataclasses import replace
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from kilight.client import DeviceState
+from kilight.client.models import TemperatureState
+import pytest
+
+from custom_components.kilight.device import KiLightDevice
+from tests.simulator import KiLightSimulator
+
+from .conftest import (
+    DEVICE_COUNTS,
+    BenchmarkRecorder,
+    add_simulated_entries,
+    async_setup_simulated_entries,
+    device_data,
+)
+
+# Number of polls or state changes measured per benchmark
+_ROUNDS = 10
+
+
+class PushingDevice(KiLightDevice):
+    """Device that can be handed a state as if it had been read, without the network."""
+
+    def push_state(self, state: DeviceState) -> None:
+        """Report a state to the callbacks as if it had been read from the device."""
+        self._state = state
+        self._fire_callbacks()
+
+
+@pytest.fixture
+def pushing_devices() -> Generator[None]:
+    """Use a PushingDevice for every device set up by the integration."""
+    with patch("custom_components.kilight.KiLightDevice", new=PushingDevice):
+        yield
+
+
+def _warmer(state: DeviceState, degrees: float) -> DeviceState:
+    """Get the state with every temperature raised and the fan sped up accordingly."""
+
+    def _raise(temperature: TemperatureState | None) -> TemperatureState | None:
+        if temperature is None or temperature.celsius is None:
+            return temperature
+        return TemperatureState(celsius=temperature.celsius + degrees)
+
+    return replace(
+        state,
+        driver_temperature=_raise(state.driver_temperature),
+        power_supply_temperature=_raise(state.power_supply_temperature),
+        output_a=replace(state.output_a, temperature=_raise(state.output_a.temperature)),
+        output_b=(
+            replace(state.output_b, temperature=_raise(state.output_b.temperature))
+            if state.output_b is not None
+            else None
+        ),
+        fan_speed=(state.fan_speed or 0) + round(degrees * 10),
+    )
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_poll(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark polling every device once, with its state fanned out to the entities.
+
+    The simulated sensors drift, so every poll changes the state of the sensor entities.
+    """
+    entries = add_simulated_entries(hass, await start_kilight_fleet(devices))
+    await async_setup_simulated_entries(hass)
+    coordinators = [data.coordinator for data in device_data(hass, entries)]
+
+    async def _poll_all() -> None:
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        await hass.async_block_till_done()
+
+    await kilight_benchmark.measure("poll", devices, _poll_all, rounds=_ROUNDS)
+
+    assert all(coordinator.last_update_success for coordinator in coordinators)
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_fan_out(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    pushing_devices: Any,
+    devices: int,
+) -> None:
+    """Benchmark handing a changed state of every device to its entities, without the network."""
+    entries = add_simulated_entries(hass, await start_kilight_fleet(devices))
+    await async_setup_simulated_entries(hass)
+    pushing = [data.device for data in device_data(hass, entries)]
+    states = [device.state for device in pushing]
+    rounds = iter(range(1, _ROUNDS + 1))
+
+    async def _push_all() -> None:
+        degrees = next(rounds) / 10
+        for device, state in zip(pushing, states, strict=True):
+            device.push_state(_warmer(state, degrees))
+        await hass.async_block_till_done()
+
+    await kilight_benchmark.measure("fan_out", devices, _push_all, rounds=_ROUNDS)
@@ -0,0 +1,103 @@
+"""Benchmark setting up config entries of simulated KiLights."""
+
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict
+import gc
+from pathlib import Path
+import tracemalloc
+
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+import pytest
+
+from custom_components.kilight.const import DOMAIN, STATE_CACHE_VERSION
+from tests import simulator as simulator_module
+from tests.simulator import KiLightSimulator
+
+from .conftest import (
+    DEVICE_COUNTS,
+    BenchmarkRecorder,
+    add_simulated_entries,
+    async_setup_simulated_entries,
+)
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_setup(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """Benchmark setting up entries that have to read their device first."""
+    add_simulated_entries(hass, await start_kilight_fleet(devices))
+
+    await kilight_benchmark.measure("setup", devices, lambda: async_setup_simulated_entries(hass))
+
+    assert len(hass.states.async_all("light")) == devices * 2
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_setup_cached(
+    hass: HomeAssistant,
+    hass_storage: dict,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """Benchmark setting up entries from their cached device state."""
+    simulators = await start_kilight_fleet(devices)
+    entries = add_simulated_entries(hass, simulators)
+    for entry, simulator in zip(entries, simulators, strict=True):
+        hass_storage[f"{DOMAIN}.{entry.unique_id}"] = {
+            "version": STATE_CACHE_VERSION,
+            "key": f"{DOMAIN}.{entry.unique_id}",
+            "data": asdict(simulator.state),
+        }
+
+    await kilight_benchmark.measure(
+        "setup_cached", devices, lambda: async_setup_simulated_entries(hass)
+    )
+
+    assert len(hass.states.async_all("light")) == devices * 2
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_memory(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark the memory held per set up device.
+
+    The light and sensor platforms are set up beforehand, so their one-time cost isn't
+    spread over the devices. Allocations made by the simulator itself are left out, but the
+    objects asyncio allocates for the simulated end of each connection are still counted.
+    """
+    add_simulated_entries(hass, await start_kilight_fleet(devices))
+    for platform in (Platform.LIGHT, Platform.SENSOR):
+        assert await async_setup_component(hass, platform, {})
+    exclude_simulator = tracemalloc.Filter(
+        inclusive=False, filename_pattern=str(Path(simulator_module.__file__))
+    )
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        await async_setup_simulated_entries(hass)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    allocated = sum(
+        stat.size_diff
+        for stat in after.filter_traces([exclude_simulator]).compare_to(
+            before.filter_traces([exclude_simulator]), "filename"
+        )
+    )
+    kilight_benchmark.record("memory_per_device", devices, "B", [allocated / devices])
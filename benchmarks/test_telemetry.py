@@ -0,0 +1,80 @@
+"""Benchmark the sensor states written while polling simulated KiLights, downsampled or not."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+import pytest
+
+from custom_components.kilight.const import (
+    CONF_CURRENT_DEADBAND,
+    CONF_FAN_DRIVE_DEADBAND,
+    CONF_FAN_SPEED_DEADBAND,
+    CONF_TEMPERATURE_DEADBAND,
+)
+from tests.simulator import KiLightSimulator
+
+from .conftest import (
+    DEVICE_COUNTS,
+    BenchmarkRecorder,
+    add_simulated_entries,
+    async_setup_simulated_entries,
+    device_data,
+)
+
+# Number of polls of every device measured with each set of options
+_ROUNDS = 20
+
+# Options publishing every changed reading, like before sensor readings were downsampled
+_RAW_OPTIONS = {
+    CONF_CURRENT_DEADBAND: 0.0,
+    CONF_TEMPERATURE_DEADBAND: 0.0,
+    CONF_FAN_SPEED_DEADBAND: 0,
+    CONF_FAN_DRIVE_DEADBAND: 0.0,
+}
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_telemetry_state_writes(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark the state writes per device and poll, with raw and with default telemetry options.
+
+    The simulated sensors drift by up to half a degree per poll, and the fan follows the
+    hottest of them, like the jittery readings of real devices. Only state writes reach
+    the recorder, so their count is what the database grows by.
+    """
+    entries = add_simulated_entries(hass, await start_kilight_fleet(devices))
+    await async_setup_simulated_entries(hass)
+    coordinators = [data.coordinator for data in device_data(hass, entries)]
+    writes: list[Event] = []
+
+    @callback
+    def _count_write(event: Event) -> None:
+        writes.append(event)
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _count_write)
+
+    async def _writes_per_poll() -> list[float]:
+        per_poll: list[float] = []
+        for _ in range(_ROUNDS):
+            writes.clear()
+            await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+            await hass.async_block_till_done()
+            per_poll.append(len(writes) / devices)
+        return per_poll
+
+    for coordinator in coordinators:
+        coordinator.async_update_options(_RAW_OPTIONS)
+    kilight_benchmark.record("telemetry.raw_writes", devices, "writes", await _writes_per_poll())
+
+    for coordinator in coordinators:
+        coordinator.async_update_options({})
+    kilight_benchmark.record(
+        "telemetry.downsampled_writes", devices, "writes", await _writes_per_poll()
+    )
@@ -0,0 +1,62 @@
+"""Benchmark evaluating the thermal protection of a fleet of KiLights."""
+
+from dataclasses import replace
+
+from homeassistant.core import HomeAssistant
+from kilight.client.models import TemperatureState
+import pytest
+
+from custom_components.kilight.thermal import KiLightThermalManager
+from tests.conftest import MOCK_DEVICE_STATE
+
+from .conftest import DEVICE_COUNTS, BenchmarkRecorder
+
+# Rounds of readings measured, each recording and evaluating a state of every device
+_ROUNDS = 50
+
+# Temperature limits of the driver, power supply and outputs of every device
+_LIMITS = (85.0, 75.0, 80.0, 80.0)
+
+
+class _Coordinator:
+    """Coordinator stand-in that ignores the brightness limits it is told to apply."""
+
+    def async_apply_thermal_limit(self, limit: int | None) -> None:
+        """Ignore a brightness limit."""
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_thermal_evaluation(
+    hass: HomeAssistant, kilight_benchmark: BenchmarkRecorder, devices: int
+) -> None:
+    """
+    Benchmark recording a state of every device and evaluating the fleet once.
+
+    Every device heats up at its own rate, so some of them are derated along the way and
+    notified, like a fleet where a few devices run hot.
+    """
+    thermal = KiLightThermalManager(hass)
+    coordinators = [_Coordinator() for _ in range(devices)]
+    for coordinator in coordinators:
+        thermal.async_set_limits(coordinator, _LIMITS)
+    states = [
+        [
+            replace(
+                MOCK_DEVICE_STATE,
+                driver_temperature=TemperatureState(celsius=40.0 + step * (index % 10) / 10),
+            )
+            for index in range(devices)
+        ]
+        for step in range(_ROUNDS)
+    ]
+    rounds = iter(states)
+
+    async def _evaluate() -> None:
+        for coordinator, state in zip(coordinators, next(rounds), strict=True):
+            thermal.async_record(coordinator, state)
+        thermal._async_evaluate()  # noqa: SLF001 Evaluated right away instead of on its timer
+
+    await kilight_benchmark.measure("thermal.evaluate", devices, _evaluate, rounds=_ROUNDS)
+
+    for coordinator in coordinators:
+        thermal.async_remove(coordinator)
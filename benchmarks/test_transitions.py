@@ -0,0 +1,96 @@
+"""Benchmark the frame rate of light transitions on simulated KiLights."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from time import perf_counter
+
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_TRANSITION,
+    DOMAIN as LIGHT_DOMAIN,
+)
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_ON
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.kilight.const import TRANSITION_MAX_FRAMES_PER_SECOND
+from tests.simulator import KiLightSimulator
+
+from .conftest import (
+    DEVICE_COUNTS,
+    BenchmarkRecorder,
+    add_simulated_entries,
+    async_setup_simulated_entries,
+)
+
+# Length of the benchmarked transitions, in seconds
+_TRANSITION_SECONDS = 2.0
+
+# Brightness the benchmarked transitions fade up to
+_TARGET_BRIGHTNESS = 255
+
+
+@pytest.mark.parametrize("devices", DEVICE_COUNTS)
+async def test_transition(
+    hass: HomeAssistant,
+    kilight_benchmark: BenchmarkRecorder,
+    start_kilight_fleet: Callable[[int], Awaitable[list[KiLightSimulator]]],
+    devices: int,
+) -> None:
+    """
+    Benchmark the sustained frame rate of a transition run on every device at once.
+
+    The frame rate per device counts the frames each simulated device received, over the
+    time until every transition finished. Once the host can't keep up, the transitions take
+    longer than asked and each device gets fewer frames. The frame rate per host is the
+    total of all devices.
+    """
+    simulators = await start_kilight_fleet(devices)
+    entries = add_simulated_entries(hass, simulators)
+    await async_setup_simulated_entries(hass)
+    entity_ids = [
+        f"light.{entry.title.lower().replace(' ', '_')}_output_a_light" for entry in entries
+    ]
+    writes_before = [len(simulator.stats.writes) for simulator in simulators]
+
+    start_time = perf_counter()
+    await asyncio.gather(
+        *(
+            hass.services.async_call(
+                LIGHT_DOMAIN,
+                SERVICE_TURN_ON,
+                {
+                    ATTR_ENTITY_ID: entity_id,
+                    ATTR_BRIGHTNESS: _TARGET_BRIGHTNESS,
+                    ATTR_TRANSITION: _TRANSITION_SECONDS,
+                },
+                blocking=True,
+            )
+            for entity_id in entity_ids
+        )
+    )
+    await hass.async_block_till_done(wait_background_tasks=True)
+    elapsed = perf_counter() - start_time
+
+    frames = [
+        len(simulator.stats.writes) - before
+        for simulator, before in zip(simulators, writes_before, strict=True)
+    ]
+    kilight_benchmark.record(
+        "transition.fps_per_device",
+        devices,
+        "fps",
+        [device_frames / elapsed for device_frames in frames],
+        extra={"max_fps": TRANSITION_MAX_FRAMES_PER_SECOND},
+    )
+    kilight_benchmark.record(
+        "transition.fps_per_host",
+        devices,
+        "fps",
+        [sum(frames) / elapsed],
+        extra={"elapsed": elapsed},
+    )
+
+    assert all(
+        simulator.state.output_a.brightness == _TARGET_BRIGHTNESS for simulator in simulators
+    )
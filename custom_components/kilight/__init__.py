@@ -7,38 +7,124 @@ import logging
 from typing import TYPE_CHECKING
 
 from homeassistant.const import CONF_HOST, CONF_PORT, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from kilight.client import DEFAULT_PORT, Device
+from homeassistant.helpers import config_validation as cv
+from kilight.client import DEFAULT_PORT
 
+from .cache import KiLightStateCache, device_info_key
+from .capture import KiLightTelemetryCapture
 from .const import DEVICE_TIMEOUT_SECONDS, DOMAIN
 from .coordinator import KiLightCoordinator
+from .device import KiLightDevice
 from .models import KiLightDeviceData
+from .presets import KiLightPresetStore
+from .services import async_setup_services
 
 if TYPE_CHECKING:
     from homeassistant.core import Event, HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
+    from kilight.client import DeviceState
 
     from .types import KiLightConfigEntry
 
-_PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.SENSOR]
+_PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.SCENE, Platform.SENSOR]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 _LOGGER = logging.getLogger(__name__)
 
 
+async def async_setup(hass: HomeAssistant, _config: ConfigType) -> bool:
+    """Set up the services of the KiLight integration."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: KiLightConfigEntry) -> bool:
-    """Set up KiLight from a config entry."""
+    """
+    Set up KiLight from a config entry.
+
+    If the device state is known from a previous run or from the config flow, the entities
+    are set up from it right away and the device is connected to in the background. If the
+    device turns out to have changed since, like after a firmware update, the cache is
+    replaced and the entry reloaded. Without a cached state the device has to be read
+    first, to know which entities it has.
+    """
     host: str = entry.data[CONF_HOST]
     port: int = entry.data.get(CONF_PORT, DEFAULT_PORT)
 
-    device = Device(host, port)
+    device = KiLightDevice(host, port)
 
     entry.runtime_data = device
 
+    state_cache = KiLightStateCache(hass, entry.unique_id or entry.entry_id)
+    if (cached_state := await state_cache.async_load()) is not None:
+        device.restore_state(cached_state)
+
+    kilight_coordinator = KiLightCoordinator(hass, entry=entry)
+    entry.async_on_unload(device.register_callback(state_cache.async_save_later))
+
+    if cached_state is not None:
+        _LOGGER.debug("%s: Restored cached state, connecting in the background", device.name)
+        cached_device_info = device_info_key(cached_state)
+
+        @callback
+        def _async_check_device_info(state: DeviceState) -> None:
+            nonlocal cached_device_info
+            if device_info_key(state) == cached_device_info:
+                return
+            cached_device_info = device_info_key(state)
+            _LOGGER.info("%s: Device changed since it was cached, reloading", device.name)
+            hass.async_create_task(_async_replace_cache(hass, entry, state_cache, state))
+
+        entry.async_on_unload(device.register_callback(_async_check_device_info))
+        kilight_coordinator.async_start_from_restored_state()
+    else:
+        await _async_first_refresh(device, kilight_coordinator)
+
+    presets = KiLightPresetStore(hass, entry.unique_id or entry.entry_id)
+    await presets.async_load()
+
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = KiLightDeviceData(
+        entry.title,
+        device,
+        kilight_coordinator,
+        presets,
+        KiLightTelemetryCapture(hass, device, entry.title),
+    )
+
+    await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    async def _async_stop(_: Event) -> None:
+        """Close the connection cleanly."""
+        await device.disconnect()
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop))
+    kilight_coordinator.connection.async_start(entry)
+    kilight_coordinator.async_start_polling()
+    return True
+
+
+async def _async_replace_cache(
+    hass: HomeAssistant,
+    entry: KiLightConfigEntry,
+    state_cache: KiLightStateCache,
+    state: DeviceState,
+) -> None:
+    """Cache the current state of a changed device and reload its entry to pick it up."""
+    await state_cache.async_save(state)
+    hass.config_entries.async_schedule_reload(entry.entry_id)
+
+
+async def _async_first_refresh(device: KiLightDevice, coordinator: KiLightCoordinator) -> None:
+    """Read the device for the first time, raising ConfigEntryNotReady if it can't be."""
     startup_event = asyncio.Event()
     cancel_first_update = device.register_callback(lambda *_: startup_event.set())
-    kilight_coordinator = KiLightCoordinator(hass, entry=entry)
 
     try:
-        await kilight_coordinator.async_config_entry_first_refresh()
+        await coordinator.async_config_entry_first_refresh()
     except ConfigEntryNotReady:
         cancel_first_update()
         raise
@@ -55,20 +141,6 @@ async def async_setup_entry(hass: HomeAssistant, entry: KiLightConfigEntry) -> b
     finally:
         cancel_first_update()
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = KiLightDeviceData(
-        entry.title, device, kilight_coordinator
-    )
-
-    await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
-
-    async def _async_stop(_: Event) -> None:
-        """Close the connection cleanly."""
-        await device.disconnect()
-
-    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop))
-    return True
-
 
 async def async_unload_entry(hass: HomeAssistant, entry: KiLightConfigEntry) -> bool:
     """
@@ -84,7 +156,14 @@ async def async_unload_entry(hass: HomeAssistant, entry: KiLightConfigEntry) ->
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: KiLightConfigEntry) -> None:
+    """Remove the cached device state and the presets of a removed config entry."""
+    await KiLightStateCache(hass, entry.unique_id or entry.entry_id).async_remove()
+    await KiLightPresetStore(hass, entry.unique_id or entry.entry_id).async_remove()
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: KiLightConfigEntry) -> None:
     data: KiLightDeviceData = hass.data[DOMAIN][entry.entry_id]
+    data.coordinator.async_update_options(entry.options)
     if entry.title != data.title:
         await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,142 @@
+"""Persistent cache of the last known state of KiLight devices."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from kilight.client import DeviceState, OutputState
+from kilight.client.models import TemperatureState, VersionInfo
+
+from .const import DOMAIN, STATE_CACHE_SAVE_DELAY_SECONDS, STATE_CACHE_VERSION
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _version_from_dict(data: dict[str, Any] | None) -> VersionInfo | None:
+    if data is None:
+        return None
+    return VersionInfo(**data)
+
+
+def _temperature_from_dict(data: dict[str, Any] | None) -> TemperatureState | None:
+    if data is None:
+        return None
+    return TemperatureState(**data)
+
+
+def _output_from_dict(data: dict[str, Any] | None) -> OutputState | None:
+    if data is None:
+        return None
+    return OutputState(**{**data, "temperature": _temperature_from_dict(data["temperature"])})
+
+
+def state_from_dict(data: dict[str, Any]) -> DeviceState:
+    """
+    Rebuild a device state from its dictionary form, as created by dataclasses.asdict.
+
+    :param dict[str, Any] data: Dictionary form of the device state
+    :return: The device state
+    """
+    return DeviceState(
+        **{
+            **data,
+            "hardware_version": _version_from_dict(data["hardware_version"]),
+            "firmware_version": _version_from_dict(data["firmware_version"]),
+            "output_a": _output_from_dict(data["output_a"]),
+            "output_b": _output_from_dict(data["output_b"]),
+            "driver_temperature": _temperature_from_dict(data["driver_temperature"]),
+            "power_supply_temperature": _temperature_from_dict(data["power_supply_temperature"]),
+        }
+    )
+
+
+def device_info_key(state: DeviceState) -> Hashable:
+    """
+    Get the static properties of a device that its entities are set up from.
+
+    These are the values the DeviceInfo is built from, plus whether the device has a second
+    output. When any of them changes, entities set up from a cached state are outdated.
+
+    :param DeviceState state: State of the device
+    """
+    return (
+        state.hardware_id,
+        state.manufacturer_name,
+        state.model,
+        state.hardware_version,
+        state.firmware_version,
+        state.output_b is not None,
+    )
+
+
+class KiLightStateCache:
+    """
+    Last known state of one KiLight device, kept in Home Assistant storage.
+
+    The cache is keyed by the hardware ID of the device, which is also the unique ID of its
+    config entry, so the config flow can fill it before the entry exists. Saving is delayed
+    and debounced, so a device polled or pushing frequently only causes an occasional
+    write. Pending saves are flushed when Home Assistant stops.
+    """
+
+    def __init__(self, hass: HomeAssistant, hardware_id: str) -> None:
+        """
+        Initialize the cache.
+
+        :param HomeAssistant hass: Home Assistant instance
+        :param str hardware_id: Hardware ID of the device
+        """
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STATE_CACHE_VERSION, f"{DOMAIN}.{hardware_id}", private=True
+        )
+
+    async def async_load(self) -> DeviceState | None:
+        """
+        Load the cached device state.
+
+        :return: The cached state, or None if there is none or it can't be read
+        """
+        data = await self._store.async_load()
+        if data is None:
+            return None
+
+        try:
+            state = state_from_dict(data)
+        except (KeyError, TypeError):
+            _LOGGER.debug("Ignoring unreadable cached state: %s", data)
+            return None
+
+        if state.model is None:
+            # The system info was never read, so entities can't be set up from this state
+            return None
+        return state
+
+    async def async_save(self, state: DeviceState) -> None:
+        """
+        Save the given device state right away.
+
+        :param DeviceState state: The state to cache
+        """
+        await self._store.async_save(asdict(state))
+
+    @callback
+    def async_save_later(self, state: DeviceState) -> None:
+        """
+        Save the given device state after a delay.
+
+        :param DeviceState state: The state to cache
+        """
+        self._store.async_delay_save(lambda: asdict(state), STATE_CACHE_SAVE_DELAY_SECONDS)
+
+    async def async_remove(self) -> None:
+        """Remove the cached state from storage."""
+        await self._store.async_remove()
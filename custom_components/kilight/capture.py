@@ -0,0 +1,196 @@
+"""On-demand high-rate capture of the sensor readings of a KiLight, outside the recorder."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from math import ceil
+from pathlib import Path
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Final
+
+from homeassistant.util import dt as dt_util, slugify
+import numpy as np
+
+from .const import CAPTURE_DIRECTORY
+from .enum import CaptureFormat
+from .exceptions import CaptureInProgressError
+from .snapshot import KiLightStateSnapshot, snapshot_accessor
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+    from homeassistant.core import HomeAssistant
+    from kilight.client import Device
+    from numpy.typing import NDArray
+
+_LOGGER = logging.getLogger(__name__)
+
+# Column name, snapshot field and field of that output if it is one, of each channel
+# captured. These are the readings of the temperature, current and fan sensors.
+CAPTURE_CHANNELS: Final[tuple[tuple[str, str, str | None], ...]] = (
+    ("driver_temperature", "driver_temperature", None),
+    ("power_supply_temperature", "power_supply_temperature", None),
+    ("output_a_temperature", "output_a", "temperature"),
+    ("output_b_temperature", "output_b", "temperature"),
+    ("output_a_current", "output_a", "current"),
+    ("output_b_current", "output_b", "current"),
+    ("fan_speed", "fan_speed", None),
+    ("fan_drive_percentage", "fan_drive_percentage", None),
+)
+
+# Names of the columns of a capture, the time of each sample and then every channel
+CAPTURE_COLUMNS: Final[tuple[str, ...]] = (
+    "time",
+    *(column for column, _, _ in CAPTURE_CHANNELS),
+)
+
+# Functions reading each channel from a snapshot
+_CHANNEL_ACCESSORS: Final[tuple[Callable[[KiLightStateSnapshot], Any], ...]] = tuple(
+    snapshot_accessor(state_field, output_field)
+    for _, state_field, output_field in CAPTURE_CHANNELS
+)
+
+
+class KiLightTelemetryCapture:
+    """
+    Captures the sensor readings of one device at a high rate, for a bounded time.
+
+    The device state is read over the connection of the device, sharing it with polls and
+    commands, but the states read are neither handed to the device callbacks nor written
+    to entities, so they don't reach the recorder. Nothing runs between captures.
+
+    Samples are written into an array allocated when the capture starts, sized for the
+    rate and duration requested, and used as a ring buffer. Each row holds the time of the
+    sample since the start of the capture, in seconds, and then every channel, NaN where
+    the device has no reading. A sample that can't be taken in time, like while a command
+    holds the connection, is counted as missed instead of being taken late.
+
+    The last capture is kept until the next one starts, so it can be exported or included
+    in the diagnostics.
+    """
+
+    def __init__(self, hass: HomeAssistant, device: Device, name: str) -> None:
+        """
+        Initialize the capture.
+
+        :param HomeAssistant hass: Home Assistant instance
+        :param Device device: KiLight device to capture
+        :param str name: Name of the device, used for export file names
+        """
+        self._hass: HomeAssistant = hass
+        self._device: Device = device
+        self._name: str = name
+        self._samples: NDArray[np.float64] = np.empty((0, len(CAPTURE_COLUMNS)))
+        self._count: int = 0
+        self._missed: int = 0
+        self._rate: float = 0.0
+        self._started: datetime | None = None
+        self._running: bool = False
+
+    @property
+    def running(self) -> bool:
+        """Whether a capture is running."""
+        return self._running
+
+    @property
+    def missed(self) -> int:
+        """How many samples of the last capture couldn't be taken in time."""
+        return self._missed
+
+    @property
+    def samples(self) -> NDArray[np.float64]:
+        """The samples of the last capture, oldest first."""
+        if self._count <= len(self._samples):
+            return self._samples[: self._count].copy()
+        return np.roll(self._samples, -(self._count % len(self._samples)), axis=0)
+
+    async def async_capture(self, rate: float, duration: float) -> None:
+        """
+        Capture the readings of the device.
+
+        A capture that fails keeps the samples taken until then.
+
+        :param float rate: Samples per second
+        :param float duration: How long to capture for, in seconds
+        :raises CaptureInProgressError: The device is already being captured
+        """
+        if self._running:
+            raise CaptureInProgressError(self._name)
+
+        self._running = True
+        self._samples = np.full((ceil(rate * duration), len(CAPTURE_COLUMNS)), np.nan)
+        self._count = 0
+        self._missed = 0
+        self._rate = rate
+        self._started = dt_util.utcnow()
+        interval = 1 / rate
+        start = monotonic()
+        try:
+            for slot in range(len(self._samples)):
+                if (delay := start + slot * interval - monotonic()) < -interval:
+                    # Behind by more than a whole sample, skip to the current slot
+                    continue
+                await asyncio.sleep(max(delay, 0.0))
+                state = await self._device.connector.read_state(self._device.state)
+                self._record(monotonic() - start, KiLightStateSnapshot.from_state(state))
+        finally:
+            self._missed = len(self._samples) - self._count
+            self._running = False
+            _LOGGER.debug(
+                "%s: Captured %s samples, missed %s", self._name, self._count, self._missed
+            )
+
+    def _record(self, elapsed: float, snapshot: KiLightStateSnapshot) -> None:
+        """Write a sample into the ring buffer."""
+        row = self._samples[self._count % len(self._samples)]
+        row[0] = elapsed
+        for column, get_channel in enumerate(_CHANNEL_ACCESSORS, start=1):
+            value = get_channel(snapshot)
+            row[column] = value if value is not None else np.nan
+        self._count += 1
+
+    async def async_export(self, export_format: CaptureFormat) -> Path:
+        """
+        Export the last capture to a file in the capture directory of the configuration.
+
+        :param CaptureFormat export_format: File format to export in
+        :return: Path of the file written
+        """
+        started = self._started or dt_util.utcnow()
+        path = Path(
+            self._hass.config.path(
+                CAPTURE_DIRECTORY,
+                f"{slugify(self._name)}_{started.strftime('%Y%m%dT%H%M%S')}.{export_format}",
+            )
+        )
+        await self._hass.async_add_executor_job(
+            _write_capture, path, export_format, self.samples, self._rate
+        )
+        return path
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the last capture as a JSON-serializable dictionary, for the diagnostics."""
+        samples = self.samples
+        return {
+            "started": self._started.isoformat() if self._started is not None else None,
+            "rate": self._rate,
+            "samples": len(samples),
+            "missed": self._missed,
+            "columns": list(CAPTURE_COLUMNS),
+            "rows": [
+                [None if np.isnan(value) else float(value) for value in row] for row in samples
+            ],
+        }
+
+
+def _write_capture(
+    path: Path, export_format: CaptureFormat, samples: NDArray[np.float64], rate: float
+) -> None:
+    """Write the samples of a capture to a file, in the executor."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if export_format == CaptureFormat.Csv:
+        np.savetxt(path, samples, fmt="%.6g", delimiter=",", header=",".join(CAPTURE_COLUMNS))
+    else:
+        np.savez_compressed(path, samples=samples, columns=np.array(CAPTURE_COLUMNS), rate=rate)
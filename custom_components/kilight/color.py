@@ -0,0 +1,250 @@
+"""Conversion between Home Assistant colors and KiLight output channels, through lookup tables."""
+
+from __future__ import annotations
+
+from functools import cache
+import logging
+from typing import TYPE_CHECKING, Final
+
+from kilight.client import MAX_COLOR_TEMP, MIN_COLOR_TEMP
+import numpy as np
+
+from .const import DEFAULT_BRIGHTNESS_GAMMA
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+_LOGGER = logging.getLogger(__name__)
+
+# Steps per unit of the xy color table, xy colors are rounded to the nearest step
+_XY_STEPS: Final[int] = 256
+
+# Wide RGB D65 conversion from XYZ, the same Home Assistant uses for xy colors
+_XYZ_TO_RGB: Final = np.array(
+    [
+        [1.656492, -0.354851, -0.255038],
+        [-0.707196, 1.655397, 0.036152],
+        [0.051713, -0.121364, 1.011530],
+    ]
+)
+
+# Highest linear level on the straight segment of the sRGB gamma curve
+_SRGB_LINEAR_LIMIT: Final[float] = 0.0031308
+
+type RGBCW = tuple[int, int, int, int, int]
+
+
+@cache
+def _hs_table() -> NDArray[np.uint8]:
+    """
+    Build the RGB channel levels of every whole hue and saturation, at full value.
+
+    Matches homeassistant.util.color.color_hs_to_RGB, indexed by [hue, saturation].
+    """
+    # Scaled the same way as colorsys, so the tables round exactly like it
+    hue = np.arange(360, dtype=np.float64)[:, np.newaxis] / 360 * 6
+    saturation = np.arange(101, dtype=np.float64)[np.newaxis, :] / 100
+    sector = np.floor(hue).astype(np.int64) % 6
+    fraction = hue - np.floor(hue)
+    full = np.ones_like(saturation * hue)
+    low = np.broadcast_to(1 - saturation, full.shape)
+    falling = 1 - saturation * fraction
+    rising = 1 - saturation * (1 - fraction)
+
+    # Channel levels of each of the six hue sectors, the same as colorsys.hsv_to_rgb
+    red = np.choose(sector, [full, falling, low, low, rising, full])
+    green = np.choose(sector, [rising, full, full, falling, low, low])
+    blue = np.choose(sector, [low, low, rising, full, full, falling])
+    return np.rint(np.stack((red, green, blue), axis=-1) * 255).astype(np.uint8)
+
+
+@cache
+def _xy_table() -> NDArray[np.uint8]:
+    """
+    Build the RGB channel levels of xy colors at full brightness, on a grid of _XY_STEPS.
+
+    Matches homeassistant.util.color.color_xy_brightness_to_RGB, indexed by [x, y].
+    """
+    x = np.linspace(0, 1, _XY_STEPS + 1)[:, np.newaxis]
+    y = np.linspace(0, 1, _XY_STEPS + 1)[np.newaxis, :]
+    y = np.where(y == 0, 1e-11, y)
+    xyz = np.stack(np.broadcast_arrays(x / y, np.ones_like(x / y), (1 - x - y) / y), axis=-1)
+    rgb = xyz @ _XYZ_TO_RGB.T
+    # Reverse sRGB gamma, negative channels are out of gamut and dropped below
+    with np.errstate(invalid="ignore"):
+        rgb = np.where(
+            rgb <= _SRGB_LINEAR_LIMIT, 12.92 * rgb, 1.055 * np.power(rgb, 1 / 2.4) - 0.055
+        )
+    rgb = np.maximum(rgb, 0)
+    rgb /= np.maximum(rgb.max(axis=-1, keepdims=True), 1)
+    return (rgb * 255).astype(np.uint8)
+
+
+@cache
+def get_color_engine(
+    warm_white_kelvin: int = MIN_COLOR_TEMP,
+    cold_white_kelvin: int = MAX_COLOR_TEMP,
+    brightness_gamma: float = DEFAULT_BRIGHTNESS_GAMMA,
+) -> KiLightColorEngine:
+    """
+    Get the color engine of a calibration, shared by every device calibrated the same.
+
+    :param int warm_white_kelvin: Color temperature of the warm white channel
+    :param int cold_white_kelvin: Color temperature of the cold white channel
+    :param float brightness_gamma: Exponent the brightness is raised to for the device
+    """
+    return KiLightColorEngine(warm_white_kelvin, cold_white_kelvin, brightness_gamma)
+
+
+class KiLightColorEngine:
+    """
+    Converts colors and brightness of Home Assistant into KiLight channel levels.
+
+    Every conversion on the command path is a lookup in a table built once with NumPy:
+    color temperatures into the white channels, mixed linearly between the calibrated
+    temperatures of the warm and cold white LEDs like the client library does, brightness
+    through the gamma curve, and hs and xy colors straight onto the RGB channels. The hs
+    and xy tables don't depend on the calibration, so they are shared by every engine.
+    """
+
+    __slots__ = (
+        "_brightness_gamma",
+        "_cold_white_kelvin",
+        "_device_brightness",
+        "_ha_brightness",
+        "_hs",
+        "_kelvin_rgbcw",
+        "_warm_white_kelvin",
+        "_xy",
+    )
+
+    def __init__(
+        self,
+        warm_white_kelvin: int = MIN_COLOR_TEMP,
+        cold_white_kelvin: int = MAX_COLOR_TEMP,
+        brightness_gamma: float = DEFAULT_BRIGHTNESS_GAMMA,
+    ) -> None:
+        """
+        Initialize the color engine, building its lookup tables.
+
+        :param int warm_white_kelvin: Color temperature of the warm white channel
+        :param int cold_white_kelvin: Color temperature of the cold white channel
+        :param float brightness_gamma: Exponent the brightness is raised to for the device
+        """
+        self._warm_white_kelvin: int = warm_white_kelvin
+        self._cold_white_kelvin: int = cold_white_kelvin
+        self._brightness_gamma: float = brightness_gamma
+
+        kelvin = np.arange(warm_white_kelvin, cold_white_kelvin + 1, dtype=np.float64)
+        warm = (cold_white_kelvin - kelvin) / (cold_white_kelvin - warm_white_kelvin)
+        self._kelvin_rgbcw: list[RGBCW] = [
+            (0, 0, 0, cold, warm)
+            for cold, warm in np.rint(np.stack((1 - warm, warm), axis=-1) * 255)
+            .astype(np.uint8)
+            .tolist()
+        ]
+
+        device_brightness = np.rint((np.arange(256) / 255) ** brightness_gamma * 255).astype(
+            np.int64
+        )
+        # Every brightness above 0 stays lit
+        device_brightness[1:] = np.maximum(device_brightness[1:], 1)
+        self._device_brightness: list[int] = device_brightness.tolist()
+        self._ha_brightness: list[int] = self._inverse_brightness_table(device_brightness)
+        self._hs: NDArray[np.uint8] = _hs_table()
+        self._xy: NDArray[np.uint8] = _xy_table()
+        _LOGGER.debug(
+            "Built color tables for %s K - %s K, gamma %s",
+            warm_white_kelvin,
+            cold_white_kelvin,
+            brightness_gamma,
+        )
+
+    @property
+    def min_color_temp_kelvin(self) -> int:
+        """Warmest color temperature the device can show, that of the warm white channel."""
+        return self._warm_white_kelvin
+
+    @property
+    def max_color_temp_kelvin(self) -> int:
+        """Coldest color temperature the device can show, that of the cold white channel."""
+        return self._cold_white_kelvin
+
+    def color_temp_to_rgbcw(self, kelvin: int) -> RGBCW:
+        """
+        Get the channel levels of a color temperature.
+
+        :param int kelvin: The color temperature, clamped to the calibrated range
+        """
+        kelvin = min(max(kelvin, self._warm_white_kelvin), self._cold_white_kelvin)
+        return self._kelvin_rgbcw[kelvin - self._warm_white_kelvin]
+
+    def rgbcw_to_color_temp(self, rgbcw: RGBCW) -> int:
+        """
+        Get the color temperature the white channels of an output mix to.
+
+        :param RGBCW rgbcw: Channel levels of the output
+        """
+        cold, warm = rgbcw[3], rgbcw[4]
+        if cold + warm == 0:
+            return self._warm_white_kelvin
+        return round(
+            self._warm_white_kelvin
+            + (self._cold_white_kelvin - self._warm_white_kelvin) * cold / (cold + warm)
+        )
+
+    def hs_to_rgbcw(self, hs_color: tuple[float, float]) -> RGBCW:
+        """
+        Get the channel levels of a hue and saturation, on the RGB channels only.
+
+        :param tuple[float, float] hs_color: Hue from 0 to 360 and saturation from 0 to 100
+        """
+        hue, saturation = hs_color
+        red, green, blue = self._hs[round(hue) % 360, min(max(round(saturation), 0), 100)].tolist()
+        return red, green, blue, 0, 0
+
+    def xy_to_rgbcw(self, xy_color: tuple[float, float]) -> RGBCW:
+        """
+        Get the channel levels of a CIE xy color, on the RGB channels only.
+
+        :param tuple[float, float] xy_color: The x and y coordinates, from 0 to 1
+        """
+        x, y = (min(max(round(value * _XY_STEPS), 0), _XY_STEPS) for value in xy_color)
+        red, green, blue = self._xy[x, y].tolist()
+        return red, green, blue, 0, 0
+
+    def device_brightness(self, brightness: int) -> int:
+        """
+        Get the brightness to send to the device for a brightness of Home Assistant.
+
+        :param int brightness: Brightness from 0 to 255
+        """
+        return self._device_brightness[min(max(brightness, 0), 255)]
+
+    def ha_brightness(self, device_brightness: int) -> int:
+        """
+        Get the brightness of Home Assistant that a brightness of the device corresponds to.
+
+        :param int device_brightness: Brightness reported by the device, from 0 to 255
+        """
+        return self._ha_brightness[min(max(device_brightness, 0), 255)]
+
+    @staticmethod
+    def _inverse_brightness_table(device_brightness: NDArray[np.int64]) -> list[int]:
+        """
+        Get the brightness of Home Assistant closest to every device brightness.
+
+        A device brightness that some brightness of Home Assistant maps to maps back to the
+        lowest one that does, so showing a brightness and sending it again doesn't change
+        the device. Like the device brightness, every brightness above 0 stays lit.
+
+        :param NDArray[np.int64] device_brightness: Device brightness of every brightness of
+            Home Assistant, never decreasing
+        """
+        levels = np.arange(256)
+        above = np.minimum(np.searchsorted(device_brightness, levels), 255)
+        below = np.maximum(above - 1, 0)
+        closer_below = levels - device_brightness[below] < device_brightness[above] - levels
+        ha_brightness = np.where(closer_below, below, above)
+        ha_brightness[1:] = np.maximum(ha_brightness[1:], 1)
+        return ha_brightness.tolist()
@@ -0,0 +1,502 @@
+"""Command handling for KiLight outputs."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+import logging
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from kilight.client import OutputIdentifier
+from kilight.client.util import color_temp_to_white_levels
+
+from .device import KiLightDevice, is_connection_error
+from .exceptions import MissingOutputError, UnknownOutputError
+from .metrics import is_timeout
+from .presets import preset_updates
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from kilight.client import Device, OutputState
+
+    from .connection import KiLightConnectionManager
+    from .coordinator import KiLightCoordinator
+    from .metrics import KiLightDeviceMetrics
+    from .presets import KiLightPreset
+
+_LOGGER = logging.getLogger(__name__)
+
+# Output update fields that each replace the color of the output, so a newer one drops an
+# older pending one
+_COLOR_FIELDS: tuple[str, ...] = ("rgbcw_color", "color_temp")
+
+
+def apply_output_updates(output_state: OutputState, **updates: Any) -> OutputState:
+    """
+    Get the output state resulting from applying the given updates.
+
+    Gives the same result as Device.update_output_from_parts, which only offers writing
+    the result and reading the state back in one go. This lets the outputs of a batch be
+    written together, with a single state read.
+
+    :param OutputState output_state: Current state of the output
+    :return: The updated output state
+    """
+    if "rgbcw_color" in updates:
+        red, green, blue, cold_white, warm_white = updates["rgbcw_color"]
+        output_state = replace(
+            output_state,
+            red=red,
+            green=green,
+            blue=blue,
+            cold_white=cold_white,
+            warm_white=warm_white,
+        )
+
+    if "color_temp" in updates:
+        white_levels = color_temp_to_white_levels(updates["color_temp"])
+        output_state = replace(
+            output_state,
+            red=0,
+            green=0,
+            blue=0,
+            cold_white=white_levels.cold_white,
+            warm_white=white_levels.warm_white,
+        )
+
+    if "brightness" in updates:
+        output_state = replace(output_state, brightness=updates["brightness"])
+
+    if "power_on" in updates:
+        output_state = replace(output_state, power_on=updates["power_on"])
+
+    return output_state
+
+
+def merge_output_updates(older: dict[str, Any], newer: dict[str, Any]) -> dict[str, Any]:
+    """
+    Merge newer output updates over older ones, last writer wins per field.
+
+    A newer color of either kind replaces an older one of either kind.
+
+    :param dict[str, Any] older: The updates issued first
+    :param dict[str, Any] newer: The updates issued later
+    :return: The merged updates
+    """
+    if any(color_field in newer for color_field in _COLOR_FIELDS):
+        older = {key: value for key, value in older.items() if key not in _COLOR_FIELDS}
+    return {**older, **newer}
+
+
+def _chain_result(source: asyncio.Future[None], target: asyncio.Future[None]) -> None:
+    """Hand the outcome of one future to another."""
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif (err := source.exception()) is not None:
+        target.set_exception(err)
+    else:
+        target.set_result(None)
+
+
+def output_settings(output_state: OutputState | None) -> tuple | None:
+    """Get the user-controllable settings of an output, ignoring its measurements."""
+    if output_state is None:
+        return None
+    return output_state.power_on, output_state.brightness, output_state.rgbcw
+
+
+class KiLightDeviceCommander:
+    """
+    Batches output writes to one KiLight that are issued in the same event loop tick.
+
+    The protocol can only write one output per request, so writes to both outputs of a
+    device, like from a scene or a light group, can't be combined into one message.
+    Instead their requests are serialized back to back and sent in one go, through
+    KiLightDevice.write_outputs, without waiting for each answer before the next request,
+    and a single state read covers the whole batch. A batch of one output goes through
+    Device.update_output_from_parts.
+
+    A recalled preset replaces the batch for the outputs it covers. If nothing else joins
+    the batch, its precomputed payload is sent as is, all outputs in a single write.
+
+    While thermal protection limits the brightness of the device, every batch is capped at
+    the limit, and the brightness each output was asked for is remembered. Changing the
+    limit rewrites the outputs whose brightness it changes, and lifting it restores the
+    brightness they were asked for.
+
+    With a connection manager, batches issued while the link is down, or that fail because
+    it went down, are parked instead of failed. Parked batches are merged and replayed
+    once the link is restored, and their callers keep waiting until then.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        device: Device,
+        metrics: KiLightDeviceMetrics | None = None,
+        connection: KiLightConnectionManager | None = None,
+    ) -> None:
+        """
+        Initialize the commander.
+
+        :param HomeAssistant hass: Home Assistant instance
+        :param Device device: KiLight device to write to
+        :param KiLightDeviceMetrics | None metrics: Metrics to record the write latency and
+            timeouts in
+        :param KiLightConnectionManager | None connection: Connection manager telling
+            whether the link is up, to park writes while it is down
+        """
+        self._hass: HomeAssistant = hass
+        self._device: Device = device
+        self._metrics: KiLightDeviceMetrics | None = metrics
+        self._connection: KiLightConnectionManager | None = connection
+        self._batch: dict[OutputIdentifier, dict[str, Any]] = {}
+        self._batch_written: asyncio.Future[None] | None = None
+        self._batch_preset: KiLightPreset | None = None
+        self._writer: asyncio.Task[None] | None = None
+        self._parked: dict[OutputIdentifier, dict[str, Any]] = {}
+        self._parked_written: list[asyncio.Future[None]] = []
+        self._brightness_limit: int | None = None
+        self._requested_brightness: dict[OutputIdentifier, int] = {}
+
+    @property
+    def parked(self) -> bool:
+        """Whether there are writes waiting for the link to be restored."""
+        return bool(self._parked)
+
+    @property
+    def brightness_limit(self) -> int | None:
+        """Highest brightness outputs are written with, None when not limited."""
+        return self._brightness_limit
+
+    def limit_output_state(self, output_state: OutputState) -> OutputState:
+        """
+        Get an output state as it is written under the current brightness limit.
+
+        :param OutputState output_state: The requested output state
+        :return: The output state with its brightness capped at the limit
+        """
+        if self._brightness_limit is None or output_state.brightness <= self._brightness_limit:
+            return output_state
+        return replace(output_state, brightness=self._brightness_limit)
+
+    async def async_set_brightness_limit(self, limit: int | None) -> None:
+        """
+        Limit the brightness of every output, or lift the limit, and write the outputs it changes.
+
+        :param int | None limit: Highest brightness to write, None to lift the limit
+        """
+        if limit == self._brightness_limit:
+            return
+        if self._brightness_limit is None:
+            # Brightness waiting to be written counts as asked for too
+            self._requested_brightness = {
+                output: self._batch.get(output, {}).get("brightness", output_state.brightness)
+                for output, output_state in self._output_states()
+            }
+        self._brightness_limit = limit
+
+        for output, output_state in self._output_states():
+            if (brightness := self._limit_brightness(output)) != output_state.brightness:
+                self._batch.setdefault(output, {})["brightness"] = brightness
+        if limit is None:
+            self._requested_brightness = {}
+        if self._batch:
+            self._batch_preset = None
+            await asyncio.shield(self._async_start_batch())
+
+    async def async_write(self, output: OutputIdentifier, **updates: Any) -> None:
+        """
+        Add output updates to the current batch and wait until the batch is written.
+
+        Accepts the same keyword arguments as Device.update_output_from_parts.
+
+        :param OutputIdentifier output: Which output to update
+        """
+        if self._brightness_limit is not None and "brightness" in updates:
+            self._requested_brightness[output] = updates["brightness"]
+        self._batch[output] = merge_output_updates(self._batch.get(output, {}), updates)
+        self._batch_preset = None
+        await asyncio.shield(self._async_start_batch())
+
+    async def async_recall(self, preset: KiLightPreset) -> None:
+        """
+        Replace the current batch of the outputs of a preset with it and wait until written.
+
+        :param KiLightPreset preset: The preset to apply
+        """
+        for output, output_state in preset.outputs:
+            self._batch[output] = preset_updates(output_state)
+            if self._brightness_limit is not None:
+                self._requested_brightness[output] = output_state.brightness
+        # Only a batch of nothing but the preset can be sent as its payload
+        self._batch_preset = preset if len(self._batch) == len(preset.outputs) else None
+        await asyncio.shield(self._async_start_batch())
+
+    def async_replay(self) -> None:
+        """Write the parked batches as one, under any writes issued since."""
+        if not self._parked:
+            return
+
+        parked, parked_written = self._parked, self._parked_written
+        self._parked, self._parked_written = {}, []
+        _LOGGER.debug("%s: Replaying writes to %s outputs", self._device.name, len(parked))
+        for output, updates in parked.items():
+            self._batch[output] = merge_output_updates(updates, self._batch.get(output, {}))
+        self._batch_preset = None
+
+        batch_written = self._async_start_batch()
+        for written in parked_written:
+            batch_written.add_done_callback(
+                lambda source, target=written: _chain_result(source, target)
+            )
+
+    def cancel(self) -> None:
+        """Stop writing and drop the current and parked batches."""
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        for written in (self._batch_written, *self._parked_written):
+            if written is not None and not written.done():
+                written.cancel()
+        self._batch_written = None
+        self._batch = {}
+        self._batch_preset = None
+        self._parked_written = []
+        self._parked = {}
+
+    def _async_start_batch(self) -> asyncio.Future[None]:
+        """Make sure the current batch gets written, returning the future of its write."""
+        if self._batch_written is None:
+            self._batch_written = asyncio.get_running_loop().create_future()
+        batch_written = self._batch_written
+
+        if self._writer is None or self._writer.done():
+            self._writer = self._hass.async_create_background_task(
+                self._async_write_batches(),
+                name=f"KiLight {self._device.name} batch writer",
+                eager_start=False,
+            )
+
+        return batch_written
+
+    def _park(
+        self, batch: dict[OutputIdentifier, dict[str, Any]], written: asyncio.Future[None]
+    ) -> None:
+        """Keep a batch to replay once the link is restored."""
+        _LOGGER.debug("%s: Link down, parking writes to %s outputs", self._device.name, len(batch))
+        for output, updates in batch.items():
+            self._parked[output] = merge_output_updates(self._parked.get(output, {}), updates)
+        self._parked_written.append(written)
+
+    def _link_down(self) -> bool:
+        return self._connection is not None and not self._connection.link_up
+
+    async def _async_write_batches(self) -> None:
+        """Write batches until there are none left."""
+        # Give writes issued alongside the first one a chance to join the batch
+        await asyncio.sleep(0)
+
+        while self._batch_written is not None:
+            batch, written, preset = self._batch, self._batch_written, self._batch_preset
+            self._batch, self._batch_written, self._batch_preset = {}, None, None
+
+            if self._link_down():
+                self._park(batch, written)
+                continue
+
+            start_time = monotonic()
+            try:
+                await self._async_write(batch, preset)
+            except asyncio.CancelledError:
+                written.cancel()
+                raise
+            except Exception as err:  # noqa: BLE001 Handed to every waiting caller instead
+                if self._metrics is not None and is_timeout(err):
+                    self._metrics.record_timeout()
+                if is_connection_error(err) and self._link_down():
+                    self._park(batch, written)
+                else:
+                    written.set_exception(err)
+            else:
+                if self._metrics is not None:
+                    self._metrics.record_command_latency(monotonic() - start_time)
+                written.set_result(None)
+
+    async def _async_write(
+        self, batch: dict[OutputIdentifier, dict[str, Any]], preset: KiLightPreset | None
+    ) -> None:
+        """Write a batch, as the payload of its preset if it is nothing but one."""
+        if self._brightness_limit is not None:
+            # A preset payload can't be capped, so its outputs are written one by one
+            batch, preset = self._limit_batch(batch), None
+        if preset is not None and isinstance(self._device, KiLightDevice):
+            await self._device.write_packed(preset.payload, len(preset.outputs))
+        else:
+            await self._async_write_batch(batch)
+
+    async def _async_write_batch(self, batch: dict[OutputIdentifier, dict[str, Any]]) -> None:
+        """Write a batch, sending the requests of all its outputs in one go if it has several."""
+        # Check all outputs before writing anything, so a batch is never half applied
+        writes = [
+            (output, self._get_output_state(output), updates) for output, updates in batch.items()
+        ]
+        *first_writes, (last_output, _, last_updates) = writes
+
+        if not first_writes:
+            await self._device.update_output_from_parts(last_output, **last_updates)
+            return
+
+        _LOGGER.debug("%s: Writing batch of %s outputs", self._device.name, len(writes))
+        if isinstance(self._device, KiLightDevice):
+            await self._device.write_outputs(
+                tuple(
+                    (output, apply_output_updates(output_state, **updates))
+                    for output, output_state, updates in writes
+                )
+            )
+            return
+
+        # A plain Device can only write one output at a time, the last one reading the state
+        # back for the whole batch
+        for output, output_state, updates in first_writes:
+            await self._device.connector.write_update(
+                output, apply_output_updates(output_state, **updates)
+            )
+        await self._device.update_output_from_parts(last_output, **last_updates)
+
+    def _limit_batch(
+        self, batch: dict[OutputIdentifier, dict[str, Any]]
+    ) -> dict[OutputIdentifier, dict[str, Any]]:
+        """Cap the brightness of every output of a batch at the brightness limit."""
+        return {
+            output: {**updates, "brightness": self._limit_brightness(output, updates)}
+            for output, updates in batch.items()
+        }
+
+    def _limit_brightness(
+        self, output: OutputIdentifier, updates: dict[str, Any] | None = None
+    ) -> int:
+        """Get the brightness an output was asked for, capped at the brightness limit."""
+        requested = self._requested_brightness.get(output)
+        if requested is None:
+            requested = (updates or {}).get("brightness", self._get_output_state(output).brightness)
+        if self._brightness_limit is None:
+            return requested
+        return min(requested, self._brightness_limit)
+
+    def _output_states(self) -> list[tuple[OutputIdentifier, OutputState]]:
+        """Get the state of every output the device has."""
+        output_states = [(OutputIdentifier.OutputA, self._device.state.output_a)]
+        if self._device.state.output_b is not None:
+            output_states.append((OutputIdentifier.OutputB, self._device.state.output_b))
+        return output_states
+
+    def _get_output_state(self, output: OutputIdentifier) -> OutputState:
+        if output == OutputIdentifier.OutputA:
+            return self._device.state.output_a
+        if output == OutputIdentifier.OutputB:
+            if self._device.state.output_b is None:
+                raise MissingOutputError(output)
+            return self._device.state.output_b
+        raise UnknownOutputError(output)
+
+
+class KiLightCommandCoalescer:
+    """
+    Coalesces bursts of updates to one output of a KiLight into as few writes as possible.
+
+    The device only has a single connection, so every write has to wait for the previous
+    one. Instead of queueing one write per command, at most one write is in flight and all
+    updates that arrive in the meantime are merged, last writer wins per field, into one
+    pending write. Writes are spaced at least the coordinator's command window apart.
+    """
+
+    def __init__(
+        self,
+        coordinator: KiLightCoordinator,
+        device: Device,
+        output: OutputIdentifier,
+    ) -> None:
+        """
+        Initialize the coalescer.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator, provides the window and
+            the commander writes go through
+        :param Device device: KiLight device to write to
+        :param OutputIdentifier output: Which output of the device this writes to
+        """
+        self._coordinator: KiLightCoordinator = coordinator
+        self._device: Device = device
+        self._output: OutputIdentifier = output
+        self._pending_updates: dict[str, Any] = {}
+        self._pending_written: asyncio.Future[None] | None = None
+        self._sender: asyncio.Task[None] | None = None
+        self._last_write_time: float = 0.0
+
+    @property
+    def command_window(self) -> float:
+        """Minimum time between two writes to the output, in seconds."""
+        return self._coordinator.command_window
+
+    async def async_send(self, **updates: Any) -> None:
+        """
+        Merge the given output updates into the pending write and wait until it is written.
+
+        Accepts the same keyword arguments as Device.update_output_from_parts.
+        """
+        self._pending_updates = merge_output_updates(self._pending_updates, updates)
+
+        if self._pending_written is None:
+            self._pending_written = asyncio.get_running_loop().create_future()
+        pending_written = self._pending_written
+
+        if self._sender is None or self._sender.done():
+            self._sender = self._coordinator.hass.async_create_background_task(
+                self._async_send_pending(),
+                name=f"KiLight {self._device.name} Output "
+                f"{OutputIdentifier.Name(self._output)} writer",
+                eager_start=False,
+            )
+
+        await asyncio.shield(pending_written)
+
+    def cancel(self) -> None:
+        """Stop sending and drop any pending write."""
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        if self._pending_written is not None and not self._pending_written.done():
+            self._pending_written.cancel()
+        self._pending_written = None
+        self._pending_updates = {}
+
+    async def _async_send_pending(self) -> None:
+        """Write pending updates until there are none left."""
+        while self._pending_written is not None:
+            wait_time = self._last_write_time + self._coordinator.command_window - monotonic()
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+
+            updates, written = self._pending_updates, self._pending_written
+            self._pending_updates, self._pending_written = {}, None
+            self._last_write_time = monotonic()
+
+            _LOGGER.debug(
+                "%s Output %s: Writing coalesced updates %s",
+                self._device.name,
+                OutputIdentifier.Name(self._output),
+                updates,
+            )
+            try:
+                await self._coordinator.commander.async_write(self._output, **updates)
+            except asyncio.CancelledError:
+                written.cancel()
+                raise
+            except Exception as err:  # noqa: BLE001 Handed to every waiting caller instead
+                written.set_exception(err)
+            else:
+                written.set_result(None)
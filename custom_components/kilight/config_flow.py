@@ -2,19 +2,72 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import TYPE_CHECKING, Any
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
-from homeassistant.const import CONF_ADDRESS, CONF_HOST, CONF_PORT
-from kilight.client import DEFAULT_PORT, Device
+from homeassistant.config_entries import SOURCE_USER, ConfigFlow, ConfigFlowResult, OptionsFlow
+from homeassistant.const import CONF_ADDRESS, CONF_DEVICES, CONF_HOST, CONF_PORT
+from homeassistant.core import callback
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+)
+from kilight.client import DEFAULT_PORT, MAX_COLOR_TEMP, MIN_COLOR_TEMP
 from kilight.client.exceptions import NetworkTimeoutError
 import voluptuous as vol
 
-from .const import DOMAIN
+from .cache import KiLightStateCache
+from .const import (
+    CONF_BRIGHTNESS_GAMMA,
+    CONF_COLD_WHITE_KELVIN,
+    CONF_COMMAND_WINDOW,
+    CONF_CURRENT_DEADBAND,
+    CONF_DRIVER_TEMPERATURE_LIMIT,
+    CONF_FAN_DRIVE_DEADBAND,
+    CONF_FAN_SPEED_DEADBAND,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_OPTIMISTIC,
+    CONF_OUTPUT_TEMPERATURE_LIMIT,
+    CONF_POWER_SUPPLY_TEMPERATURE_LIMIT,
+    CONF_SUPPLY_VOLTAGE,
+    CONF_TELEMETRY_AGGREGATE,
+    CONF_TELEMETRY_MIN_INTERVAL,
+    CONF_TELEMETRY_WINDOW,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_THERMAL_PROTECTION,
+    CONF_WARM_WHITE_KELVIN,
+    DEFAULT_BRIGHTNESS_GAMMA,
+    DEFAULT_COMMAND_WINDOW_MILLISECONDS,
+    DEFAULT_CURRENT_DEADBAND_AMPERES,
+    DEFAULT_DRIVER_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_FAN_DRIVE_DEADBAND_PERCENT,
+    DEFAULT_FAN_SPEED_DEADBAND_RPM,
+    DEFAULT_MAX_UPDATE_INTERVAL_SECONDS,
+    DEFAULT_MIN_UPDATE_INTERVAL_SECONDS,
+    DEFAULT_OPTIMISTIC,
+    DEFAULT_OUTPUT_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_POWER_SUPPLY_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_SUPPLY_VOLTAGE,
+    DEFAULT_TELEMETRY_AGGREGATE,
+    DEFAULT_TELEMETRY_MIN_INTERVAL_SECONDS,
+    DEFAULT_TELEMETRY_WINDOW_SECONDS,
+    DEFAULT_TEMPERATURE_DEADBAND_CELSIUS,
+    DEFAULT_THERMAL_PROTECTION,
+    DOMAIN,
+    SOURCE_ONBOARD,
+)
+from .discovery import async_get_discovery_cache
+from .enum import TelemetryAggregate
 
 if TYPE_CHECKING:
     from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
+    from kilight.client import Device
+
+    from .types import KiLightConfigEntry
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,6 +81,14 @@ class KiLightConfigFlow(ConfigFlow, domain=DOMAIN):
         """Initialize the config flow."""
         self._discovery_info: ZeroconfServiceInfo | None = None
         self._discovered_devices: dict[str, ZeroconfServiceInfo] = {}
+        # Hardware IDs of the devices this flow read through the discovery cache
+        self._read_devices: set[str] = set()
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: KiLightConfigEntry) -> KiLightOptionsFlow:  # noqa: ARG004 Signature required by Home Assistant
+        """Get the options flow for this handler."""
+        return KiLightOptionsFlow()
 
     @property
     def discovered_devices(self) -> dict[str, ZeroconfServiceInfo]:
@@ -35,42 +96,47 @@ class KiLightConfigFlow(ConfigFlow, domain=DOMAIN):
         return self._discovered_devices
 
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
-        """Handle the user step to pick discovered device."""
+        """Offer to set up one or several devices, when more than one was discovered."""
+        if user_input is None and self.source == SOURCE_USER:
+            for hardware_id, discovery_info in async_get_discovery_cache(
+                self.hass
+            ).announcements.items():
+                self._discovered_devices.setdefault(hardware_id, discovery_info)
+
+            if len(self._unconfigured_devices()) > 1:
+                # Disable due to false-positive error for ConfigFlowResult type
+                # noinspection PyTypeChecker
+                return self.async_show_menu(step_id="user", menu_options=["pick_device", "bulk"])
+
+        return await self.async_step_pick_device(user_input)
+
+    async def async_step_pick_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle the step to pick one discovered device."""
         errors: dict[str, str] = {}
 
         if user_input is not None:
             address_unique_id = user_input[CONF_ADDRESS]
 
-            discovery_info = self.discovered_devices[address_unique_id]
             await self.async_set_unique_id(address_unique_id, raise_on_progress=False)
             self._abort_if_unique_id_configured()
-            device = Device(discovery_info.host, discovery_info.port)
             # noinspection PyBroadException
             try:
-                await device.update_state()
-                name = device.name
+                return await self._async_create_discovered_entry(
+                    address_unique_id, self._entry_data(address_unique_id)
+                )
             except NetworkTimeoutError:
                 _LOGGER.exception("Timed out during discovery state update")
                 errors["base"] = "cannot_connect"
             except Exception:
                 _LOGGER.exception("Unexpected error")
                 errors["base"] = "unknown"
-            else:
-                await device.disconnect()
-                # Disable due to false-positive error for ConfigFlowResult type
-                # noinspection PyTypeChecker
-                return self.async_create_entry(
-                    title=name,
-                    data={
-                        CONF_HOST: discovery_info.host,
-                        CONF_PORT: discovery_info.port if discovery_info else DEFAULT_PORT,
-                    },
-                )
 
         if discovery := self._discovery_info:
             self._discovered_devices[discovery.properties["hwid"]] = discovery
 
-        if not self.discovered_devices:
+        if not (discovered_devices := self._unconfigured_devices()):
             # Disable due to false-positive error for ConfigFlowResult type
             # noinspection PyTypeChecker
             return self.async_abort(reason="no_devices_found")
@@ -79,17 +145,99 @@ class KiLightConfigFlow(ConfigFlow, domain=DOMAIN):
             {
                 vol.Required(CONF_ADDRESS): vol.In(
                     {
-                        service_info.properties["hwid"]: (
+                        hardware_id: (
                             f"{service_info.hostname} ({service_info.host}:{service_info.port})"
                         )
-                        for service_info in self.discovered_devices.values()
+                        for hardware_id, service_info in discovered_devices.items()
                     }
                 )
             }
         )
         # Disable due to false-positive error for ConfigFlowResult type
         # noinspection PyTypeChecker
-        return self.async_show_form(step_id="user", data_schema=data_schema, errors=errors)
+        return self.async_show_form(step_id="pick_device", data_schema=data_schema, errors=errors)
+
+    async def async_step_bulk(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """
+        Handle the step to set up several discovered devices at once.
+
+        Every discovered device is read concurrently, and the ones that answered are offered
+        in a single form. The first selected device is set up by this flow, and every other
+        one by a flow of its own started right away, from what was read here.
+        """
+        errors: dict[str, str] = {}
+        discovery_cache = async_get_discovery_cache(self.hass)
+        discovered_devices = self._unconfigured_devices()
+
+        if user_input is not None:
+            if selected := user_input[CONF_DEVICES]:
+                first, *others = selected
+                await asyncio.gather(
+                    *(
+                        self.hass.config_entries.flow.async_init(
+                            DOMAIN,
+                            context={"source": SOURCE_ONBOARD},
+                            data={CONF_ADDRESS: hardware_id, **self._entry_data(hardware_id)},
+                        )
+                        for hardware_id in others
+                    )
+                )
+                await self.async_set_unique_id(first, raise_on_progress=False)
+                self._abort_if_unique_id_configured()
+                return await self._async_create_discovered_entry(first, self._entry_data(first))
+            errors["base"] = "no_devices_selected"
+
+        devices = await discovery_cache.async_read_all(discovered_devices)
+        self._read_devices.update(devices)
+        if not devices:
+            # Disable due to false-positive error for ConfigFlowResult type
+            # noinspection PyTypeChecker
+            return self.async_abort(reason="no_devices_found")
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(CONF_DEVICES, default=list(devices)): SelectSelector(
+                    SelectSelectorConfig(
+                        options=[
+                            SelectOptionDict(
+                                value=hardware_id,
+                                label=self._bulk_label(discovered_devices[hardware_id], device),
+                            )
+                            for hardware_id, device in devices.items()
+                        ],
+                        multiple=True,
+                        mode=SelectSelectorMode.LIST,
+                    )
+                )
+            }
+        )
+        # Disable due to false-positive error for ConfigFlowResult type
+        # noinspection PyTypeChecker
+        return self.async_show_form(
+            step_id="bulk",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders={
+                "found": str(len(devices)),
+                "unreachable": str(len(discovered_devices) - len(devices)),
+            },
+        )
+
+    async def async_step_onboard(self, discovery: dict[str, Any]) -> ConfigFlowResult:
+        """Set up a device selected together with others in the bulk step."""
+        hardware_id = discovery[CONF_ADDRESS]
+        await self.async_set_unique_id(hardware_id, raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+
+        try:
+            return await self._async_create_discovered_entry(
+                hardware_id, {CONF_HOST: discovery[CONF_HOST], CONF_PORT: discovery[CONF_PORT]}
+            )
+        except (NetworkTimeoutError, OSError):
+            _LOGGER.debug("Unable to read discovered KiLight %s", hardware_id)
+            # Disable due to false-positive error for ConfigFlowResult type
+            # noinspection PyTypeChecker
+            return self.async_abort(reason="cannot_connect")
 
     async def async_step_zeroconf(self, discovery_info: ZeroconfServiceInfo) -> ConfigFlowResult:
         """Handle device found via zeroconf."""
@@ -104,19 +252,196 @@ class KiLightConfigFlow(ConfigFlow, domain=DOMAIN):
 
         _LOGGER.debug("Found KiLight device via zeroconf: %s:%s (%s)", host, port, hardware_id)
 
-        device = Device(host, port)
+        async_get_discovery_cache(self.hass).async_announce(hardware_id, discovery_info)
 
-        await device.update_state()
+        # Repeated announcements of a configured device end here, without connecting to it
+        await self.async_set_unique_id(hardware_id)
+        self._abort_if_unique_id_configured()
+
+        self._read_devices.add(hardware_id)
+        # noinspection PyBroadException
+        try:
+            device = await async_get_discovery_cache(self.hass).async_read(hardware_id, host, port)
+        except (NetworkTimeoutError, OSError):
+            _LOGGER.debug("Unable to read discovered KiLight at %s:%s", host, port)
+            # Disable due to false-positive error for ConfigFlowResult type
+            # noinspection PyTypeChecker
+            return self.async_abort(reason="cannot_connect")
 
         self._discovery_info = discovery_info
 
         _LOGGER.debug(discovery_info)
 
-        await self.async_set_unique_id(device.state.hardware_id)
-        self._abort_if_unique_id_configured()
-
         self.context["title_placeholders"] = {"name": device.name}
 
         # Disable due to false-positive error for ConfigFlowResult type
         # noinspection PyTypeChecker
-        return await self.async_step_user()
+        return await self.async_step_pick_device()
+
+    @callback
+    def async_remove(self) -> None:
+        """Drop the devices this flow read from the discovery cache, once it ended."""
+        async_get_discovery_cache(self.hass).async_release(self._read_devices)
+
+    def _unconfigured_devices(self) -> dict[str, ZeroconfServiceInfo]:
+        """Get the discovered devices that aren't set up yet."""
+        configured = self._async_current_ids(include_ignore=False)
+        return {
+            hardware_id: discovery_info
+            for hardware_id, discovery_info in self.discovered_devices.items()
+            if hardware_id not in configured
+        }
+
+    def _entry_data(self, hardware_id: str) -> dict[str, Any]:
+        """Get the config entry data of a discovered device."""
+        discovery_info = self.discovered_devices[hardware_id]
+        return {CONF_HOST: discovery_info.host, CONF_PORT: discovery_info.port or DEFAULT_PORT}
+
+    @staticmethod
+    def _bulk_label(discovery_info: ZeroconfServiceInfo, device: Device) -> str:
+        """Describe a device in the bulk step, by its name, model and firmware."""
+        return (
+            f"{discovery_info.hostname} - {device.state.model}, firmware"
+            f" {device.state.firmware_version} ({discovery_info.host}:{discovery_info.port})"
+        )
+
+    async def _async_create_discovered_entry(
+        self, hardware_id: str, entry_data: dict[str, Any]
+    ) -> ConfigFlowResult:
+        """Create the entry of a discovered device, reading it unless it was read already."""
+        discovery_cache = async_get_discovery_cache(self.hass)
+        device = await discovery_cache.async_read(
+            hardware_id, entry_data[CONF_HOST], entry_data[CONF_PORT]
+        )
+        # Lets the entry be set up without reading the device again
+        await KiLightStateCache(self.hass, hardware_id).async_save(device.state)
+        discovery_cache.async_forget(hardware_id)
+        # Disable due to false-positive error for ConfigFlowResult type
+        # noinspection PyTypeChecker
+        return self.async_create_entry(title=device.name, data=entry_data)
+
+
+class KiLightOptionsFlow(OptionsFlow):
+    """Handle the options of a KiLight config entry."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage the poll interval, command, color, telemetry, thermal and power options."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            if user_input[CONF_MIN_UPDATE_INTERVAL] > user_input[CONF_MAX_UPDATE_INTERVAL]:
+                errors["base"] = "invalid_update_interval"
+            elif user_input[CONF_WARM_WHITE_KELVIN] >= user_input[CONF_COLD_WHITE_KELVIN]:
+                errors["base"] = "invalid_white_kelvin"
+            else:
+                # Disable due to false-positive error for ConfigFlowResult type
+                # noinspection PyTypeChecker
+                return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        data_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MIN_UPDATE_INTERVAL,
+                    default=options.get(
+                        CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL_SECONDS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_MAX_UPDATE_INTERVAL,
+                    default=options.get(
+                        CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL_SECONDS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_COMMAND_WINDOW,
+                    default=options.get(CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW_MILLISECONDS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+                vol.Required(
+                    CONF_OPTIMISTIC,
+                    default=options.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC),
+                ): bool,
+                vol.Required(
+                    CONF_WARM_WHITE_KELVIN,
+                    default=options.get(CONF_WARM_WHITE_KELVIN, MIN_COLOR_TEMP),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1000, max=20000)),
+                vol.Required(
+                    CONF_COLD_WHITE_KELVIN,
+                    default=options.get(CONF_COLD_WHITE_KELVIN, MAX_COLOR_TEMP),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1000, max=20000)),
+                vol.Required(
+                    CONF_BRIGHTNESS_GAMMA,
+                    default=options.get(CONF_BRIGHTNESS_GAMMA, DEFAULT_BRIGHTNESS_GAMMA),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.2, max=5.0)),
+                vol.Required(
+                    CONF_CURRENT_DEADBAND,
+                    default=options.get(CONF_CURRENT_DEADBAND, DEFAULT_CURRENT_DEADBAND_AMPERES),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Required(
+                    CONF_TEMPERATURE_DEADBAND,
+                    default=options.get(
+                        CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND_CELSIUS
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=20)),
+                vol.Required(
+                    CONF_FAN_SPEED_DEADBAND,
+                    default=options.get(CONF_FAN_SPEED_DEADBAND, DEFAULT_FAN_SPEED_DEADBAND_RPM),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5000)),
+                vol.Required(
+                    CONF_FAN_DRIVE_DEADBAND,
+                    default=options.get(
+                        CONF_FAN_DRIVE_DEADBAND, DEFAULT_FAN_DRIVE_DEADBAND_PERCENT
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Required(
+                    CONF_TELEMETRY_MIN_INTERVAL,
+                    default=options.get(
+                        CONF_TELEMETRY_MIN_INTERVAL, DEFAULT_TELEMETRY_MIN_INTERVAL_SECONDS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Required(
+                    CONF_TELEMETRY_WINDOW,
+                    default=options.get(CONF_TELEMETRY_WINDOW, DEFAULT_TELEMETRY_WINDOW_SECONDS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                vol.Required(
+                    CONF_TELEMETRY_AGGREGATE,
+                    default=options.get(CONF_TELEMETRY_AGGREGATE, DEFAULT_TELEMETRY_AGGREGATE),
+                ): SelectSelector(
+                    SelectSelectorConfig(
+                        options=[aggregate.value for aggregate in TelemetryAggregate],
+                        mode=SelectSelectorMode.DROPDOWN,
+                        translation_key=CONF_TELEMETRY_AGGREGATE,
+                    )
+                ),
+                vol.Required(
+                    CONF_THERMAL_PROTECTION,
+                    default=options.get(CONF_THERMAL_PROTECTION, DEFAULT_THERMAL_PROTECTION),
+                ): bool,
+                vol.Required(
+                    CONF_DRIVER_TEMPERATURE_LIMIT,
+                    default=options.get(
+                        CONF_DRIVER_TEMPERATURE_LIMIT, DEFAULT_DRIVER_TEMPERATURE_LIMIT_CELSIUS
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=30, max=125)),
+                vol.Required(
+                    CONF_POWER_SUPPLY_TEMPERATURE_LIMIT,
+                    default=options.get(
+                        CONF_POWER_SUPPLY_TEMPERATURE_LIMIT,
+                        DEFAULT_POWER_SUPPLY_TEMPERATURE_LIMIT_CELSIUS,
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=30, max=125)),
+                vol.Required(
+                    CONF_OUTPUT_TEMPERATURE_LIMIT,
+                    default=options.get(
+                        CONF_OUTPUT_TEMPERATURE_LIMIT, DEFAULT_OUTPUT_TEMPERATURE_LIMIT_CELSIUS
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=30, max=125)),
+                vol.Required(
+                    CONF_SUPPLY_VOLTAGE,
+                    default=options.get(CONF_SUPPLY_VOLTAGE, DEFAULT_SUPPLY_VOLTAGE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=60)),
+            }
+        )
+        # Disable due to false-positive error for ConfigFlowResult type
+        # noinspection PyTypeChecker
+        return self.async_show_form(step_id="init", data_schema=data_schema, errors=errors)
@@ -0,0 +1,254 @@
+"""Connection lifecycle management for the KiLight integration."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+import logging
+import random
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    CONNECTION_HEARTBEAT_SECONDS,
+    CONNECTION_HEARTBEAT_TIMEOUT_SECONDS,
+    RECONNECT_MAX_DELAY_SECONDS,
+    RECONNECT_MIN_DELAY_SECONDS,
+)
+from .device import KiLightConnector
+
+if TYPE_CHECKING:
+    from asyncio import TimerHandle
+    from collections.abc import Callable
+
+    from homeassistant.config_entries import ConfigEntry
+    from kilight.client import Device
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class KiLightConnectionManager:
+    """
+    Watches the connection to one KiLight and restores it when it fails.
+
+    The link is considered dead as soon as an exchange with the device fails on the
+    connection level, or a heartbeat isn't answered within the heartbeat timeout.
+    Heartbeats are only sent once the connection sat idle for the heartbeat interval, so a
+    device that is polled or commanded often doesn't get any. Neither does a device whose
+    next poll is due within the heartbeat interval, the poll checks the link soon enough on
+    its own. A connection closed by the
+    device or the network, like by TCP keepalive, is first reopened right away, and only
+    reported as lost if that fails.
+
+    While the link is down, the device is probed with a jittered exponential back-off until
+    it answers again. The owner is told when the link is lost and when it is restored, so
+    it can show the device as unavailable and replay what happened in the meantime.
+
+    All of this runs off a single loop timer per device, a task only exists while the device
+    is being probed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        device: Device,
+        link_lost: Callable[[Exception], None],
+        link_restored: Callable[[], None],
+        next_poll: Callable[[], float | None],
+    ) -> None:
+        """
+        Initialize the connection manager.
+
+        :param HomeAssistant hass: Home Assistant instance
+        :param Device device: KiLight device whose connection to watch
+        :param Callable[[Exception], None] link_lost: Called with the error once the link
+            is lost
+        :param Callable[[], None] link_restored: Called once the link is restored
+        :param Callable[[], float | None] next_poll: Gets the monotonic time the next poll
+            of the device is due, None when none is scheduled
+        """
+        self._hass: HomeAssistant = hass
+        self._device: Device = device
+        self._link_lost: Callable[[Exception], None] = link_lost
+        self._link_restored: Callable[[], None] = link_restored
+        self._next_poll: Callable[[], float | None] = next_poll
+        self._link_up: bool = True
+        self._reconnect_attempts: int = 0
+        self._entry: ConfigEntry | None = None
+        self._connector: KiLightConnector | None = None
+        self._timer: TimerHandle | None = None
+        self._probe: asyncio.Task[None] | None = None
+        self._cancel_link_callback: Callable[[], None] | None = None
+
+    @property
+    def link_up(self) -> bool:
+        """Whether the device is believed to be reachable."""
+        return self._link_up
+
+    @property
+    def reconnect_attempts(self) -> int:
+        """Number of failed attempts to reach the device since the link was lost."""
+        return self._reconnect_attempts
+
+    @callback
+    def async_start(self, entry: ConfigEntry) -> None:
+        """
+        Start watching the connection.
+
+        Only connections made by a KiLightConnector can be watched, the connection of any
+        other device is left to the client.
+
+        :param ConfigEntry entry: Config entry of the device, which owns the probe tasks
+        """
+        connector = self._device.connector
+        if not isinstance(connector, KiLightConnector):
+            return
+
+        self._entry = entry
+        self._connector = connector
+        self._cancel_link_callback = connector.register_link_callback(self._handle_link_event)
+        self._arm_timer(CONNECTION_HEARTBEAT_SECONDS)
+
+    async def async_stop(self) -> None:
+        """Stop watching the connection."""
+        if self._cancel_link_callback is not None:
+            self._cancel_link_callback()
+            self._cancel_link_callback = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if (probe := self._probe) is not None:
+            self._probe = None
+            probe.cancel()
+            with suppress(asyncio.CancelledError):
+                await probe
+
+    @callback
+    def _handle_link_event(self, err: Exception | None) -> None:
+        """Handle a failed exchange, or a connection closed by the other end."""
+        if not self._link_up or self._probe is not None:
+            # Reconnect attempts and heartbeats handle their own outcome
+            return
+
+        if err is None:
+            # Warm reconnect, the owner only hears about it if the device is gone
+            _LOGGER.debug("%s: Connection closed, reopening", self._device.name)
+            self._start_probe()
+            return
+
+        self._async_mark_down(err)
+
+    @callback
+    def _async_mark_down(self, err: Exception) -> None:
+        """Take the link down, telling the owner and starting to reconnect."""
+        _LOGGER.debug("%s: Connection lost (%s), reconnecting", self._device.name, err)
+        self._link_up = False
+        self._reconnect_attempts = 0
+        self._link_lost(err)
+        self._arm_timer(self._reconnect_delay())
+
+    @callback
+    def _async_mark_up(self) -> None:
+        """Bring the link back up if it was down, telling the owner."""
+        self._arm_timer(CONNECTION_HEARTBEAT_SECONDS)
+        if self._link_up:
+            return
+
+        _LOGGER.debug(
+            "%s: Connection restored after %s attempts",
+            self._device.name,
+            self._reconnect_attempts + 1,
+        )
+        self._link_up = True
+        self._reconnect_attempts = 0
+        self._link_restored()
+
+    def _reconnect_delay(self) -> float:
+        """Time to wait before the next reconnect attempt, in seconds."""
+        delay = min(
+            RECONNECT_MIN_DELAY_SECONDS * 2**self._reconnect_attempts,
+            RECONNECT_MAX_DELAY_SECONDS,
+        )
+        # Spread the attempts of devices that went down together, like after a Wi-Fi outage
+        return random.uniform(delay / 2, delay)  # noqa: S311 Not for security
+
+    @callback
+    def _arm_timer(self, delay: float) -> None:
+        """Set the timer for the next heartbeat check or reconnect attempt."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._hass.loop.call_later(delay, self._async_timer_fired)
+
+    @callback
+    def _async_timer_fired(self) -> None:
+        """Reconnect if the link is down, or send a heartbeat if the connection sat idle."""
+        self._timer = None
+        if not self._link_up or self._connector is None:
+            self._start_probe()
+            return
+
+        now = monotonic()
+        idle = now - self._connector.last_exchange
+        next_poll = self._next_poll()
+        if not self._connector.connected:
+            # Nothing to keep alive, the next poll or command opens a new connection
+            self._arm_timer(CONNECTION_HEARTBEAT_SECONDS)
+        elif idle < CONNECTION_HEARTBEAT_SECONDS:
+            self._arm_timer(CONNECTION_HEARTBEAT_SECONDS - idle)
+        elif next_poll is not None and next_poll - now <= CONNECTION_HEARTBEAT_SECONDS:
+            # The poll doubles as the heartbeat, checked on again a heartbeat interval later
+            self._arm_timer(CONNECTION_HEARTBEAT_SECONDS)
+        else:
+            self._start_probe()
+
+    @callback
+    def _start_probe(self) -> None:
+        """Check the device answers, unless a check is already running."""
+        if self._probe is not None or self._entry is None or self._connector is None:
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._probe = self._entry.async_create_background_task(
+            self._hass,
+            self._async_probe(self._connector),
+            name=f"KiLight {self._device.name} connection probe",
+            # Started on the next loop iteration, so the probe is known to be running when
+            # a failed exchange is reported
+            eager_start=False,
+        )
+
+    async def _async_probe(self, connector: KiLightConnector) -> None:
+        """Read the device state, opening a connection if there is none."""
+        try:
+            async with asyncio.timeout(CONNECTION_HEARTBEAT_TIMEOUT_SECONDS):
+                await connector.read_state(self._device.state)
+        except TimeoutError as err:
+            # Don't leave a half finished exchange on the connection
+            await connector.disconnect()
+            self._async_probe_done(err)
+        except Exception as err:  # noqa: BLE001 Any failure means the link is down
+            self._async_probe_done(err)
+        else:
+            self._async_probe_done(None)
+
+    @callback
+    def _async_probe_done(self, err: Exception | None) -> None:
+        """Update the link from the outcome of a probe."""
+        self._probe = None
+        if err is None:
+            self._async_mark_up()
+        elif self._link_up:
+            self._async_mark_down(err)
+        else:
+            self._reconnect_attempts += 1
+            _LOGGER.debug(
+                "%s: Reconnect attempt %s failed: %s",
+                self._device.name,
+                self._reconnect_attempts,
+                err,
+            )
+            self._arm_timer(self._reconnect_delay())
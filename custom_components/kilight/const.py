@@ -5,9 +5,193 @@ from typing import Final
 # HASS Domain of the integration
 DOMAIN: Final[str] = "kilight"
 
+# Config entry option keys
+CONF_MIN_UPDATE_INTERVAL: Final[str] = "min_update_interval"
+CONF_MAX_UPDATE_INTERVAL: Final[str] = "max_update_interval"
+CONF_COMMAND_WINDOW: Final[str] = "command_window"
+CONF_OPTIMISTIC: Final[str] = "optimistic"
+CONF_WARM_WHITE_KELVIN: Final[str] = "warm_white_kelvin"
+CONF_COLD_WHITE_KELVIN: Final[str] = "cold_white_kelvin"
+CONF_BRIGHTNESS_GAMMA: Final[str] = "brightness_gamma"
+CONF_CURRENT_DEADBAND: Final[str] = "current_deadband"
+CONF_TEMPERATURE_DEADBAND: Final[str] = "temperature_deadband"
+CONF_FAN_SPEED_DEADBAND: Final[str] = "fan_speed_deadband"
+CONF_FAN_DRIVE_DEADBAND: Final[str] = "fan_drive_deadband"
+CONF_TELEMETRY_MIN_INTERVAL: Final[str] = "telemetry_min_interval"
+CONF_TELEMETRY_WINDOW: Final[str] = "telemetry_window"
+CONF_TELEMETRY_AGGREGATE: Final[str] = "telemetry_aggregate"
+CONF_THERMAL_PROTECTION: Final[str] = "thermal_protection"
+CONF_DRIVER_TEMPERATURE_LIMIT: Final[str] = "driver_temperature_limit"
+CONF_POWER_SUPPLY_TEMPERATURE_LIMIT: Final[str] = "power_supply_temperature_limit"
+CONF_OUTPUT_TEMPERATURE_LIMIT: Final[str] = "output_temperature_limit"
+CONF_SUPPLY_VOLTAGE: Final[str] = "supply_voltage"
+
 # How frequently to query the device for a state update, in seconds
 UPDATE_EVERY_SECONDS: Final[int] = 30
 
+# Default bounds of the adaptive poll interval, in seconds. An idle device is polled as
+# often as it always has been unless a longer maximum is configured in the options.
+DEFAULT_MIN_UPDATE_INTERVAL_SECONDS: Final[int] = 5
+DEFAULT_MAX_UPDATE_INTERVAL_SECONDS: Final[int] = UPDATE_EVERY_SECONDS
+
+# How long to keep polling at the minimum interval after a command or a detected change
+ACTIVE_WINDOW_SECONDS: Final[int] = 60
+
+# Factor the poll interval grows by on each stable poll, or shrinks by while warming up
+POLL_BACKOFF_FACTOR: Final[float] = 2.0
+
+# Most polls of the whole fleet of KiLights to run at the same time
+FLEET_MAX_CONCURRENT_POLLS: Final[int] = 8
+
+# Longest time kept between two polls of different KiLights, in seconds. Polls are spread
+# evenly at the combined poll rate of all devices, so large fleets get closer spacing.
+FLEET_MAX_POLL_SPACING_SECONDS: Final[float] = 1.0
+
+# Rise of the hottest device temperature between polls that counts as warming up
+THERMAL_TREND_THRESHOLD_CELSIUS: Final[float] = 0.5
+
+# Default minimum time between two writes to the same output, in milliseconds.
+# Light commands arriving faster than this are merged into a single write.
+DEFAULT_COMMAND_WINDOW_MILLISECONDS: Final[int] = 100
+
+# Whether lights show the requested state right away, before the device confirms it
+DEFAULT_OPTIMISTIC: Final[bool] = True
+
+# Default exponent the brightness of Home Assistant is raised to before it is sent to the
+# device. 1.0 sends it unchanged, higher values give finer steps at low brightness.
+DEFAULT_BRIGHTNESS_GAMMA: Final[float] = 1.0
+
+# Default smallest change of a sensor reading that is published, in the unit of the sensor.
+# Readings that move less than this from the last published state are not written, so
+# jitter doesn't fill the recorder database.
+DEFAULT_CURRENT_DEADBAND_AMPERES: Final[float] = 0.01
+DEFAULT_TEMPERATURE_DEADBAND_CELSIUS: Final[float] = 0.5
+DEFAULT_FAN_SPEED_DEADBAND_RPM: Final[int] = 50
+DEFAULT_FAN_DRIVE_DEADBAND_PERCENT: Final[float] = 1.0
+
+# Default shortest time between two published states of the same sensor, in seconds. 0
+# publishes every reading that passes the deadband right away.
+DEFAULT_TELEMETRY_MIN_INTERVAL_SECONDS: Final[int] = 0
+
+# Default time the rolling min, max and mean of sensor readings cover, in seconds
+DEFAULT_TELEMETRY_WINDOW_SECONDS: Final[int] = 300
+
+# Default value of the readings within the window that sensors publish, one of the
+# TelemetryAggregate values. The latest reading publishes the sensor unchanged.
+DEFAULT_TELEMETRY_AGGREGATE: Final[str] = "latest"
+
+# Default voltage of the supply powering the outputs, in volts, which their current is
+# multiplied by for their power. KiLights are usually run from a 24 V supply.
+DEFAULT_SUPPLY_VOLTAGE: Final[float] = 24.0
+
+# Decimals of the kilowatt-hours energy sensors publish, so their state is written once per
+# watt-hour rather than on every poll
+ENERGY_DECIMALS: Final[int] = 3
+
+# Most recent readings kept per sensor for the rolling aggregates. A sensor updated faster
+# than this many readings per window aggregates over the last readings only.
+TELEMETRY_BUFFER_SAMPLES: Final[int] = 64
+
+# Whether output brightness is reduced ahead of a device temperature reaching its limit. Off
+# until enabled in the options, so lights are never dimmed without the user opting in.
+DEFAULT_THERMAL_PROTECTION: Final[bool] = False
+
+# Default temperature limits of the driver, the power supply and the outputs, in degrees
+# Celsius, well above the temperatures a KiLight runs at in normal use
+DEFAULT_DRIVER_TEMPERATURE_LIMIT_CELSIUS: Final[float] = 85.0
+DEFAULT_POWER_SUPPLY_TEMPERATURE_LIMIT_CELSIUS: Final[float] = 75.0
+DEFAULT_OUTPUT_TEMPERATURE_LIMIT_CELSIUS: Final[float] = 80.0
+
+# How far below its limit a temperature predicted by the thermal manager starts reducing
+# brightness, in degrees Celsius. Brightness is reduced in proportion across this margin,
+# down to THERMAL_MIN_BRIGHTNESS_FACTOR of full brightness at the limit.
+THERMAL_DERATING_MARGIN_CELSIUS: Final[float] = 10.0
+THERMAL_MIN_BRIGHTNESS_FACTOR: Final[float] = 0.3
+
+# How far ahead the thermal manager predicts temperatures from their trend, in seconds
+THERMAL_PREDICTION_SECONDS: Final[float] = 120.0
+
+# Time constant of the moving averages of the temperatures and of their slopes, in seconds
+THERMAL_SMOOTHING_SECONDS: Final[float] = 60.0
+
+# Fastest rates at which brightness is reduced and restored, in fractions of full
+# brightness per second. Restoring is slower, so brightness doesn't bounce around a limit.
+THERMAL_DERATE_RATE: Final[float] = 0.02
+THERMAL_RESTORE_RATE: Final[float] = 0.005
+
+# How long the thermal manager waits after a device state arrives before evaluating the
+# fleet, in seconds, so states arriving in the meantime are evaluated together
+THERMAL_EVALUATE_DELAY_SECONDS: Final[float] = 1.0
+
+# Bounds and defaults of the sample rate, in samples per second, and the duration, in
+# seconds, of a telemetry capture. The capture buffer is sized for the rate and duration
+# requested, so the bounds also bound its memory, 12000 samples at most.
+CAPTURE_MAX_RATE_HZ: Final[float] = 20.0
+CAPTURE_DEFAULT_RATE_HZ: Final[float] = 10.0
+CAPTURE_MAX_DURATION_SECONDS: Final[int] = 600
+CAPTURE_DEFAULT_DURATION_SECONDS: Final[int] = 60
+
+# Directory within the Home Assistant config directory telemetry captures are exported to
+CAPTURE_DIRECTORY: Final[str] = "kilight_captures"
+
+# Highest rate at which frames of a light transition are sent to an output. Frames are
+# also never sent faster than the command window, and under backpressure frames are
+# dropped, so the achieved rate can be lower.
+TRANSITION_MAX_FRAMES_PER_SECOND: Final[int] = 20
+
+# How frequently to poll a device that pushes its own state updates, in seconds.
+# This is only a liveness check, since state changes arrive over the push connection.
+PUSH_LIVENESS_POLL_SECONDS: Final[int] = 300
+
 # Overall timeout during operations to make sure we don't hang.
 # KiLight has its own timeout handling, but in case that fails this should catch it.
 DEVICE_TIMEOUT_SECONDS: Final[int] = 30
+
+# How long a device read during discovery is reused by config flows and repeated
+# announcements before it is read again, in seconds
+DISCOVERY_CACHE_SECONDS: Final[int] = 300
+
+# Most discovered devices to read at the same time when setting up several at once
+DISCOVERY_MAX_CONCURRENT_READS: Final[int] = 16
+
+# Most devices the apply_scene service writes to at the same time
+SCENE_MAX_CONCURRENT_DEVICES: Final[int] = 64
+
+# Config flow source of the entries created for each device set up at once with others
+SOURCE_ONBOARD: Final[str] = "onboard"
+
+# How long a connection may sit idle before a heartbeat checks the device still answers,
+# in seconds, and how long the heartbeat may take before the link is considered dead
+CONNECTION_HEARTBEAT_SECONDS: Final[int] = 10
+CONNECTION_HEARTBEAT_TIMEOUT_SECONDS: Final[int] = 3
+
+# TCP keepalive of the connections, so the kernel notices a device that vanished within
+# about IDLE + INTERVAL * COUNT seconds of silence, even between heartbeats
+TCP_KEEPALIVE_IDLE_SECONDS: Final[int] = 5
+TCP_KEEPALIVE_INTERVAL_SECONDS: Final[int] = 1
+TCP_KEEPALIVE_COUNT: Final[int] = 3
+
+# Bounds of the jittered exponential back-off between reconnect attempts, in seconds
+RECONNECT_MIN_DELAY_SECONDS: Final[float] = 0.5
+RECONNECT_MAX_DELAY_SECONDS: Final[float] = 30.0
+
+# How long the first poll of a device restored from the state cache may take before it is
+# treated as unreachable, in seconds. Its entities are already set up by then, so this only
+# decides how soon they are shown as unavailable.
+STARTUP_PROBE_TIMEOUT_SECONDS: Final[int] = 5
+
+# Version of the stored state cache format
+STATE_CACHE_VERSION: Final[int] = 1
+
+# Version of the stored preset format
+PRESET_STORE_VERSION: Final[int] = 1
+
+# How long to let the device apply written outputs before reading its state back, in
+# seconds, the same as the client library waits after a single write
+WRITE_SETTLE_SECONDS: Final[float] = 0.1
+
+# How long to wait before saving a changed device state to the state cache, in seconds
+STATE_CACHE_SAVE_DELAY_SECONDS: Final[int] = 60
+
+# Number of most recent samples the percentiles of the latency histograms cover
+METRICS_WINDOW_SAMPLES: Final[int] = 500
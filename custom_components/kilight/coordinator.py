@@ -1,23 +1,120 @@
 """The DataUpdateCoordinator subclass for the KiLight integration."""
 
+from __future__ import annotations
+
+import asyncio
 from datetime import timedelta
 import logging
-from typing import TYPE_CHECKING
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Final
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from kilight.client import MAX_COLOR_TEMP, MIN_COLOR_TEMP, OutputIdentifier
 
-from .const import UPDATE_EVERY_SECONDS
-from .types import KiLightConfigEntry
+from .color import KiLightColorEngine, get_color_engine
+from .commands import KiLightDeviceCommander
+from .connection import KiLightConnectionManager
+from .const import (
+    CONF_BRIGHTNESS_GAMMA,
+    CONF_COLD_WHITE_KELVIN,
+    CONF_COMMAND_WINDOW,
+    CONF_CURRENT_DEADBAND,
+    CONF_DRIVER_TEMPERATURE_LIMIT,
+    CONF_FAN_DRIVE_DEADBAND,
+    CONF_FAN_SPEED_DEADBAND,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_OPTIMISTIC,
+    CONF_OUTPUT_TEMPERATURE_LIMIT,
+    CONF_POWER_SUPPLY_TEMPERATURE_LIMIT,
+    CONF_SUPPLY_VOLTAGE,
+    CONF_TELEMETRY_AGGREGATE,
+    CONF_TELEMETRY_MIN_INTERVAL,
+    CONF_TELEMETRY_WINDOW,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_THERMAL_PROTECTION,
+    CONF_WARM_WHITE_KELVIN,
+    DEFAULT_BRIGHTNESS_GAMMA,
+    DEFAULT_COMMAND_WINDOW_MILLISECONDS,
+    DEFAULT_CURRENT_DEADBAND_AMPERES,
+    DEFAULT_DRIVER_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_FAN_DRIVE_DEADBAND_PERCENT,
+    DEFAULT_FAN_SPEED_DEADBAND_RPM,
+    DEFAULT_MAX_UPDATE_INTERVAL_SECONDS,
+    DEFAULT_MIN_UPDATE_INTERVAL_SECONDS,
+    DEFAULT_OPTIMISTIC,
+    DEFAULT_OUTPUT_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_POWER_SUPPLY_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_SUPPLY_VOLTAGE,
+    DEFAULT_TELEMETRY_AGGREGATE,
+    DEFAULT_TELEMETRY_MIN_INTERVAL_SECONDS,
+    DEFAULT_TELEMETRY_WINDOW_SECONDS,
+    DEFAULT_TEMPERATURE_DEADBAND_CELSIUS,
+    DEFAULT_THERMAL_PROTECTION,
+    DEVICE_TIMEOUT_SECONDS,
+    DOMAIN,
+    ENERGY_DECIMALS,
+    PUSH_LIVENESS_POLL_SECONDS,
+    STARTUP_PROBE_TIMEOUT_SECONDS,
+)
+from .device import KiLightConnector
+from .dispatcher import KiLightStateDispatcher
+from .energy import EnergyMeter
+from .enum import TelemetryAggregate, TelemetryKind, UpdateMode
+from .fleet import async_get_fleet_scheduler
+from .metrics import KiLightDeviceMetrics, is_timeout
+from .scheduler import AdaptivePollScheduler
+from .telemetry import TelemetryConfig
+from .thermal import async_get_thermal_manager
+from .types import KiLightConfigEntry, SupportsStatePush
 
 if TYPE_CHECKING:
-    from kilight.client import Device
+    from collections.abc import Awaitable, Callable, Mapping
+
+    from kilight.client import Device, DeviceState
+
+    from .fleet import KiLightFleetScheduler
+    from .thermal import KiLightThermalManager
 
 _LOGGER = logging.getLogger(__name__)
 
+# Option and default of the deadband of each kind of sensor reading
+_TELEMETRY_DEADBANDS: Final[dict[TelemetryKind, tuple[str, float]]] = {
+    TelemetryKind.Current: (CONF_CURRENT_DEADBAND, DEFAULT_CURRENT_DEADBAND_AMPERES),
+    TelemetryKind.Temperature: (CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND_CELSIUS),
+    TelemetryKind.FanSpeed: (CONF_FAN_SPEED_DEADBAND, DEFAULT_FAN_SPEED_DEADBAND_RPM),
+    TelemetryKind.FanDrive: (CONF_FAN_DRIVE_DEADBAND, DEFAULT_FAN_DRIVE_DEADBAND_PERCENT),
+}
+
 
 class KiLightCoordinator(DataUpdateCoordinator[None]):
-    """Class to manage fetching data."""
+    """
+    Class to manage fetching data.
+
+    Devices whose firmware can push state changes are switched to push mode, where polling
+    only serves as a slow liveness check. All other devices are polled on an adaptive
+    interval, see AdaptivePollScheduler.
+
+    The connection manager notices a dead link within seconds, between polls too. The
+    device is then shown as unavailable right away, and not polled until the connection
+    manager restores the link, after which the device is refreshed and any commands issued
+    to it in the meantime are replayed.
+
+    The coordinator doesn't run a poll timer of its own, it has no update interval as far
+    as DataUpdateCoordinator is concerned. It only decides when its device should be polled
+    next, and hands the poll to the fleet scheduler shared by all KiLights, which refreshes
+    the coordinator once it gets to it, see KiLightFleetScheduler.
+
+    Entities receive state changes through the state dispatcher, so listeners of the
+    coordinator itself are only notified when the device availability changes.
+
+    Every state the device reports is also handed to the thermal manager shared by all
+    KiLights, which tells the coordinator when to limit the brightness of the device, see
+    KiLightThermalManager. The energy drawn by each output and by the whole device is
+    accumulated from the same states, so none of them is missed by the energy sensors.
+    """
 
     def __init__(self, hass: HomeAssistant, entry: KiLightConfigEntry) -> None:
         """
@@ -31,15 +128,522 @@ class KiLightCoordinator(DataUpdateCoordinator[None]):
             _LOGGER,
             config_entry=entry,
             name=entry.title,
-            update_interval=timedelta(seconds=UPDATE_EVERY_SECONDS),
-            always_update=True,
+            update_interval=None,
+            always_update=False,
         )
         self._device: Device = entry.runtime_data
+        self._fleet: KiLightFleetScheduler = async_get_fleet_scheduler(hass)
+        self._thermal: KiLightThermalManager = async_get_thermal_manager(hass)
+        self._thermal_limit: int | None = None
+        self._update_mode: UpdateMode = UpdateMode.Poll
+        self._skipped_state_writes: int = 0
+        self._pending_notifications: set[str] = set()
+        self._metrics: KiLightDeviceMetrics = KiLightDeviceMetrics(self._async_notify_soon)
+        self._optimistic_mismatches: int = 0
+        self._end_push_subscription: Callable[[], Awaitable[None]] | None = None
+        self._refreshing: bool = False
+        self._probe_timeout: float | None = None
+        self._scheduler: AdaptivePollScheduler = AdaptivePollScheduler(
+            *self._get_interval_bounds(entry.options)
+        )
+        self._poll_interval: timedelta = timedelta(seconds=self._scheduler.interval)
+        self._polling: bool = False
+        self._cancel_poll: Callable[[], None] | None = None
+        self._next_poll: float | None = None
+        self._command_window: float = self._get_command_window(entry.options)
+        self._optimistic: bool = entry.options.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC)
+        self._color_engine: KiLightColorEngine = self._get_color_engine(entry.options)
+        self._telemetry_configs: dict[TelemetryKind, TelemetryConfig] = self._get_telemetry_configs(
+            entry.options
+        )
+        self._supply_voltage: float = entry.options.get(CONF_SUPPLY_VOLTAGE, DEFAULT_SUPPLY_VOLTAGE)
+        # Energy meters of each output, and of the whole device under None
+        self._energy_meters: dict[OutputIdentifier | None, EnergyMeter] = {
+            OutputIdentifier.OutputA: EnergyMeter(),
+            OutputIdentifier.OutputB: EnergyMeter(),
+            None: EnergyMeter(),
+        }
+        self._device_info: DeviceInfo | None = None
+        self._cancel_device_callback: Callable[[], None] = self._device.register_callback(
+            self._handle_device_state
+        )
+        self._dispatcher: KiLightStateDispatcher = KiLightStateDispatcher(
+            self._device, self.async_record_skipped_state_write, self._metrics
+        )
+        self._connection: KiLightConnectionManager = KiLightConnectionManager(
+            hass,
+            self._device,
+            self._async_link_lost,
+            self._async_link_restored,
+            lambda: self._next_poll,
+        )
+        self._commander: KiLightDeviceCommander = KiLightDeviceCommander(
+            hass, self._device, self._metrics, self._connection
+        )
+        self._thermal.async_set_limits(self, self._get_thermal_limits(entry.options))
+
+    @property
+    def dispatcher(self) -> KiLightStateDispatcher:
+        """Dispatcher used to bind entities to the device state fields they depend on."""
+        return self._dispatcher
+
+    @property
+    def commander(self) -> KiLightDeviceCommander:
+        """Commander that all output writes to the device go through."""
+        return self._commander
+
+    @property
+    def connection(self) -> KiLightConnectionManager:
+        """Connection manager watching the link to the device."""
+        return self._connection
+
+    @property
+    def metrics(self) -> KiLightDeviceMetrics:
+        """Latency histograms and error counters of the device."""
+        return self._metrics
+
+    @property
+    def update_mode(self) -> UpdateMode:
+        """Whether the device is currently being polled or is pushing its state."""
+        return self._update_mode
+
+    @property
+    def poll_interval(self) -> timedelta:
+        """Time the device waits between polls, when it is quiet."""
+        return self._poll_interval
+
+    @property
+    def recently_active(self) -> bool:
+        """Whether the device was sent a command or changed its outputs only recently."""
+        return self._scheduler.is_active(monotonic())
+
+    @property
+    def command_window(self) -> float:
+        """Minimum time between two writes to the same output, in seconds."""
+        return self._command_window
+
+    @property
+    def optimistic(self) -> bool:
+        """Whether lights show the requested state before the device confirms it."""
+        return self._optimistic
+
+    @property
+    def color_engine(self) -> KiLightColorEngine:
+        """Color engine converting light commands into channel levels for the device."""
+        return self._color_engine
+
+    def get_telemetry_config(self, kind: TelemetryKind) -> TelemetryConfig:
+        """
+        Get how the readings of a kind of sensor are published.
+
+        :param TelemetryKind kind: Kind of sensor reading
+        """
+        return self._telemetry_configs[kind]
+
+    @property
+    def supply_voltage(self) -> float:
+        """Voltage of the supply powering the outputs, in volts."""
+        return self._supply_voltage
+
+    def get_energy_meter(self, output: OutputIdentifier | None) -> EnergyMeter:
+        """
+        Get the energy meter of an output, or of the whole device.
+
+        :param OutputIdentifier | None output: Which output, None for the whole device
+        """
+        return self._energy_meters[output]
+
+    @property
+    def thermal_limit(self) -> int | None:
+        """Brightness thermal protection limits the outputs to, None when not limited."""
+        return self._thermal_limit
+
+    @property
+    def thermal(self) -> KiLightThermalManager:
+        """Thermal manager protecting the device."""
+        return self._thermal
+
+    @property
+    def optimistic_mismatches(self) -> int:
+        """How many optimistic light states had to be rolled back."""
+        return self._optimistic_mismatches
+
+    @property
+    def skipped_state_writes(self) -> int:
+        """How many entity state writes were skipped because nothing they read changed."""
+        return self._skipped_state_writes
+
+    def get_device_info(self, name: str) -> DeviceInfo:
+        """
+        Get the device info of the device, a single instance shared by all of its entities.
+
+        :param str name: Name of the device
+        """
+        if self._device_info is None or self._device_info.get("name") != name:
+            state = self._device.state
+            self._device_info = DeviceInfo(
+                identifiers={(DOMAIN, state.hardware_id)},
+                name=name,
+                manufacturer=state.manufacturer_name,
+                model=state.model,
+                sw_version=str(state.firmware_version),
+                hw_version=str(state.hardware_version),
+            )
+        return self._device_info
+
+    @callback
+    def async_update_options(self, options: Mapping[str, Any]) -> None:
+        """
+        Apply changed config entry options.
+
+        :param Mapping[str, Any] options: The new config entry options
+        """
+        self._scheduler.update_bounds(*self._get_interval_bounds(options))
+        self._command_window = self._get_command_window(options)
+        self._optimistic = options.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC)
+        if (color_engine := self._get_color_engine(options)) is not self._color_engine:
+            self._color_engine = color_engine
+            self._dispatcher.async_notify_changed("color_engine")
+        supply_voltage = options.get(CONF_SUPPLY_VOLTAGE, DEFAULT_SUPPLY_VOLTAGE)
+        if supply_voltage != self._supply_voltage:
+            self._supply_voltage = supply_voltage
+            self._dispatcher.async_notify_changed("supply_voltage")
+        self._telemetry_configs = self._get_telemetry_configs(options)
+        self._thermal.async_set_limits(self, self._get_thermal_limits(options))
+        if self._update_mode == UpdateMode.Poll:
+            self._set_poll_interval(self._scheduler.interval)
+
+    @callback
+    def async_record_skipped_state_write(self, count: int = 1) -> None:
+        """
+        Count entity state writes skipped due to unchanged device state.
+
+        This covers both entities the dispatcher didn't invoke because none of the fields they
+        watch changed, and invoked entities whose own snapshot turned out unchanged. Entities
+        watching the counter are notified once the current dispatch is done, so a state
+        skipping several writes only updates them once.
+
+        :param int count: Number of skipped writes
+        """
+        self._skipped_state_writes += count
+        self._async_notify_soon("skipped_state_writes")
+
+    @callback
+    def async_record_optimistic_mismatch(self) -> None:
+        """Count an optimistic light state the device did not confirm."""
+        self._optimistic_mismatches += 1
+        self._dispatcher.async_notify_changed("optimistic_mismatches")
+
+    @callback
+    def async_apply_thermal_limit(self, limit: int | None) -> None:
+        """
+        Limit the brightness of the outputs as thermal protection asks, or lift the limit.
+
+        :param int | None limit: Highest brightness of the outputs, None to lift the limit
+        """
+        _LOGGER.debug("%s: Thermal brightness limit changed to %s", self.name, limit)
+        self._thermal_limit = limit
+        self._dispatcher.async_notify_changed("thermal_limit")
+        self.config_entry.async_create_background_task(
+            self.hass, self._async_set_brightness_limit(limit), name=f"{self.name} thermal limit"
+        )
+
+    async def _async_set_brightness_limit(self, limit: int | None) -> None:
+        """Write the outputs a changed brightness limit applies to."""
+        try:
+            await self._commander.async_set_brightness_limit(limit)
+        except Exception:  # noqa: BLE001 Retried with the next change of the limit
+            _LOGGER.warning("%s: Unable to apply thermal brightness limit %s", self.name, limit)
+
+    @callback
+    def _async_notify_soon(self, coordinator_field: str) -> None:
+        """
+        Notify the entities watching a coordinator value once the current callback is done.
+
+        Changes to the same value until then result in a single notification, and values
+        changed while dispatching a state don't notify entities in the middle of it.
+        """
+        if not self._pending_notifications:
+            self.hass.loop.call_soon(self._async_notify_pending)
+        self._pending_notifications.add(coordinator_field)
+
+    @callback
+    def _async_notify_pending(self) -> None:
+        pending_notifications = self._pending_notifications
+        self._pending_notifications = set()
+        for coordinator_field in pending_notifications:
+            self._dispatcher.async_notify_changed(coordinator_field)
+
+    @callback
+    def async_start_from_restored_state(self) -> None:
+        """
+        Start out unavailable and connect to the device in the background.
+
+        Used when the device state was restored from the state cache, so entities can be set
+        up without waiting for the device. The first poll gives up after a short probe
+        timeout, after which the device is retried with an exponential back-off.
+        """
+        self._probe_timeout = STARTUP_PROBE_TIMEOUT_SECONDS
+        self.last_update_success = False
+        self._fleet.async_refresh_soon(self)
+
+    @callback
+    def async_start_polling(self) -> None:
+        """Start polling the device, once its entry is set up."""
+        self._polling = True
+        self._async_schedule_poll()
+
+    async def async_fleet_refresh(self, lateness: float) -> None:
+        """
+        Poll the device, once the fleet scheduler got to it.
+
+        :param float lateness: How long after the requested time the poll started, in seconds
+        """
+        self._metrics.record_poll_lateness(lateness)
+        await self.async_refresh()
+
+    @callback
+    def _async_schedule_poll(self) -> None:
+        """Hand the next poll to the fleet scheduler, replacing any poll scheduled before."""
+        if self._cancel_poll is not None:
+            self._cancel_poll()
+            self._cancel_poll = None
+            self._next_poll = None
+        if not self._polling or self.config_entry.pref_disable_polling:
+            return
+
+        interval = self._poll_interval.total_seconds()
+        self._cancel_poll = self._fleet.async_schedule(self, interval)
+        # Lets the connection manager skip heartbeats the poll makes redundant
+        self._next_poll = monotonic() + interval
 
     async def _async_update_data(self) -> None:
+        """Fetch the latest device state, then schedule the next poll from the end of this one."""
+        try:
+            await self._async_poll()
+        finally:
+            self._async_schedule_poll()
+
+    async def _async_poll(self) -> None:
         """Fetch the latest device state from the KiLight device."""
+        if not self._connection.link_up:
+            # The connection manager refreshes the device once it is reachable again
+            error_msg = f"Connection to {self.name} lost, reconnecting"
+            raise UpdateFailed(error_msg)
+
         try:
             _LOGGER.debug("Starting periodic refresh of KiLight data")
-            await self._device.update_state()
+            self._refreshing = True
+            await self._async_update_device_state()
         except Exception as err:
+            if is_timeout(err):
+                self._metrics.record_timeout()
+            self._scheduler.record_failure()
+            if self._update_mode == UpdateMode.Push:
+                await self._async_stop_push()
+            else:
+                self._set_poll_interval(self._scheduler.interval)
             raise UpdateFailed(str(err)) from err
+        finally:
+            self._refreshing = False
+            self._probe_timeout = None
+            if isinstance(self._device.connector, KiLightConnector):
+                self._metrics.record_connections(self._device.connector.connections)
+
+        if self._update_mode == UpdateMode.Poll:
+            # The device is reachable again, so try to get back onto pushed updates
+            await self._async_try_start_push()
+
+    async def _async_update_device_state(self) -> None:
+        """Read the device state, within the probe timeout if one is set."""
+        start_time = monotonic()
+        if self._probe_timeout is None:
+            await self._device.update_state()
+        else:
+            try:
+                async with asyncio.timeout(self._probe_timeout):
+                    await self._device.update_state()
+            except TimeoutError:
+                # Don't leave a half finished exchange on the connection for the next poll
+                await self._device.disconnect()
+                raise
+        self._metrics.record_update_latency(monotonic() - start_time)
+
+    async def async_shutdown(self) -> None:
+        """Stop any push subscription and stop listening for device state."""
+        self._polling = False
+        self._cancel_poll = None
+        self._next_poll = None
+        await super().async_shutdown()
+        await self._connection.async_stop()
+        self._fleet.async_remove(self)
+        self._thermal.async_remove(self)
+        self._cancel_device_callback()
+        self._dispatcher.async_stop()
+        self._commander.cancel()
+        await self._async_stop_push()
+
+    @staticmethod
+    def _get_interval_bounds(options: Mapping[str, Any]) -> tuple[float, float]:
+        return (
+            options.get(CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL_SECONDS),
+            options.get(CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_INTERVAL_SECONDS),
+        )
+
+    @callback
+    def _set_poll_interval(self, seconds: float) -> None:
+        """Change the poll interval, notifying the entities that show it."""
+        poll_interval = timedelta(seconds=seconds)
+        if poll_interval == self._poll_interval:
+            return
+        self._poll_interval = poll_interval
+        self._dispatcher.async_notify_changed("poll_interval")
+
+    @staticmethod
+    def _get_command_window(options: Mapping[str, Any]) -> float:
+        return options.get(CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW_MILLISECONDS) / 1000
+
+    @staticmethod
+    def _get_color_engine(options: Mapping[str, Any]) -> KiLightColorEngine:
+        return get_color_engine(
+            options.get(CONF_WARM_WHITE_KELVIN, MIN_COLOR_TEMP),
+            options.get(CONF_COLD_WHITE_KELVIN, MAX_COLOR_TEMP),
+            options.get(CONF_BRIGHTNESS_GAMMA, DEFAULT_BRIGHTNESS_GAMMA),
+        )
+
+    @staticmethod
+    def _get_telemetry_configs(options: Mapping[str, Any]) -> dict[TelemetryKind, TelemetryConfig]:
+        """Get the telemetry configs, power using the current deadband at the supply voltage."""
+        min_interval = options.get(
+            CONF_TELEMETRY_MIN_INTERVAL, DEFAULT_TELEMETRY_MIN_INTERVAL_SECONDS
+        )
+        window = options.get(CONF_TELEMETRY_WINDOW, DEFAULT_TELEMETRY_WINDOW_SECONDS)
+        aggregate = TelemetryAggregate(
+            options.get(CONF_TELEMETRY_AGGREGATE, DEFAULT_TELEMETRY_AGGREGATE)
+        )
+        configs = {
+            kind: TelemetryConfig(options.get(option, default), min_interval, window, aggregate)
+            for kind, (option, default) in _TELEMETRY_DEADBANDS.items()
+        }
+        configs[TelemetryKind.Power] = TelemetryConfig(
+            configs[TelemetryKind.Current].deadband
+            * options.get(CONF_SUPPLY_VOLTAGE, DEFAULT_SUPPLY_VOLTAGE),
+            min_interval,
+            window,
+            aggregate,
+        )
+        return configs
+
+    @staticmethod
+    def _get_thermal_limits(options: Mapping[str, Any]) -> tuple[float, ...] | None:
+        """Get the temperature limit of each sensor, in the order of THERMAL_SENSORS."""
+        if not options.get(CONF_THERMAL_PROTECTION, DEFAULT_THERMAL_PROTECTION):
+            return None
+        output_limit = options.get(
+            CONF_OUTPUT_TEMPERATURE_LIMIT, DEFAULT_OUTPUT_TEMPERATURE_LIMIT_CELSIUS
+        )
+        return (
+            options.get(CONF_DRIVER_TEMPERATURE_LIMIT, DEFAULT_DRIVER_TEMPERATURE_LIMIT_CELSIUS),
+            options.get(
+                CONF_POWER_SUPPLY_TEMPERATURE_LIMIT, DEFAULT_POWER_SUPPLY_TEMPERATURE_LIMIT_CELSIUS
+            ),
+            output_limit,
+            output_limit,
+        )
+
+    @callback
+    def _async_link_lost(self, err: Exception) -> None:
+        """Show the device as unavailable as soon as the connection manager lost it."""
+        self.async_set_update_error(err)
+        # Nothing is known about the power drawn until the device is reachable again
+        now = monotonic()
+        for meter in self._energy_meters.values():
+            meter.add(None, now)
+        if self._update_mode == UpdateMode.Push:
+            self.config_entry.async_create_background_task(
+                self.hass, self._async_stop_push(), name=f"{self.name} stop push"
+            )
+
+    @callback
+    def _async_link_restored(self) -> None:
+        """Replay commands issued while the link was down and refresh the device."""
+        self._commander.async_replay()
+        self._fleet.async_refresh_soon(self)
+
+    @callback
+    def _handle_device_state(self, state: DeviceState) -> None:
+        """
+        Reschedule the next poll whenever the device reports fresh state.
+
+        This covers polled and pushed updates as well as the state read back after every
+        command, so the device is only polled when it has been quiet for a full interval.
+        State received outside a poll means a command was sent, which is activity the
+        adaptive interval reacts to. Every state is also handed to the thermal manager and
+        the energy meters.
+        """
+        self._thermal.async_record(self, state)
+        self._record_energy(state)
+        if self._update_mode == UpdateMode.Poll:
+            now = monotonic()
+            if not self._refreshing:
+                self._scheduler.record_activity(now)
+            self._scheduler.record_state(state, now)
+            self._set_poll_interval(self._scheduler.interval)
+
+        if self._cancel_poll is not None:
+            self._async_schedule_poll()
+
+    @callback
+    def _record_energy(self, state: DeviceState) -> None:
+        """
+        Accumulate the energy drawn by the outputs up to a fresh device state.
+
+        The energy sensors are only notified once an energy they publish changed.
+        """
+        published = self._published_energy()
+        now = monotonic()
+        power_a = state.output_a.current * self._supply_voltage
+        self._energy_meters[OutputIdentifier.OutputA].add(power_a, now)
+        power_b = 0.0
+        if state.output_b is not None:
+            power_b = state.output_b.current * self._supply_voltage
+            self._energy_meters[OutputIdentifier.OutputB].add(power_b, now)
+        self._energy_meters[None].add(power_a + power_b, now)
+        if self._published_energy() != published:
+            self._async_notify_soon("energy")
+
+    def _published_energy(self) -> tuple[float, ...]:
+        """Get the energy of every meter as the energy sensors publish it."""
+        return tuple(round(meter.energy, ENERGY_DECIMALS) for meter in self._energy_meters.values())
+
+    async def _async_try_start_push(self) -> None:
+        """Switch to push mode if the device firmware supports it."""
+        if not isinstance(self._device, SupportsStatePush):
+            return
+
+        try:
+            async with asyncio.timeout(DEVICE_TIMEOUT_SECONDS):
+                self._end_push_subscription = await self._device.subscribe_state()
+        except Exception:  # noqa: BLE001 Any failure here just means we keep polling
+            _LOGGER.debug("%s: Unable to subscribe to pushed state, polling", self.name)
+            return
+
+        _LOGGER.debug("%s: Switching to push mode", self.name)
+        self._update_mode = UpdateMode.Push
+        self._set_poll_interval(PUSH_LIVENESS_POLL_SECONDS)
+
+    async def _async_stop_push(self) -> None:
+        """End any push subscription and go back to polling."""
+        if self._end_push_subscription is not None:
+            end_push_subscription = self._end_push_subscription
+            self._end_push_subscription = None
+            try:
+                async with asyncio.timeout(DEVICE_TIMEOUT_SECONDS):
+                    await end_push_subscription()
+            except Exception:  # noqa: BLE001 The link is already being torn down
+                _LOGGER.debug("%s: Error ending push subscription", self.name)
+
+        if self._update_mode == UpdateMode.Push:
+            _LOGGER.debug("%s: Switching to poll mode", self.name)
+            self._update_mode = UpdateMode.Poll
+            self._set_poll_interval(self._scheduler.interval)
@@ -0,0 +1,304 @@
+"""KiLight device with support for restoring a previously known state and watching its link."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from kilight.client import Device
+from kilight.client.connector import Connector, NotifyingProtocol
+from kilight.client.exceptions import (
+    ConnectionTimeoutError,
+    NetworkTimeoutError,
+    RequestTimeoutError,
+)
+from kilight.protocol import CommandResult
+
+from .const import (
+    TCP_KEEPALIVE_COUNT,
+    TCP_KEEPALIVE_IDLE_SECONDS,
+    TCP_KEEPALIVE_INTERVAL_SECONDS,
+    WRITE_SETTLE_SECONDS,
+)
+from .presets import pack_output_writes
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+    from kilight.client import DeviceState, OutputIdentifier, OutputState
+
+_LOGGER = logging.getLogger(__name__)
+
+# Socket options enabling TCP keepalive and bounding how long sent data may go unanswered.
+# Options the platform doesn't have are left at their defaults.
+_KEEPALIVE_OPTIONS: tuple[tuple[int, str, int], ...] = (
+    (socket.SOL_SOCKET, "SO_KEEPALIVE", 1),
+    (socket.IPPROTO_TCP, "TCP_KEEPIDLE", TCP_KEEPALIVE_IDLE_SECONDS),
+    (socket.IPPROTO_TCP, "TCP_KEEPINTVL", TCP_KEEPALIVE_INTERVAL_SECONDS),
+    (socket.IPPROTO_TCP, "TCP_KEEPCNT", TCP_KEEPALIVE_COUNT),
+    (
+        socket.IPPROTO_TCP,
+        "TCP_USER_TIMEOUT",
+        (TCP_KEEPALIVE_IDLE_SECONDS + TCP_KEEPALIVE_INTERVAL_SECONDS * TCP_KEEPALIVE_COUNT) * 1000,
+    ),
+)
+
+
+def is_connection_error(err: BaseException) -> bool:
+    """Whether an error means the connection to the device failed, rather than a request."""
+    return isinstance(err, OSError | NetworkTimeoutError | asyncio.IncompleteReadError)
+
+
+def _enable_keepalive(transport: asyncio.BaseTransport) -> None:
+    """Turn on TCP keepalive for the socket of a connection."""
+    if (sock := transport.get_extra_info("socket")) is None:
+        return
+    for level, option_name, value in _KEEPALIVE_OPTIONS:
+        if (option := getattr(socket, option_name, None)) is None:
+            continue
+        try:
+            sock.setsockopt(level, option, value)
+        except OSError:
+            _LOGGER.debug("Unable to set socket option %s", option_name)
+
+
+class _ClosingProtocol(NotifyingProtocol):
+    """Protocol closing the connection as soon as the device closed its end."""
+
+    def eof_received(self) -> bool:
+        """Close the transport, the device never half-closes a connection it still uses."""
+        super().eof_received()
+        return False
+
+
+class KiLightConnector(Connector):
+    """
+    Connector that watches the health of its connection.
+
+    Connections are opened with TCP keepalive, so a vanished device is noticed by the
+    kernel within seconds even while nothing is sent, and closed as soon as the device
+    closes its end. Registered link callbacks are told about every failed exchange, with the
+    error, and about connections the device or the network closed, with None. The
+    connections opened are counted, so reconnects can be tracked.
+    """
+
+    def __init__(self, host: str, port: int, **kwargs: Any) -> None:
+        """
+        Initialize the connector.
+
+        :param str host: Host name or address of the device
+        :param int port: Port of the device
+        """
+        super().__init__(host, port, **kwargs)
+        self._connections: int = 0
+        self._last_exchange: float = 0.0
+        self._closing_protocol: NotifyingProtocol | None = None
+        self._link_callbacks: list[Callable[[Exception | None], None]] = []
+
+    @property
+    def connections(self) -> int:
+        """Number of connections opened to the device so far."""
+        return self._connections
+
+    @property
+    def connected(self) -> bool:
+        """Whether a connection to the device is currently open."""
+        return self._protocol is not None and self._protocol.connected
+
+    @property
+    def last_exchange(self) -> float:
+        """Monotonic time the last request to the device was answered."""
+        return self._last_exchange
+
+    def register_link_callback(
+        self, link_callback: Callable[[Exception | None], None]
+    ) -> Callable[[], None]:
+        """
+        Register a callback for failed exchanges and unexpectedly closed connections.
+
+        :param Callable[[Exception | None], None] link_callback: Called with the error of a
+            failed exchange, or None when the connection was closed by the other end
+        :return: Callable that unregisters the callback
+        """
+        self._link_callbacks.append(link_callback)
+        return lambda: self._link_callbacks.remove(link_callback)
+
+    async def open_connection(self) -> None:
+        """Open a connection to the device, with TCP keepalive enabled."""
+        _LOGGER.debug("Connecting to %s:%s...", self.host, self.port)
+        loop = asyncio.get_running_loop()
+        connection_protocol: NotifyingProtocol | None = None
+
+        async def _on_disconnected() -> None:
+            await self._async_handle_disconnected(connection_protocol)
+
+        try:
+            transport, connection_protocol = await asyncio.wait_for(
+                loop.create_connection(
+                    lambda: _ClosingProtocol(on_disconnected_callback=_on_disconnected, loop=loop),
+                    self.host,
+                    self.port,
+                ),
+                timeout=self.connection_timeout,
+            )
+        except TimeoutError as err:
+            raise ConnectionTimeoutError(self.host, self.port, self.connection_timeout) from err
+
+        _enable_keepalive(transport)
+        self._protocol = connection_protocol
+        self._reader = connection_protocol.reader
+        self._writer = asyncio.StreamWriter(transport, connection_protocol, self._reader, loop)
+        self._connections += 1
+        _LOGGER.debug("Connected to %s:%s", self.host, self.port)
+
+    async def write_packed_and_read_state(
+        self, state_to_update: DeviceState, payload: bytes, writes: int
+    ) -> DeviceState:
+        """
+        Send serialized output writes in one go, then read the state they resulted in.
+
+        The writes reach the device back to back instead of each waiting for the answer to
+        the previous one, and are answered in order.
+
+        :param DeviceState state_to_update: Current state of the device
+        :param bytes payload: Output write requests serialized by pack_output_writes
+        :param int writes: Number of write requests in the payload
+        :return: The state of the device after the writes
+        """
+
+        async def _write_packed(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        ) -> DeviceState:
+            writer.write(payload)
+            try:
+                await asyncio.wait_for(writer.drain(), timeout=self.request_timeout)
+            except TimeoutError as err:
+                raise RequestTimeoutError(self.host, self.port, self.request_timeout) from err
+
+            for _ in range(writes):
+                response = await self._read_response(reader)
+                if not response.HasField("commandResult"):
+                    error_msg = f"Unexpected message received instead of commandResult: {response}"
+                    raise ValueError(error_msg)
+                if response.commandResult.result != CommandResult.Result.OK:
+                    _LOGGER.warning("Write request returned non-OK result")
+
+            await asyncio.sleep(WRITE_SETTLE_SECONDS)
+            return await self._request_and_parse_state(state_to_update, reader, writer)
+
+        return await self._connect_and_run(_write_packed)
+
+    async def disconnect(self) -> None:
+        """Close the connection to the device, without reporting it to the link callbacks."""
+        self._closing_protocol = self._protocol
+        await super().disconnect()
+
+    async def _connect_and_run[ReturnT](
+        self,
+        lambda_to_run: Callable[
+            [asyncio.StreamReader, asyncio.StreamWriter], Coroutine[Any, Any, ReturnT]
+        ],
+    ) -> ReturnT:
+        """Run an exchange with the device, reporting a failed one to the link callbacks."""
+        try:
+            result = await super()._connect_and_run(lambda_to_run)
+        except Exception as err:
+            if is_connection_error(err):
+                self._notify_link_callbacks(err)
+            raise
+        self._last_exchange = monotonic()
+        return result
+
+    async def _async_handle_disconnected(self, protocol: NotifyingProtocol | None) -> None:
+        """Forget a closed connection, reporting it if it wasn't closed on purpose."""
+        async with self._operation_lock:
+            if protocol is not self._protocol:
+                # Already replaced by a newer connection
+                return
+            _LOGGER.debug("Disconnected from %s:%s", self.host, self.port)
+            self._reader = None
+            self._writer = None
+            self._protocol = None
+
+        if protocol is not self._closing_protocol:
+            self._notify_link_callbacks(None)
+        self._closing_protocol = None
+
+    def _notify_link_callbacks(self, err: Exception | None) -> None:
+        for link_callback in list(self._link_callbacks):
+            link_callback(err)
+
+
+class KiLightDevice(Device):
+    """
+    Device that can start out from a state known from a previous run.
+
+    A restored state includes the system info, like the model and firmware version, so
+    entities can be set up from it. The system info is still read again with the first
+    update after restoring, to notice a device that has changed since, like after a
+    firmware update.
+    """
+
+    def __init__(self, host: str, port: int | None = None, **kwargs: Any) -> None:
+        """
+        Initialize the device.
+
+        :param str host: Host name or address of the device
+        :param int | None port: Port of the device, None for the default port
+        """
+        super().__init__(host, port, **kwargs)
+        self._connector: KiLightConnector = KiLightConnector(
+            self.connector.host, self.connector.port, **kwargs
+        )
+        self._system_info_restored: bool = False
+
+    @property
+    def connector(self) -> KiLightConnector:
+        """Connector to the device."""
+        return self._connector
+
+    def restore_state(self, state: DeviceState) -> None:
+        """
+        Use a previously known state until the device is read again.
+
+        Registered callbacks are not fired, since nothing was received from the device.
+
+        :param DeviceState state: The state to restore
+        """
+        self._state = state
+        self._system_info_restored = True
+
+    async def write_packed(self, payload: bytes, writes: int) -> None:
+        """
+        Send serialized output writes in one go and read the state they resulted in.
+
+        :param bytes payload: Output write requests serialized by pack_output_writes
+        :param int writes: Number of write requests in the payload
+        """
+        _LOGGER.debug("%s: Writing %s packed outputs", self.name, writes)
+        self._state = await self.connector.write_packed_and_read_state(self._state, payload, writes)
+        self._fire_callbacks()
+
+    async def write_outputs(
+        self, outputs: tuple[tuple[OutputIdentifier, OutputState], ...]
+    ) -> None:
+        """
+        Write several outputs in one go and read the state they resulted in.
+
+        :param tuple[tuple[OutputIdentifier, OutputState], ...] outputs: Output states to write
+        """
+        await self.write_packed(pack_output_writes(outputs), len(outputs))
+
+    async def update_state(self) -> None:
+        """Read the device state, along with the system info if it was only restored."""
+        if not self._system_info_restored:
+            await super().update_state()
+            return
+
+        _LOGGER.debug("%s: Reading system info to verify the restored state", self.name)
+        self._state = await self.connector.read_system_info_and_state(self._state)
+        self._system_info_restored = False
+        self._fire_callbacks()
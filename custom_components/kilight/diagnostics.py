@@ -0,0 +1,45 @@
+"""Diagnostics support for the KiLight integration."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Final
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_HOST
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .models import KiLightDeviceData
+    from .types import KiLightConfigEntry
+
+_TO_REDACT: Final[set[str]] = {CONF_HOST, "hardware_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: KiLightConfigEntry
+) -> dict[str, Any]:
+    """Get the state, metrics, thermal state and last telemetry capture of a KiLight."""
+    data: KiLightDeviceData = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data.coordinator
+
+    return async_redact_data(
+        {
+            "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+            "device_state": asdict(data.device.state),
+            "coordinator": {
+                "last_update_success": coordinator.last_update_success,
+                "update_mode": coordinator.update_mode.name,
+                "update_interval": coordinator.poll_interval.total_seconds(),
+                "skipped_state_writes": coordinator.skipped_state_writes,
+                "optimistic_mismatches": coordinator.optimistic_mismatches,
+            },
+            "metrics": coordinator.metrics.as_dict(),
+            "thermal": coordinator.thermal.as_dict(coordinator),
+            "capture": data.capture.as_dict(),
+        },
+        _TO_REDACT,
+    )
@@ -0,0 +1,182 @@
+"""Cache of the KiLight devices read during discovery."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import logging
+from time import monotonic
+from typing import TYPE_CHECKING, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+from kilight.client import DEFAULT_PORT, Device
+
+from .const import DISCOVERY_CACHE_SECONDS, DISCOVERY_MAX_CONCURRENT_READS, DOMAIN
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
+
+_DISCOVERY_CACHE_KEY: Final[HassKey[KiLightDiscoveryCache]] = HassKey(f"{DOMAIN}_discovery")
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class _DiscoveredDevice:
+    """A device read during discovery."""
+
+    host: str
+    port: int
+    device: Device
+    # Monotonic time the device was read at
+    read_at: float
+
+
+@callback
+def async_get_discovery_cache(hass: HomeAssistant) -> KiLightDiscoveryCache:
+    """Get the discovery cache shared by all config flows, creating it for the first one."""
+    if (cache := hass.data.get(_DISCOVERY_CACHE_KEY)) is None:
+        cache = hass.data[_DISCOVERY_CACHE_KEY] = KiLightDiscoveryCache(hass)
+    return cache
+
+
+class KiLightDiscoveryCache:
+    """
+    Devices read during discovery, by the hardware ID they announce.
+
+    A discovered device is read over a single short-lived connection, which is closed right
+    after, and the device is kept for DISCOVERY_CACHE_SECONDS, or until the config flow that
+    read it ends. Every step of a config flow, and every repeated announcement of the device
+    in the meantime, uses that one read. Reads of the same device asked for while one is
+    under way wait for it instead of connecting again.
+
+    Every announcement is remembered too, so all devices found on the network can be
+    offered at once, and read concurrently, at most DISCOVERY_MAX_CONCURRENT_READS at a
+    time.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_age: float = DISCOVERY_CACHE_SECONDS) -> None:
+        """
+        Initialize the discovery cache.
+
+        :param HomeAssistant hass: Home Assistant instance, which owns the reads
+        :param float max_age: How long a read device is kept, in seconds
+        """
+        self._hass: HomeAssistant = hass
+        self._max_age: float = max_age
+        self._devices: dict[str, _DiscoveredDevice] = {}
+        self._reads: dict[str, asyncio.Task[Device]] = {}
+        self._announcements: dict[str, ZeroconfServiceInfo] = {}
+
+    @property
+    def announcements(self) -> Mapping[str, ZeroconfServiceInfo]:
+        """Latest announcement of every device found, by the hardware ID it announced."""
+        return self._announcements
+
+    @callback
+    def async_announce(self, hardware_id: str, discovery_info: ZeroconfServiceInfo) -> None:
+        """
+        Remember the announcement of a device.
+
+        :param str hardware_id: Hardware ID the device announced
+        :param ZeroconfServiceInfo discovery_info: The announcement
+        """
+        self._announcements[hardware_id] = discovery_info
+
+    async def async_read(self, hardware_id: str, host: str, port: int) -> Device:
+        """
+        Get a device read recently at the same address, or read it.
+
+        :param str hardware_id: Hardware ID the device announced
+        :param str host: Host the device announced
+        :param int port: Port the device announced
+        :return: The device, disconnected, with its state read
+        """
+        if (
+            (discovered := self._devices.get(hardware_id)) is not None
+            and (discovered.host, discovered.port) == (host, port)
+            and monotonic() - discovered.read_at < self._max_age
+        ):
+            return discovered.device
+
+        # A read started eagerly may be done before its done callback ran
+        if (read := self._reads.get(hardware_id)) is None or read.done():
+            read = self._reads[hardware_id] = self._hass.async_create_background_task(
+                self._async_read(host, port), name=f"KiLight discovery read {host}:{port}"
+            )
+            read.add_done_callback(lambda _: self._reads.pop(hardware_id, None))
+
+        device = await asyncio.shield(read)
+        self._devices[hardware_id] = _DiscoveredDevice(host, port, device, monotonic())
+        return device
+
+    async def async_read_all(
+        self,
+        announcements: Mapping[str, ZeroconfServiceInfo],
+        max_concurrent: int = DISCOVERY_MAX_CONCURRENT_READS,
+    ) -> dict[str, Device]:
+        """
+        Read announced devices concurrently, at most max_concurrent at a time.
+
+        :param Mapping[str, ZeroconfServiceInfo] announcements: Announcements of the devices
+            to read, by the hardware ID they announced
+        :param int max_concurrent: Most devices to read at the same time
+        :return: The devices that could be read, by the hardware ID they announced
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def _async_read_one(hardware_id: str, discovery_info: ZeroconfServiceInfo) -> Device:
+            async with semaphore:
+                return await self.async_read(
+                    hardware_id, discovery_info.host, discovery_info.port or DEFAULT_PORT
+                )
+
+        results = await asyncio.gather(
+            *(
+                _async_read_one(hardware_id, discovery_info)
+                for hardware_id, discovery_info in announcements.items()
+            ),
+            return_exceptions=True,
+        )
+
+        devices: dict[str, Device] = {}
+        for hardware_id, result in zip(announcements, results, strict=True):
+            if isinstance(result, BaseException):
+                _LOGGER.debug("Unable to read discovered KiLight %s: %s", hardware_id, result)
+            else:
+                devices[hardware_id] = result
+        return devices
+
+    @callback
+    def async_forget(self, hardware_id: str) -> None:
+        """
+        Drop a device and its announcement, like once it was set up.
+
+        :param str hardware_id: Hardware ID the device announced
+        """
+        self._devices.pop(hardware_id, None)
+        self._announcements.pop(hardware_id, None)
+
+    @callback
+    def async_release(self, hardware_ids: Iterable[str]) -> None:
+        """
+        Drop devices read for a config flow that ended, keeping their announcements.
+
+        :param Iterable[str] hardware_ids: Hardware IDs the devices announced
+        """
+        for hardware_id in hardware_ids:
+            self._devices.pop(hardware_id, None)
+
+    @staticmethod
+    async def _async_read(host: str, port: int) -> Device:
+        """Read a device over a connection of its own, always closing it."""
+        _LOGGER.debug("Reading discovered KiLight at %s:%s", host, port)
+        device = Device(host, port)
+        try:
+            await device.update_state()
+        finally:
+            await device.disconnect()
+        return device
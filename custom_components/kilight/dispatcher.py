@@ -0,0 +1,176 @@
+"""Per-field fan-out of KiLight device state changes to the entities that depend on them."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import fields
+import logging
+from time import monotonic
+from typing import TYPE_CHECKING, Final
+
+from homeassistant.core import CALLBACK_TYPE, callback
+from kilight.client import DeviceState
+
+from .exceptions import UnknownStateFieldError
+from .snapshot import KiLightStateSnapshot
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from kilight.client import Device
+
+    from .metrics import KiLightDeviceMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Names of every top-level field of the device state that can be subscribed to
+STATE_FIELDS: Final[tuple[str, ...]] = tuple(field.name for field in fields(DeviceState))
+
+# Names of the coordinator values that can be subscribed to. The coordinator reports their
+# changes itself through KiLightStateDispatcher.async_notify_changed.
+COORDINATOR_FIELDS: Final[tuple[str, ...]] = (
+    "poll_interval",
+    "skipped_state_writes",
+    "optimistic_mismatches",
+    "update_latency",
+    "command_latency",
+    "fan_out_time",
+    "poll_lateness",
+    "timeouts",
+    "reconnects",
+    "color_engine",
+    "thermal_limit",
+    "supply_voltage",
+    "energy",
+)
+
+
+class KiLightStateDispatcher:
+    """
+    Dispatcher sitting between a Device and its entities.
+
+    The device only has one device-wide callback, so every state change would otherwise
+    reach every entity. This keeps an index of which callbacks depend on which state field,
+    diffs each new state against the previous one and only invokes the callbacks whose
+    fields changed. Values kept by the coordinator, like its diagnostics, are dispatched the
+    same way when the coordinator reports them changed.
+    """
+
+    def __init__(
+        self,
+        device: Device,
+        skipped_callback: Callable[[int], None] | None = None,
+        metrics: KiLightDeviceMetrics | None = None,
+    ) -> None:
+        """
+        Initialize the dispatcher.
+
+        :param Device device: KiLight device to dispatch state changes for
+        :param Callable[[int], None] | None skipped_callback: Called with the number of
+            registered callbacks that were not invoked for a state, because none of the
+            fields they watch changed
+        :param KiLightDeviceMetrics | None metrics: Metrics to record the time taken by the
+            invoked callbacks in
+        """
+        self._device: Device = device
+        self._skipped_callback: Callable[[int], None] | None = skipped_callback
+        self._metrics: KiLightDeviceMetrics | None = metrics
+        self._last_state: DeviceState = device.state
+        self._snapshot: KiLightStateSnapshot = KiLightStateSnapshot.from_state(device.state)
+        self._snapshot_state: DeviceState = device.state
+        self._callbacks: defaultdict[str, list[CALLBACK_TYPE]] = defaultdict(list)
+        self._state_callback_count: int = 0
+        self._cancel_device_callback: Callable[[], None] = device.register_callback(
+            self._handle_device_state
+        )
+
+    @property
+    def snapshot(self) -> KiLightStateSnapshot:
+        """
+        Snapshot of the current device state, shared by every entity of the device.
+
+        Taken once per device state, the first time an entity reads it after a change.
+        """
+        if (state := self._device.state) is not self._snapshot_state:
+            self._snapshot = KiLightStateSnapshot.from_state(state)
+            self._snapshot_state = state
+        return self._snapshot
+
+    @callback
+    def async_register_callback(
+        self, state_fields: Iterable[str], update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """
+        Register a callback to be invoked when any of the given state fields change.
+
+        :param Iterable[str] state_fields: Names of the device state fields to watch
+        :param CALLBACK_TYPE update_callback: Callback to invoke on change
+        :return: Function that unregisters the callback
+        """
+        state_fields = tuple(state_fields)
+        for state_field in state_fields:
+            if state_field not in STATE_FIELDS and state_field not in COORDINATOR_FIELDS:
+                raise UnknownStateFieldError(state_field)
+
+        watches_state = any(state_field in STATE_FIELDS for state_field in state_fields)
+        if watches_state:
+            self._state_callback_count += 1
+        for state_field in state_fields:
+            self._callbacks[state_field].append(update_callback)
+
+        @callback
+        def _unregister_callback() -> None:
+            if watches_state:
+                self._state_callback_count -= 1
+            for state_field in state_fields:
+                self._callbacks[state_field].remove(update_callback)
+
+        return _unregister_callback
+
+    @callback
+    def async_notify_changed(self, coordinator_field: str) -> None:
+        """
+        Invoke the callbacks of a coordinator value that changed.
+
+        :param str coordinator_field: Name of the coordinator value, one of COORDINATOR_FIELDS
+        """
+        for update_callback in tuple(self._callbacks[coordinator_field]):
+            update_callback()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop listening to the device."""
+        self._cancel_device_callback()
+
+    @callback
+    def _handle_device_state(self, state: DeviceState) -> None:
+        """Invoke the callbacks of every field that changed since the last state."""
+        start_time = monotonic()
+        last_state = self._last_state
+        self._last_state = state
+
+        # Callbacks watching several changed fields are still only invoked once
+        callbacks_to_invoke: dict[CALLBACK_TYPE, None] = {}
+        for state_field in STATE_FIELDS:
+            if not (field_callbacks := self._callbacks.get(state_field)):
+                continue
+            new_value = getattr(state, state_field)
+            old_value = getattr(last_state, state_field)
+            if new_value is old_value or new_value == old_value:
+                continue
+            callbacks_to_invoke.update(dict.fromkeys(field_callbacks))
+
+        _LOGGER.debug(
+            "%s: Dispatching state change to %s callbacks",
+            self._device.name,
+            len(callbacks_to_invoke),
+        )
+        for update_callback in callbacks_to_invoke:
+            update_callback()
+
+        if self._metrics is not None:
+            self._metrics.record_fan_out_time(monotonic() - start_time)
+
+        skipped = self._state_callback_count - len(callbacks_to_invoke)
+        if skipped > 0 and self._skipped_callback is not None:
+            self._skipped_callback(skipped)
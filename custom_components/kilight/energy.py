@@ -0,0 +1,70 @@
+"""Energy accumulation from the power drawn by KiLight outputs."""
+
+from __future__ import annotations
+
+from typing import Final
+
+# Seconds in an hour, and watt-hours in a kilowatt-hour
+_SECONDS_PER_HOUR: Final[float] = 3600.0
+_WATT_HOURS_PER_KILOWATT_HOUR: Final[float] = 1000.0
+
+
+class EnergyMeter:
+    """
+    Accumulates the energy drawn from the power readings of an output or a device.
+
+    The power between two readings is taken to change linearly from one to the other, the
+    trapezoidal rule, so each reading only costs a few float operations. A missing reading
+    breaks the series, nothing is accumulated across it, as there is no telling what was
+    drawn in the meantime.
+
+    The energy accumulated before a restart is added back once, from the state the energy
+    sensor restored.
+    """
+
+    __slots__ = ("_energy", "_power", "_read_at", "_restored")
+
+    def __init__(self) -> None:
+        """Initialize the meter, with nothing accumulated."""
+        self._energy: float = 0.0
+        self._power: float | None = None
+        self._read_at: float = 0.0
+        self._restored: bool = False
+
+    @property
+    def energy(self) -> float:
+        """The energy accumulated, in kilowatt-hours."""
+        return self._energy
+
+    @property
+    def power(self) -> float | None:
+        """The last power reading, in watts, None while readings are missing."""
+        return self._power
+
+    def add(self, power: float | None, now: float) -> None:
+        """
+        Accumulate the energy drawn since the previous reading.
+
+        :param float | None power: The power reading, in watts, None when there is none
+        :param float now: Monotonic time of the reading
+        """
+        if power is not None and self._power is not None:
+            self._energy += (
+                (self._power + power)
+                / 2
+                * (now - self._read_at)
+                / _SECONDS_PER_HOUR
+                / _WATT_HOURS_PER_KILOWATT_HOUR
+            )
+        self._power = power
+        self._read_at = now
+
+    def restore(self, energy: float) -> None:
+        """
+        Add the energy accumulated before a restart, only the first time it is restored.
+
+        :param float energy: The energy restored, in kilowatt-hours
+        """
+        if not self._restored:
+            self._restored = True
+            self._energy += energy
@@ -4,20 +4,34 @@ from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
 import logging
-from typing import Any
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Final
 
 from homeassistant.core import callback
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from kilight.client import Device, OutputIdentifier, OutputState
 
-from .const import DOMAIN
 from .coordinator import KiLightCoordinator
+from .dispatcher import STATE_FIELDS
 from .exceptions import UnknownOutputError
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+    from homeassistant.helpers.device_registry import DeviceInfo
+    from kilight.client import DeviceState
+
+    from .snapshot import KiLightStateSnapshot
+
 _LOGGER = logging.getLogger(__name__)
 
+# Name of the device state field of each output
+OUTPUT_FIELDS: Final[dict[OutputIdentifier, str]] = {
+    OutputIdentifier.OutputA: "output_a",
+    OutputIdentifier.OutputB: "output_b",
+}
+
 
 class KiLightBaseEntity(CoordinatorEntity[KiLightCoordinator], Entity, metaclass=ABCMeta):
     """Base class for deriving KiLight entities from."""
@@ -34,21 +48,21 @@ class KiLightBaseEntity(CoordinatorEntity[KiLightCoordinator], Entity, metaclass
         """
         super().__init__(coordinator)
         self._device: Device = device
-        self._attr_device_info: DeviceInfo = DeviceInfo(
-            identifiers={(DOMAIN, device.state.hardware_id)},
-            name=name,
-            manufacturer=device.state.manufacturer_name,
-            model=device.state.model,
-            sw_version=str(device.state.firmware_version),
-            hw_version=str(device.state.hardware_version),
-        )
+        self._attr_device_info: DeviceInfo = coordinator.get_device_info(name)
         self._attr_unique_id = device.state.hardware_id
+        self._last_available: bool | None = None
+        self._last_state_snapshot: Hashable | None = None
 
     @property
     def device(self) -> Device:
         """The Device instance, used to control the physical KiLight hardware."""
         return self._device
 
+    @property
+    def snapshot(self) -> KiLightStateSnapshot:
+        """Snapshot of the current device state, shared by every entity of the device."""
+        return self.coordinator.dispatcher.snapshot
+
     @callback
     @abstractmethod
     def _async_update_attrs(self) -> None:
@@ -58,23 +72,52 @@ class KiLightBaseEntity(CoordinatorEntity[KiLightCoordinator], Entity, metaclass
         Override this in derived classes.
         """
 
+    @callback
+    @abstractmethod
+    def _state_snapshot(self) -> Hashable:
+        """
+        Get the values of every device state field this entity reads.
+
+        Override this in derived classes. When the snapshot is unchanged from the last state
+        write, the write is skipped.
+        """
+
     @callback
     def _handle_coordinator_update(self, *_: Any) -> None:
-        """Handle data update."""
+        """Handle data update, only writing state if something this entity reads changed."""
+        available = self.available
+        state_snapshot = self._state_snapshot()
+        if available == self._last_available and state_snapshot == self._last_state_snapshot:
+            self.coordinator.async_record_skipped_state_write()
+            return
+
+        self._last_available = available
+        self._last_state_snapshot = state_snapshot
         self._async_update_attrs()
         self.async_write_ha_state()
 
-    def _register_update_callback(self) -> None:
+    @property
+    def state_fields(self) -> tuple[str, ...]:
         """
-        Bind to the device-wide update callback.
+        Names of the device state fields this entity depends on.
 
-        Override this in subclasses to bind to more specific update callbacks.
+        Override this in subclasses to only be updated when those fields change.
         """
-        self.async_on_remove(self.device.register_callback(self._handle_coordinator_update))
+        return STATE_FIELDS
+
+    def _register_update_callback(self) -> None:
+        """Bind to the update callbacks of the state fields this entity depends on."""
+        self.async_on_remove(
+            self.coordinator.dispatcher.async_register_callback(
+                self.state_fields, self._handle_coordinator_update
+            )
+        )
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
         await super().async_added_to_hass()
+        self._last_available = self.available
+        self._last_state_snapshot = self._state_snapshot()
         self._register_update_callback()
 
 
@@ -97,7 +140,14 @@ class KiLightOutputBaseEntity(KiLightBaseEntity, metaclass=ABCMeta):
         :param str name: Name to pass through to the DeviceInfo instance
         """
         super().__init__(coordinator, device, name)
+        if (output_field := OUTPUT_FIELDS.get(output)) is None:
+            raise UnknownOutputError(output)
         self._output: OutputIdentifier = output
+        self._output_field: str = output_field
+        self._state_fields: tuple[str, ...] = (output_field,)
+        self._get_output_state: Callable[[DeviceState], OutputState | None] = attrgetter(
+            output_field
+        )
         self._attr_unique_id = f"{self._attr_unique_id}_{OutputIdentifier.Name(self._output)}"
 
     @property
@@ -105,11 +155,12 @@ class KiLightOutputBaseEntity(KiLightBaseEntity, metaclass=ABCMeta):
         """Which output this entity represents."""
         return self._output
 
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the device state fields this entity depends on."""
+        return self._state_fields
+
     @property
     def output_state(self) -> OutputState | None:
         """Get the state of this output from the device state."""
-        if self.output == OutputIdentifier.OutputA:
-            return self.device.state.output_a
-        if self.output == OutputIdentifier.OutputB:
-            return self.device.state.output_b
-        raise UnknownOutputError(self.output)
+        return self._get_output_state(self.device.state)
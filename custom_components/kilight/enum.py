@@ -1,6 +1,6 @@
 """Enums specific to the HomeAssistant KiLight integration."""
 
-from enum import Enum
+from enum import Enum, StrEnum
 
 
 class TemperatureSensorLocation(Enum):
@@ -10,3 +10,45 @@ class TemperatureSensorLocation(Enum):
     PowerSupply = 2
     OutputA = 3
     OutputB = 4
+
+
+class UpdateMode(Enum):
+    """How the coordinator receives state updates from a device."""
+
+    Poll = 1
+    Push = 2
+
+
+class LatencyMetric(Enum):
+    """Operation of a device whose durations are recorded in a latency histogram."""
+
+    Update = 1
+    Command = 2
+    FanOut = 3
+    PollLateness = 4
+
+
+class TelemetryKind(Enum):
+    """Kind of reading of a sensor whose published states are filtered by telemetry options."""
+
+    Current = 1
+    Temperature = 2
+    FanSpeed = 3
+    FanDrive = 4
+    Power = 5
+
+
+class TelemetryAggregate(StrEnum):
+    """Value of the readings within the telemetry window that a sensor publishes."""
+
+    Latest = "latest"
+    Mean = "mean"
+    Min = "min"
+    Max = "max"
+
+
+class CaptureFormat(StrEnum):
+    """File format a telemetry capture is exported in."""
+
+    Csv = "csv"
+    Npz = "npz"
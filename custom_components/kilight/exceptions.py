@@ -2,7 +2,7 @@
 
 from kilight.protocol import OutputIdentifier
 
-from custom_components.kilight.enum import TemperatureSensorLocation
+from custom_components.kilight.enum import LatencyMetric, TemperatureSensorLocation
 
 
 class UnknownOutputError(ValueError):
@@ -19,3 +19,35 @@ class UnknownTemperatureSensorError(ValueError):
     def __init__(self, unknown_temp_sensor: TemperatureSensorLocation) -> None:
         """Initialize with the given unknown temperature sensor location."""
         super().__init__(f"Unknown temperature sensor: {unknown_temp_sensor.name}")
+
+
+class UnknownLatencyMetricError(ValueError):
+    """Specific ValueError for an unknown LatencyMetric."""
+
+    def __init__(self, unknown_metric: LatencyMetric) -> None:
+        """Initialize with the given unknown latency metric."""
+        super().__init__(f"Unknown latency metric: {unknown_metric.name}")
+
+
+class UnknownStateFieldError(ValueError):
+    """Specific ValueError for a field that does not exist on the device state."""
+
+    def __init__(self, unknown_field: str) -> None:
+        """Initialize with the given unknown state field name."""
+        super().__init__(f"Unknown device state field: {unknown_field}")
+
+
+class MissingOutputError(ValueError):
+    """Specific ValueError for writing to an output the device does not have."""
+
+    def __init__(self, missing_id: OutputIdentifier) -> None:
+        """Initialize with the given missing output ID."""
+        super().__init__(f"Device has no output: {OutputIdentifier.Name(missing_id)}")
+
+
+class CaptureInProgressError(RuntimeError):
+    """Specific RuntimeError for starting a telemetry capture of a device already captured."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize with the name of the device being captured."""
+        super().__init__(f"A telemetry capture of {name} is already running")
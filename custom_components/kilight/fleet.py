@@ -0,0 +1,238 @@
+"""Fleet-wide poll scheduling for the KiLight integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+import heapq
+from itertools import count
+from operator import attrgetter
+from typing import TYPE_CHECKING, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN, FLEET_MAX_CONCURRENT_POLLS, FLEET_MAX_POLL_SPACING_SECONDS
+
+if TYPE_CHECKING:
+    from asyncio import TimerHandle
+    from collections.abc import Callable
+
+    from .coordinator import KiLightCoordinator
+
+_FLEET_SCHEDULER_KEY: Final[HassKey[KiLightFleetScheduler]] = HassKey(f"{DOMAIN}_fleet")
+
+# Order of the polls waiting for a free slot, lowest first
+_PRIORITY_ACTIVE: Final[int] = 0
+_PRIORITY_IDLE: Final[int] = 1
+
+
+@dataclass(slots=True)
+class _FleetPoll:
+    """A poll of one device, waiting for its turn."""
+
+    coordinator: KiLightCoordinator
+    # Loop time the device asked to be polled at, lateness is counted from here
+    requested: float
+    # Loop time the poll was spread out to
+    slot: float
+    # Whether this is a regular poll, rather than a one-off refresh like the startup probe
+    scheduled: bool = True
+    cancelled: bool = field(default=False, compare=False)
+
+
+@callback
+def async_get_fleet_scheduler(hass: HomeAssistant) -> KiLightFleetScheduler:
+    """Get the scheduler polling every KiLight, creating it for the first device."""
+    if (fleet := hass.data.get(_FLEET_SCHEDULER_KEY)) is None:
+        fleet = hass.data[_FLEET_SCHEDULER_KEY] = KiLightFleetScheduler(hass)
+    return fleet
+
+
+class KiLightFleetScheduler:
+    """
+    Polls all KiLights of the integration from a single timer.
+
+    Every coordinator still decides how long to wait before its device is polled again, but
+    hands the poll to the fleet instead of running a timer of its own. The fleet spreads the
+    polls out so that consecutive polls are evenly spaced at the combined poll rate of all
+    devices, instead of drifting into bursts. At most max_concurrent_polls polls run at
+    once; when more are due, devices that were recently active go first. How late each
+    poll started compared to when its device asked for it is recorded in the device
+    metrics.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent_polls: int = FLEET_MAX_CONCURRENT_POLLS,
+        max_poll_spacing: float = FLEET_MAX_POLL_SPACING_SECONDS,
+    ) -> None:
+        """
+        Initialize the fleet scheduler.
+
+        :param HomeAssistant hass: Home Assistant instance
+        :param int max_concurrent_polls: Most polls to run at the same time
+        :param float max_poll_spacing: Longest time to keep between two polls, in seconds
+        """
+        self._hass: HomeAssistant = hass
+        self._max_concurrent_polls: int = max_concurrent_polls
+        self._max_poll_spacing: float = max_poll_spacing
+        self._intervals: dict[KiLightCoordinator, float] = {}
+        self._poll_rate: float = 0.0
+        self._slots: list[_FleetPoll] = []
+        self._ready: list[tuple[int, float, int, _FleetPoll]] = []
+        self._sequence: count[int] = count()
+        self._running: int = 0
+        self._timer: TimerHandle | None = None
+        self._timer_when: float = 0.0
+
+    @property
+    def poll_spacing(self) -> float:
+        """Time kept between two consecutive polls, in seconds."""
+        if self._poll_rate <= 0:
+            return self._max_poll_spacing
+        return min(1 / self._poll_rate, self._max_poll_spacing)
+
+    @property
+    def running(self) -> int:
+        """Number of polls currently running."""
+        return self._running
+
+    @callback
+    def async_schedule(
+        self, coordinator: KiLightCoordinator, interval: float
+    ) -> Callable[[], None]:
+        """
+        Schedule the next poll of a device.
+
+        The poll is moved later if it would be closer than the poll spacing to a poll of
+        another device. Any poll of the device scheduled earlier is replaced.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device to poll
+        :param float interval: Seconds the device wants to wait before its next poll
+        :return: Callable that cancels the poll
+        """
+        self._set_interval(coordinator, interval)
+        requested = self._hass.loop.time() + interval
+        poll = _FleetPoll(coordinator, requested, self._find_slot(requested))
+        insort(self._slots, poll, key=attrgetter("slot"))
+        if self._slots[0] is poll:
+            self._arm_timer()
+        return lambda: self._cancel(poll)
+
+    @callback
+    def async_refresh_soon(self, coordinator: KiLightCoordinator) -> None:
+        """
+        Refresh a device as soon as there is room among the running polls.
+
+        Used for one-off refreshes like the startup probe, so a fleet set up at once doesn't
+        open a connection to every device at the same time.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device to refresh
+        """
+        now = self._hass.loop.time()
+        self._enqueue(_FleetPoll(coordinator, now, now, scheduled=False))
+        self._start_ready()
+
+    @callback
+    def async_remove(self, coordinator: KiLightCoordinator) -> None:
+        """
+        Stop polling a device whose coordinator shut down.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device
+        """
+        self._set_interval(coordinator, None)
+        for poll in [poll for poll in self._slots if poll.coordinator is coordinator]:
+            self._cancel(poll)
+        for _, _, _, poll in self._ready:
+            if poll.coordinator is coordinator:
+                poll.cancelled = True
+
+    def _set_interval(self, coordinator: KiLightCoordinator, interval: float | None) -> None:
+        """Keep the combined poll rate of the fleet up to date with a device's interval."""
+        if (previous := self._intervals.pop(coordinator, None)) is not None and previous > 0:
+            self._poll_rate -= 1 / previous
+        if interval is not None:
+            self._intervals[coordinator] = interval
+            if interval > 0:
+                self._poll_rate += 1 / interval
+        if not self._intervals:
+            self._poll_rate = 0.0
+
+    def _find_slot(self, requested: float) -> float:
+        """Find the earliest time at or after the requested one that keeps the poll spacing."""
+        spacing = self.poll_spacing
+        slot = requested
+        index = bisect_left(self._slots, slot - spacing, key=attrgetter("slot"))
+        while index < len(self._slots) and self._slots[index].slot < slot + spacing:
+            slot = max(slot, self._slots[index].slot + spacing)
+            index += 1
+        return slot
+
+    @callback
+    def _cancel(self, poll: _FleetPoll) -> None:
+        """Drop a poll that hasn't started yet."""
+        poll.cancelled = True
+        index = bisect_left(self._slots, poll.slot, key=attrgetter("slot"))
+        while index < len(self._slots) and self._slots[index].slot == poll.slot:
+            if self._slots[index] is poll:
+                del self._slots[index]
+                if index == 0:
+                    self._arm_timer()
+                return
+            index += 1
+
+    @callback
+    def _arm_timer(self) -> None:
+        """Set the timer for the earliest scheduled poll."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._slots:
+            self._timer_when = self._slots[0].slot
+            self._timer = self._hass.loop.call_at(self._timer_when, self._async_run_due)
+
+    @callback
+    def _async_run_due(self) -> None:
+        """Queue every poll whose slot has come, and start as many as there is room for."""
+        self._timer = None
+        now = max(self._hass.loop.time(), self._timer_when)
+        while self._slots and self._slots[0].slot <= now:
+            self._enqueue(self._slots.pop(0))
+        self._start_ready()
+        self._arm_timer()
+
+    def _enqueue(self, poll: _FleetPoll) -> None:
+        """Queue a poll to run once there is room, recently active devices first."""
+        priority = _PRIORITY_ACTIVE if poll.coordinator.recently_active else _PRIORITY_IDLE
+        heapq.heappush(self._ready, (priority, poll.requested, next(self._sequence), poll))
+
+    @callback
+    def _start_ready(self) -> None:
+        """Start queued polls while fewer than the maximum are running."""
+        while self._ready and self._running < self._max_concurrent_polls:
+            _, _, _, poll = heapq.heappop(self._ready)
+            if poll.cancelled:
+                continue
+            self._running += 1
+            poll.coordinator.config_entry.async_create_background_task(
+                self._hass,
+                self._async_poll(poll),
+                name=f"{poll.coordinator.name} fleet poll",
+                # Started on the next loop iteration, so a poll that finishes right away
+                # doesn't start the next one from within this loop
+                eager_start=False,
+            )
+
+    async def _async_poll(self, poll: _FleetPoll) -> None:
+        """Run a poll, then let the next queued one start."""
+        try:
+            lateness = max(self._hass.loop.time() - poll.requested, 0.0)
+            if poll.scheduled:
+                await poll.coordinator.async_fleet_refresh(lateness)
+            else:
+                await poll.coordinator.async_refresh()
+        finally:
+            self._running -= 1
+            self._start_ready()
@@ -2,32 +2,36 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import TYPE_CHECKING, Any, Final
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_COLOR_TEMP_KELVIN,
+    ATTR_HS_COLOR,
     ATTR_RGBWW_COLOR,
+    ATTR_TRANSITION,
+    ATTR_XY_COLOR,
     ColorMode,
     LightEntity,
     LightEntityFeature,
 )
 from homeassistant.core import HomeAssistant, callback
-from kilight.client import (
-    MAX_COLOR_TEMP,
-    MIN_COLOR_TEMP,
-    Device,
-    OutputIdentifier,
-    OutputIdUtil,
-)
+from homeassistant.util.color import color_RGB_to_hs, color_RGB_to_xy
+from kilight.client import Device, OutputIdentifier, OutputIdUtil
 
-from .const import DOMAIN
+from .commands import KiLightCommandCoalescer, apply_output_updates, output_settings
+from .const import DEVICE_TIMEOUT_SECONDS, DOMAIN
 from .entity import KiLightOutputBaseEntity
+from .transition import KiLightTransition, TransitionFrame
 
 if TYPE_CHECKING:
+    from collections.abc import Hashable
+
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+    from kilight.client import OutputState
 
     from .coordinator import KiLightCoordinator
     from .models import KiLightDeviceData
@@ -59,17 +63,30 @@ async def async_setup_entry(
 
 
 class KiLightOutputLightEntity(KiLightOutputBaseEntity, LightEntity):
-    """Representation of a single light output of a KiLight."""
+    """
+    Representation of a single light output of a KiLight.
+
+    In optimistic mode a command is shown as soon as it is issued. The requested state is
+    kept until the command that set it has been written and the state read back, which
+    either confirms it or replaces it with what the device reported, counted as a mismatch
+    by the coordinator. States reported in the meantime, like transition frames, are not
+    shown. While thermal protection limits the brightness of the device, the optimistic
+    state shows the limited brightness that is written.
+
+    Colors and brightness are converted into channel levels by the color engine of the
+    coordinator, so hs, xy and color temperature commands are table lookups. Hs and xy
+    colors go straight onto the RGB channels, color temperatures onto the white channels.
+    """
 
     _attr_translation_key: Final[str] = "output_light"
 
     _attr_supported_color_modes: Final[set[ColorMode]] = {
         ColorMode.COLOR_TEMP,
+        ColorMode.HS,
+        ColorMode.XY,
         ColorMode.RGBWW,
     }
-    _attr_supported_features: Final[LightEntityFeature] = LightEntityFeature(0)
-    _attr_min_color_temp_kelvin: Final[int] = MIN_COLOR_TEMP
-    _attr_max_color_temp_kelvin: Final[int] = MAX_COLOR_TEMP
+    _attr_supported_features: Final[LightEntityFeature] = LightEntityFeature.TRANSITION
 
     def __init__(
         self,
@@ -89,55 +106,277 @@ class KiLightOutputLightEntity(KiLightOutputBaseEntity, LightEntity):
         super().__init__(coordinator, device, output, name)
         self._attr_unique_id = f"{self._attr_unique_id}_light"
         self._attr_name = f"Output {OutputIdUtil.letter(output)} Light"
-        self._attr_color_mode = ColorMode.RGBWW
+        self._attr_color_mode = self._infer_color_mode(self.output_state)
         self._attr_translation_placeholders = {"output_id": OutputIdUtil.letter(output)}
+        self._commands: KiLightCommandCoalescer = KiLightCommandCoalescer(
+            coordinator, device, output
+        )
+        self._transition: KiLightTransition | None = None
+        self._transition_task: asyncio.Task[None] | None = None
+        self._optimistic_state: OutputState | None = None
+        self._command_sequence: int = 0
         self._async_update_attrs()
 
+    @property
+    def min_color_temp_kelvin(self) -> int:
+        """Warmest color temperature of the output, that of its warm white LEDs."""
+        return self.coordinator.color_engine.min_color_temp_kelvin
+
+    @property
+    def max_color_temp_kelvin(self) -> int:
+        """Coldest color temperature of the output, that of its cold white LEDs."""
+        return self.coordinator.color_engine.max_color_temp_kelvin
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the device state fields this light depends on, plus its color engine."""
+        return (*super().state_fields, "color_engine")
+
+    @property
+    def displayed_output_state(self) -> OutputState | None:
+        """The pending optimistic state of this output if any, its reported state otherwise."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state
+        return self.output_state
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop any running transition and drop any pending commands."""
+        self._cancel_transition()
+        self._commands.cancel()
+        await super().async_will_remove_from_hass()
+
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the light on and set its brightness/color."""
         brightness = kwargs.get(ATTR_BRIGHTNESS)
         rgbww_color = kwargs.get(ATTR_RGBWW_COLOR)
+        hs_color = kwargs.get(ATTR_HS_COLOR)
+        xy_color = kwargs.get(ATTR_XY_COLOR)
         color_temp = kwargs.get(ATTR_COLOR_TEMP_KELVIN)
+        transition = kwargs.get(ATTR_TRANSITION)
+        color_engine = self.coordinator.color_engine
 
         _LOGGER.debug("%s turning on, kwargs = %s", self.name, f"{kwargs}")
+        restore_brightness = self._cancel_transition()
 
-        updates = {}
+        updates: dict[str, Any] = {}
 
         if brightness is not None:
-            updates["brightness"] = brightness
+            updates["brightness"] = color_engine.device_brightness(brightness)
+        elif restore_brightness is not None:
+            updates["brightness"] = restore_brightness
 
         if rgbww_color is not None:
             self._attr_color_mode = ColorMode.RGBWW
-            updates["rgbcw_color"] = rgbww_color
+            updates["rgbcw_color"] = tuple(rgbww_color)
+        elif hs_color is not None:
+            self._attr_color_mode = ColorMode.HS
+            updates["rgbcw_color"] = color_engine.hs_to_rgbcw(hs_color)
+        elif xy_color is not None:
+            self._attr_color_mode = ColorMode.XY
+            updates["rgbcw_color"] = color_engine.xy_to_rgbcw(xy_color)
         elif color_temp is not None:
             self._attr_color_mode = ColorMode.COLOR_TEMP
-            updates["color_temp"] = color_temp
+            updates["rgbcw_color"] = color_engine.color_temp_to_rgbcw(color_temp)
 
         updates["power_on"] = True
+        output_state = self.output_state
+        if transition and output_state is not None:
+            # Fades run on the brightness scale of Home Assistant, the last frame sends this
+            target_brightness = color_engine.ha_brightness(
+                updates.get("brightness", output_state.brightness)
+            )
+            updates["brightness"] = color_engine.device_brightness(target_brightness)
+        sequence = self._async_show_optimistic(updates)
+
+        if transition and output_state is not None:
+            self._start_transition(
+                TransitionFrame(
+                    brightness=(
+                        color_engine.ha_brightness(output_state.brightness)
+                        if output_state.power_on
+                        else 0
+                    ),
+                    rgbcw=output_state.rgbcw,
+                ),
+                TransitionFrame(
+                    brightness=target_brightness,
+                    rgbcw=updates.get("rgbcw_color", output_state.rgbcw),
+                ),
+                transition,
+                power_on=True,
+            )
+            return
 
-        await self.device.update_output_from_parts(self.output, **updates)
+        await self._async_send(sequence, updates)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
+        transition = kwargs.get(ATTR_TRANSITION)
+
         _LOGGER.debug("%s turning off, kwargs = %s", self.name, f"{kwargs}")
-        await self.device.write_output(self.output, power_on=False)
+        restore_brightness = self._cancel_transition()
+
+        updates: dict[str, Any] = {"power_on": False}
+        if restore_brightness is not None:
+            updates["brightness"] = restore_brightness
+        sequence = self._async_show_optimistic(updates)
+
+        output_state = self.output_state
+        if transition and output_state is not None and output_state.power_on:
+            self._start_transition(
+                TransitionFrame(
+                    brightness=self.coordinator.color_engine.ha_brightness(output_state.brightness),
+                    rgbcw=output_state.rgbcw,
+                ),
+                TransitionFrame(brightness=0, rgbcw=output_state.rgbcw),
+                transition,
+                power_on=False,
+                off_brightness=(
+                    restore_brightness
+                    if restore_brightness is not None
+                    else output_state.brightness
+                ),
+            )
+            return
+
+        await self._async_send(sequence, updates)
 
     @callback
-    def _async_update_attrs(self) -> None:
-        """Handle updating _attr values."""
-        if self.output == OutputIdentifier.OutputA:
-            output_state = self.device.state.output_a
-        elif self.output == OutputIdentifier.OutputB:
-            output_state = self.device.state.output_b
-        else:
+    def _async_show_optimistic(self, updates: dict[str, Any]) -> int:
+        """
+        Start a new command, showing its result right away in optimistic mode.
+
+        :param dict[str, Any] updates: The output updates the command results in
+        :return: Sequence number of the command, to reconcile it once written
+        """
+        self._command_sequence += 1
+        if self.coordinator.optimistic and (output_state := self.displayed_output_state):
+            # Show what is written, which thermal protection may hold below what was asked
+            self._optimistic_state = self.coordinator.commander.limit_output_state(
+                apply_output_updates(output_state, **updates)
+            )
+            self._handle_coordinator_update()
+        return self._command_sequence
+
+    @callback
+    def _async_reconcile(self, sequence: int, *, failed: bool = False) -> None:
+        """
+        Replace the optimistic state of a written command with the state the device reported.
+
+        :param int sequence: Sequence number of the written command
+        :param bool failed: Whether writing the command failed or timed out
+        """
+        if sequence != self._command_sequence or self._optimistic_state is None:
+            # A newer command replaced the expected state, it reconciles instead
             return
 
+        expected_state, self._optimistic_state = self._optimistic_state, None
+        if failed or output_settings(expected_state) != output_settings(self.output_state):
+            self.coordinator.async_record_optimistic_mismatch()
+            _LOGGER.debug(
+                "%s: Rolling back optimistic state %s, device reported %s",
+                self.name,
+                expected_state,
+                self.output_state,
+            )
+        self._handle_coordinator_update()
+
+    async def _async_send(self, sequence: int, updates: dict[str, Any]) -> None:
+        """Send output updates and reconcile the optimistic state of the command with them."""
+        try:
+            async with asyncio.timeout(DEVICE_TIMEOUT_SECONDS):
+                await self._commands.async_send(**updates)
+        except BaseException:
+            self._async_reconcile(sequence, failed=True)
+            raise
+        self._async_reconcile(sequence)
+
+    def _start_transition(
+        self,
+        start: TransitionFrame,
+        target: TransitionFrame,
+        duration: float,
+        *,
+        power_on: bool,
+        off_brightness: int | None = None,
+    ) -> None:
+        """
+        Run a transition in the background, until it finishes or a new command arrives.
+
+        The transition belongs to the command started last, which it reconciles once done.
+        """
+        self._transition = KiLightTransition(
+            self._commands,
+            start,
+            target,
+            duration,
+            power_on=power_on,
+            off_brightness=off_brightness,
+            color_engine=self.coordinator.color_engine,
+        )
+        self._transition_task = self.coordinator.config_entry.async_create_background_task(
+            self.hass,
+            self._async_run_transition(self._transition, self._command_sequence),
+            name=f"{self.name} transition",
+        )
+
+    async def _async_run_transition(self, transition: KiLightTransition, sequence: int) -> None:
+        try:
+            await transition.async_run()
+        except Exception as err:  # noqa: BLE001 Nothing is waiting on the transition
+            _LOGGER.warning("%s transition failed: %s", self.name, err)
+            self._async_reconcile(sequence, failed=True)
+            return
+        self._async_reconcile(sequence)
+
+    def _cancel_transition(self) -> int | None:
+        """
+        Stop any running transition.
+
+        :return: Brightness to restore if a fade-out was cut short, see
+            KiLightTransition.interrupted_fade_out_brightness
+        """
+        restore_brightness = None
+        if self._transition_task is not None and not self._transition_task.done():
+            self._transition_task.cancel()
+            if self._transition is not None:
+                restore_brightness = self._transition.interrupted_fade_out_brightness
+        self._transition_task = None
+        self._transition = None
+        return restore_brightness
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the output fields this light shows, the color mode last requested and engine."""
+        output_state = self.displayed_output_state
+        if output_state is None:
+            return self._attr_color_mode, None
+
+        return (
+            self._attr_color_mode,
+            self.coordinator.color_engine,
+            output_state.power_on,
+            output_state.brightness,
+            output_state.rgbcw,
+        )
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values."""
+        output_state = self.displayed_output_state
         if output_state is None:
             return
 
-        self._attr_brightness = output_state.brightness
-        self._attr_rgbww_color = output_state.rgbcw
-        self._attr_color_temp_kelvin = output_state.color_temp
+        color_engine = self.coordinator.color_engine
+        rgbcw = output_state.rgbcw
+        self._attr_brightness = color_engine.ha_brightness(output_state.brightness)
+        self._attr_rgbww_color = rgbcw
+        self._attr_color_temp_kelvin = color_engine.rgbcw_to_color_temp(rgbcw)
+        # Only the color of the current mode is shown, so the others aren't converted
+        if self._attr_color_mode == ColorMode.HS:
+            self._attr_hs_color = color_RGB_to_hs(*rgbcw[:3])
+        elif self._attr_color_mode == ColorMode.XY:
+            self._attr_xy_color = color_RGB_to_xy(*rgbcw[:3])
         self._attr_is_on = output_state.power_on
         _LOGGER.debug(
             "%s Output %s updated values - "
@@ -149,3 +388,19 @@ class KiLightOutputLightEntity(KiLightOutputBaseEntity, LightEntity):
             self._attr_color_temp_kelvin,
             self._attr_is_on,
         )
+
+    @staticmethod
+    def _infer_color_mode(output_state: OutputState | None) -> ColorMode:
+        """
+        Guess the color mode of an output from its channel levels, before it was commanded.
+
+        :param OutputState | None output_state: Reported state of the output
+        """
+        if output_state is None:
+            return ColorMode.RGBWW
+        red, green, blue, cold_white, warm_white = output_state.rgbcw
+        if not red and not green and not blue and (cold_white or warm_white):
+            return ColorMode.COLOR_TEMP
+        if (red or green or blue) and not cold_white and not warm_white:
+            return ColorMode.HS
+        return ColorMode.RGBWW
@@ -0,0 +1,197 @@
+"""Instrumentation of the KiLight integration hot paths."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from math import ceil
+from typing import TYPE_CHECKING, Any, Final
+
+from kilight.client.exceptions import NetworkTimeoutError
+
+from .const import METRICS_WINDOW_SAMPLES
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Upper bounds of the latency histogram buckets, in seconds. Each bucket is 10% wider than
+# the one before it, from 1 millisecond to about 2 minutes, so a percentile read from the
+# histogram is never more than 10% above the actual one.
+_BUCKET_BOUNDS: Final[tuple[float, ...]] = tuple(0.001 * 1.1**index for index in range(123))
+
+# Percentiles kept by the latency histograms
+_PERCENTILES: Final[tuple[int, ...]] = (50, 95, 99)
+
+
+def is_timeout(err: BaseException) -> bool:
+    """Whether an error means the device didn't answer in time."""
+    return isinstance(err, TimeoutError | NetworkTimeoutError)
+
+
+class LatencyHistogram:
+    """
+    Histogram of the durations of an operation, over its most recent samples.
+
+    Recording a sample is a binary search, a few counter updates and one pass over the
+    buckets to update the percentiles, so it can stay on in production. Percentiles cover
+    the last METRICS_WINDOW_SAMPLES samples only, so they follow a device that gets slower
+    instead of being drowned out by its history.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW_SAMPLES) -> None:
+        """
+        Initialize the histogram.
+
+        :param int window: Number of most recent samples the percentiles cover
+        """
+        self._counts: list[int] = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self._window: deque[int] = deque(maxlen=window)
+        self._total_count: int = 0
+        self._max: float = 0.0
+        self._percentiles: tuple[float | None, float | None, float | None] = (None, None, None)
+
+    @property
+    def count(self) -> int:
+        """Number of samples recorded since startup."""
+        return self._total_count
+
+    @property
+    def max(self) -> float:
+        """Longest duration recorded since startup, in seconds."""
+        return self._max
+
+    def record(self, seconds: float) -> bool:
+        """
+        Add a sample.
+
+        :param float seconds: How long the operation took
+        :return: Whether any of the percentiles changed
+        """
+        bucket = bisect_left(_BUCKET_BOUNDS, seconds)
+        if len(self._window) == self._window.maxlen:
+            self._counts[self._window[0]] -= 1
+        self._window.append(bucket)
+        self._counts[bucket] += 1
+        self._total_count += 1
+        self._max = max(self._max, seconds)
+
+        percentiles = self._compute_percentiles()
+        if percentiles == self._percentiles:
+            return False
+        self._percentiles = percentiles
+        return True
+
+    def percentiles(self) -> tuple[float | None, float | None, float | None]:
+        """
+        Get the 50th, 95th and 99th percentiles of the recent samples.
+
+        Each percentile is the upper bound of the bucket it falls in, in seconds, or None if
+        nothing was recorded yet.
+        """
+        return self._percentiles
+
+    def _compute_percentiles(self) -> tuple[float | None, float | None, float | None]:
+        """Find the buckets of the percentiles in a single pass over the histogram."""
+        ranks = [max(ceil(percent / 100 * len(self._window)), 1) for percent in _PERCENTILES]
+        found: list[float | None] = []
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            while len(found) < len(ranks) and seen >= ranks[len(found)]:
+                found.append(_BUCKET_BOUNDS[bucket] if bucket < len(_BUCKET_BOUNDS) else self._max)
+            if len(found) == len(ranks):
+                break
+        return found[0], found[1], found[2]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get a summary of the histogram, for diagnostics."""
+        p50, p95, p99 = self.percentiles()
+        return {"count": self._total_count, "p50": p50, "p95": p95, "p99": p99, "max": self._max}
+
+
+class KiLightDeviceMetrics:
+    """
+    Performance and error counters of one KiLight.
+
+    Each value has the name of a coordinator field of the state dispatcher, which the
+    change callback is invoked with whenever the value changes. For the latency histograms
+    that is whenever one of their percentiles changes.
+    """
+
+    def __init__(self, change_callback: Callable[[str], None]) -> None:
+        """
+        Initialize the metrics.
+
+        :param Callable[[str], None] change_callback: Called with the name of a value that
+            changed
+        """
+        self._change_callback: Callable[[str], None] = change_callback
+        self.update_latency: LatencyHistogram = LatencyHistogram()
+        self.command_latency: LatencyHistogram = LatencyHistogram()
+        self.fan_out_time: LatencyHistogram = LatencyHistogram()
+        self.poll_lateness: LatencyHistogram = LatencyHistogram()
+        self.timeouts: int = 0
+        self.reconnects: int = 0
+
+    def record_update_latency(self, seconds: float) -> None:
+        """
+        Add the round-trip time of a state read.
+
+        :param float seconds: How long the read took
+        """
+        if self.update_latency.record(seconds):
+            self._change_callback("update_latency")
+
+    def record_command_latency(self, seconds: float) -> None:
+        """
+        Add the time it took to write a command and read the state back.
+
+        :param float seconds: How long the write took
+        """
+        if self.command_latency.record(seconds):
+            self._change_callback("command_latency")
+
+    def record_fan_out_time(self, seconds: float) -> None:
+        """
+        Add the time it took to hand a new state to the entities that depend on it.
+
+        :param float seconds: How long the callbacks took
+        """
+        if self.fan_out_time.record(seconds):
+            self._change_callback("fan_out_time")
+
+    def record_poll_lateness(self, seconds: float) -> None:
+        """
+        Add how long after the requested time a poll was started by the fleet scheduler.
+
+        :param float seconds: How late the poll started
+        """
+        if self.poll_lateness.record(seconds):
+            self._change_callback("poll_lateness")
+
+    def record_timeout(self) -> None:
+        """Count a read or write the device didn't answer in time."""
+        self.timeouts += 1
+        self._change_callback("timeouts")
+
+    def record_connections(self, connections: int) -> None:
+        """
+        Update the reconnect counter from the number of connections made to the device.
+
+        :param int connections: Number of connections opened to the device so far
+        """
+        reconnects = max(connections - 1, 0)
+        if reconnects != self.reconnects:
+            self.reconnects = reconnects
+            self._change_callback("reconnects")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get all metrics, for diagnostics."""
+        return {
+            "update_latency": self.update_latency.as_dict(),
+            "command_latency": self.command_latency.as_dict(),
+            "fan_out_time": self.fan_out_time.as_dict(),
+            "poll_lateness": self.poll_lateness.as_dict(),
+            "timeouts": self.timeouts,
+            "reconnects": self.reconnects,
+        }
@@ -8,7 +8,9 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from kilight.client import Device
 
+    from .capture import KiLightTelemetryCapture
     from .coordinator import KiLightCoordinator
+    from .presets import KiLightPresetStore
 
 
 @dataclass
@@ -18,3 +20,5 @@ class KiLightDeviceData:
     title: str
     device: Device
     coordinator: KiLightCoordinator
+    presets: KiLightPresetStore
+    capture: KiLightTelemetryCapture
@@ -0,0 +1,194 @@
+"""Named output presets of KiLight devices, recalled with a single precomputed write."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import struct
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+from kilight.client import OutputIdentifier, OutputState
+from kilight.protocol import Request
+
+from .const import DOMAIN, PRESET_STORE_VERSION
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def pack_output_writes(outputs: tuple[tuple[OutputIdentifier, OutputState], ...]) -> bytes:
+    """
+    Serialize output writes the way the connector sends them, back to back.
+
+    Every write is a protobuf Request prefixed with its length as a single byte, so the
+    whole payload can be sent to the device in one go and answered one write at a time.
+
+    :param tuple[tuple[OutputIdentifier, OutputState], ...] outputs: Output states to write
+    :return: The serialized requests
+    """
+    payload = bytearray()
+    for output, output_state in outputs:
+        request = Request(writeOutput=output_state.to_protocol(output))
+        payload += struct.pack("<B", request.ByteSize())
+        payload += request.SerializeToString()
+    return bytes(payload)
+
+
+def preset_updates(output_state: OutputState) -> dict[str, Any]:
+    """
+    Get the output updates that set every setting of an output to those of a preset.
+
+    :param OutputState output_state: The output state stored in the preset
+    :return: Keyword arguments for Device.update_output_from_parts
+    """
+    return {
+        "power_on": output_state.power_on,
+        "rgbcw_color": output_state.rgbcw,
+        "brightness": output_state.brightness,
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class KiLightPreset:
+    """A named set of output states, with the writes that apply them serialized up front."""
+
+    preset_id: str
+    name: str
+    outputs: tuple[tuple[OutputIdentifier, OutputState], ...]
+    payload: bytes = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Serialize the writes of the preset."""
+        object.__setattr__(self, "payload", pack_output_writes(self.outputs))
+
+
+def _preset_to_dict(preset: KiLightPreset) -> dict[str, Any]:
+    return {
+        "name": preset.name,
+        "outputs": {
+            OutputIdentifier.Name(output): {
+                "power_on": output_state.power_on,
+                "red": output_state.red,
+                "green": output_state.green,
+                "blue": output_state.blue,
+                "cold_white": output_state.cold_white,
+                "warm_white": output_state.warm_white,
+                "brightness": output_state.brightness,
+            }
+            for output, output_state in preset.outputs
+        },
+    }
+
+
+def _preset_from_dict(preset_id: str, data: dict[str, Any]) -> KiLightPreset:
+    return KiLightPreset(
+        preset_id,
+        data["name"],
+        tuple(
+            (OutputIdentifier.Value(output_name), OutputState(**settings))
+            for output_name, settings in data["outputs"].items()
+        ),
+    )
+
+
+class KiLightPresetStore:
+    """
+    Presets of one KiLight device, kept in Home Assistant storage.
+
+    The firmware can't store presets itself, so they are kept here, keyed by the hardware
+    ID of the device like its state cache. Each preset holds the full settings of the
+    outputs it covers, and the writes applying them are serialized once, when the preset is
+    loaded or saved, instead of every time it is recalled.
+    """
+
+    def __init__(self, hass: HomeAssistant, hardware_id: str) -> None:
+        """
+        Initialize the preset store.
+
+        :param HomeAssistant hass: Home Assistant instance
+        :param str hardware_id: Hardware ID of the device
+        """
+        self._store: Store[dict[str, Any]] = Store(
+            hass, PRESET_STORE_VERSION, f"{DOMAIN}.{hardware_id}.presets"
+        )
+        self._presets: dict[str, KiLightPreset] = {}
+        self._callbacks: list[Callable[[str, KiLightPreset | None], None]] = []
+
+    @property
+    def presets(self) -> Mapping[str, KiLightPreset]:
+        """The presets of the device, by preset ID."""
+        return self._presets
+
+    def register_callback(
+        self, preset_callback: Callable[[str, KiLightPreset | None], None]
+    ) -> Callable[[], None]:
+        """
+        Register a callback for saved and deleted presets.
+
+        :param Callable[[str, KiLightPreset | None], None] preset_callback: Called with the
+            ID of a preset and the preset once saved, or None once deleted
+        :return: Callable that unregisters the callback
+        """
+        self._callbacks.append(preset_callback)
+        return lambda: self._callbacks.remove(preset_callback)
+
+    async def async_load(self) -> None:
+        """Load the stored presets, skipping any that can't be read."""
+        data = await self._store.async_load() or {}
+        for preset_id, preset_data in data.get("presets", {}).items():
+            try:
+                self._presets[preset_id] = _preset_from_dict(preset_id, preset_data)
+            except (KeyError, TypeError, ValueError):
+                _LOGGER.debug("Ignoring unreadable preset %s: %s", preset_id, preset_data)
+
+    async def async_save_preset(
+        self, name: str, outputs: tuple[tuple[OutputIdentifier, OutputState], ...]
+    ) -> KiLightPreset:
+        """
+        Save a preset, replacing any with the same ID.
+
+        :param str name: Name of the preset, its ID is derived from it
+        :param tuple[tuple[OutputIdentifier, OutputState], ...] outputs: Output states to
+            store in the preset
+        :return: The saved preset
+        """
+        preset = KiLightPreset(slugify(name), name, outputs)
+        self._presets[preset.preset_id] = preset
+        await self._async_save()
+        self._fire_callbacks(preset.preset_id, preset)
+        return preset
+
+    async def async_delete_preset(self, preset_id: str) -> None:
+        """
+        Delete a preset.
+
+        :param str preset_id: ID of the preset
+        """
+        if self._presets.pop(preset_id, None) is None:
+            return
+        await self._async_save()
+        self._fire_callbacks(preset_id, None)
+
+    async def async_remove(self) -> None:
+        """Remove the stored presets from storage."""
+        await self._store.async_remove()
+
+    async def _async_save(self) -> None:
+        await self._store.async_save(
+            {
+                "presets": {
+                    preset_id: _preset_to_dict(preset)
+                    for preset_id, preset in self._presets.items()
+                }
+            }
+        )
+
+    def _fire_callbacks(self, preset_id: str, preset: KiLightPreset | None) -> None:
+        for preset_callback in list(self._callbacks):
+            preset_callback(preset_id, preset)
@@ -0,0 +1,131 @@
+"""KiLight integration, scene platform."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Final
+
+from homeassistant.components.scene import Scene
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_platform, entity_registry as er
+
+from .const import DEVICE_TIMEOUT_SECONDS, DOMAIN
+from .entity import KiLightBaseEntity
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+    from kilight.client import Device
+
+    from .coordinator import KiLightCoordinator
+    from .models import KiLightDeviceData
+    from .presets import KiLightPreset, KiLightPresetStore
+
+SERVICE_DELETE_PRESET: Final[str] = "delete_preset"
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up a scene for every preset of the device, including presets saved later."""
+    data: KiLightDeviceData = hass.data[DOMAIN][entry.entry_id]
+    scenes: dict[str, KiLightPresetSceneEntity] = {}
+
+    @callback
+    def _async_add_scenes(*presets: KiLightPreset) -> None:
+        new_scenes = [
+            KiLightPresetSceneEntity(
+                data.coordinator, data.device, data.presets, preset, entry.title
+            )
+            for preset in presets
+        ]
+        scenes.update((scene.preset.preset_id, scene) for scene in new_scenes)
+        async_add_entities(new_scenes)
+
+    @callback
+    def _async_preset_changed(preset_id: str, preset: KiLightPreset | None) -> None:
+        if preset is None:
+            if (scene := scenes.pop(preset_id, None)) is not None and scene.entity_id:
+                er.async_get(hass).async_remove(scene.entity_id)
+        elif (scene := scenes.get(preset_id)) is not None:
+            scene.preset = preset
+        else:
+            _async_add_scenes(preset)
+
+    _async_add_scenes(*data.presets.presets.values())
+    entry.async_on_unload(data.presets.register_callback(_async_preset_changed))
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(SERVICE_DELETE_PRESET, None, "async_delete_preset")
+
+
+class KiLightPresetSceneEntity(KiLightBaseEntity, Scene):
+    """
+    A preset of a KiLight, applied to its outputs when the scene is activated.
+
+    Activating the scene sends the precomputed writes of the preset, every output it covers
+    in a single write, unless other commands to the device are issued at the same time.
+    """
+
+    def __init__(
+        self,
+        coordinator: KiLightCoordinator,
+        device: Device,
+        presets: KiLightPresetStore,
+        preset: KiLightPreset,
+        name: str,
+    ) -> None:
+        """
+        Initialize the preset scene entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param KiLightPresetStore presets: Presets of the device, to delete this one from
+        :param KiLightPreset preset: The preset this scene applies
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._presets: KiLightPresetStore = presets
+        self._preset: KiLightPreset = preset
+        self._attr_unique_id = f"{self._attr_unique_id}_preset_{preset.preset_id}"
+        self._attr_name = preset.name
+
+    @property
+    def preset(self) -> KiLightPreset:
+        """The preset this scene applies."""
+        return self._preset
+
+    @preset.setter
+    def preset(self, preset: KiLightPreset) -> None:
+        """Replace the preset with a newer version saved under the same ID."""
+        self._preset = preset
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Scenes show no device state."""
+        return ()
+
+    async def async_activate(self, **_: Any) -> None:
+        """Apply the preset to the device."""
+        _LOGGER.debug("%s: Recalling preset %s", self.device.name, self._preset.name)
+        async with asyncio.timeout(DEVICE_TIMEOUT_SECONDS):
+            await self.coordinator.commander.async_recall(self._preset)
+
+    async def async_delete_preset(self) -> None:
+        """Delete the preset, which removes this scene."""
+        await self._presets.async_delete_preset(self._preset.preset_id)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        return None
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Nothing to update, the scene only tracks when it was last activated."""
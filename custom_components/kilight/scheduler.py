@@ -0,0 +1,167 @@
+"""Adaptive poll scheduling for the KiLight integration."""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from .commands import output_settings
+from .const import (
+    ACTIVE_WINDOW_SECONDS,
+    POLL_BACKOFF_FACTOR,
+    THERMAL_TREND_THRESHOLD_CELSIUS,
+    UPDATE_EVERY_SECONDS,
+)
+
+if TYPE_CHECKING:
+    from kilight.client import DeviceState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _hottest_temperature(state: DeviceState) -> float | None:
+    """Get the highest temperature currently reported by any sensor of the device."""
+    temperature_states = (
+        state.driver_temperature,
+        state.power_supply_temperature,
+        state.output_a.temperature,
+        state.output_b.temperature if state.output_b is not None else None,
+    )
+    temperatures = [
+        temperature_state.celsius
+        for temperature_state in temperature_states
+        if temperature_state is not None and temperature_state.celsius is not None
+    ]
+    return max(temperatures, default=None)
+
+
+class AdaptivePollScheduler:
+    """
+    Decides how long to wait before polling a device again.
+
+    The device is polled at the minimum interval for a short window after any activity,
+    meaning a command or an output change detected by a poll. Outside that window the
+    interval backs off exponentially up to the maximum while the device is stable, and
+    tightens again while its temperatures or fan drive are rising. After a failed poll the
+    device is retried at the minimum interval, backing off exponentially while it stays
+    unreachable.
+    """
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        active_window: float = ACTIVE_WINDOW_SECONDS,
+        backoff_factor: float = POLL_BACKOFF_FACTOR,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        :param float min_interval: Shortest poll interval, in seconds
+        :param float max_interval: Longest poll interval, in seconds
+        :param float active_window: How long to poll at the minimum interval after activity
+        :param float backoff_factor: Factor the interval grows or shrinks by on each poll
+        """
+        self._min_interval: float = min_interval
+        self._max_interval: float = max(min_interval, max_interval)
+        self._active_window: float = active_window
+        self._backoff_factor: float = backoff_factor
+        self._interval: float = self._clamp(UPDATE_EVERY_SECONDS)
+        self._active_until: float = 0.0
+        self._last_state: DeviceState | None = None
+        self._failures: int = 0
+
+    @property
+    def interval(self) -> float:
+        """Seconds to wait before the next poll."""
+        return self._interval
+
+    @property
+    def min_interval(self) -> float:
+        """Shortest poll interval, in seconds."""
+        return self._min_interval
+
+    @property
+    def max_interval(self) -> float:
+        """Longest poll interval, in seconds."""
+        return self._max_interval
+
+    def is_active(self, now: float) -> bool:
+        """
+        Whether the device is within the active window of its last activity.
+
+        :param float now: Current monotonic time
+        """
+        return now < self._active_until
+
+    def update_bounds(self, min_interval: float, max_interval: float) -> None:
+        """
+        Change the interval bounds, keeping the state and active window seen so far.
+
+        :param float min_interval: Shortest poll interval, in seconds
+        :param float max_interval: Longest poll interval, in seconds
+        """
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._interval = self._clamp(self._interval)
+
+    def record_activity(self, now: float) -> None:
+        """
+        Poll at the minimum interval for the active window, starting now.
+
+        :param float now: Current monotonic time
+        """
+        self._active_until = now + self._active_window
+        self._interval = self._min_interval
+
+    def record_failure(self) -> None:
+        """Schedule a retry after a failed poll."""
+        self._interval = self._clamp(self._min_interval * self._backoff_factor**self._failures)
+        self._failures += 1
+
+    def record_state(self, state: DeviceState, now: float) -> None:
+        """
+        Adjust the interval based on a newly received device state.
+
+        :param DeviceState state: The latest state of the device
+        :param float now: Current monotonic time
+        """
+        last_state = self._last_state
+        self._last_state = state
+        self._failures = 0
+        if last_state is None:
+            return
+
+        if output_settings(state.output_a) != output_settings(
+            last_state.output_a
+        ) or output_settings(state.output_b) != output_settings(last_state.output_b):
+            self.record_activity(now)
+            return
+
+        if now < self._active_until:
+            return
+
+        if self._is_warming(last_state, state):
+            self._interval = self._clamp(self._interval / self._backoff_factor)
+        else:
+            self._interval = self._clamp(self._interval * self._backoff_factor)
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self._min_interval), self._max_interval)
+
+    @staticmethod
+    def _is_warming(last_state: DeviceState, state: DeviceState) -> bool:
+        """Whether the device temperatures or fan drive are trending upward."""
+        if (
+            state.fan_drive_percentage is not None
+            and last_state.fan_drive_percentage is not None
+            and state.fan_drive_percentage > last_state.fan_drive_percentage
+        ):
+            return True
+
+        temperature = _hottest_temperature(state)
+        last_temperature = _hottest_temperature(last_state)
+        if temperature is None or last_temperature is None:
+            return False
+
+        return temperature - last_temperature >= THERMAL_TREND_THRESHOLD_CELSIUS
@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+from abc import ABCMeta, abstractmethod
 import logging
-from typing import TYPE_CHECKING
+from operator import attrgetter
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Final
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
@@ -13,26 +17,55 @@ from homeassistant.components.sensor import (
 from homeassistant.const import (
     PERCENTAGE,
     REVOLUTIONS_PER_MINUTE,
+    EntityCategory,
     UnitOfElectricCurrent,
+    UnitOfEnergy,
+    UnitOfPower,
     UnitOfTemperature,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant, callback
 from kilight.client import Device, OutputIdentifier, OutputIdUtil
 
-from .const import DOMAIN
-from .entity import KiLightBaseEntity, KiLightOutputBaseEntity
-from .enum import TemperatureSensorLocation
-from .exceptions import UnknownTemperatureSensorError
+from .const import DOMAIN, ENERGY_DECIMALS
+from .entity import OUTPUT_FIELDS, KiLightBaseEntity, KiLightOutputBaseEntity
+from .enum import LatencyMetric, TelemetryKind, TemperatureSensorLocation
+from .exceptions import UnknownLatencyMetricError, UnknownTemperatureSensorError
+from .snapshot import snapshot_accessor
+from .telemetry import TelemetryFilter
 
 if TYPE_CHECKING:
+    from asyncio import TimerHandle
+    from collections.abc import Callable, Hashable
+
     from homeassistant.config_entries import ConfigEntry
     from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
     from .coordinator import KiLightCoordinator
+    from .energy import EnergyMeter
+    from .metrics import KiLightDeviceMetrics, LatencyHistogram
     from .models import KiLightDeviceData
+    from .snapshot import KiLightStateSnapshot
 
 _LOGGER = logging.getLogger(__name__)
 
+# Display name, device state field and field of that output if it is one, of the
+# temperature sensor at each location
+_TEMPERATURE_SENSORS: Final[dict[TemperatureSensorLocation, tuple[str, str, str | None]]] = {
+    TemperatureSensorLocation.Driver: ("Driver", "driver_temperature", None),
+    TemperatureSensorLocation.PowerSupply: ("Power Supply", "power_supply_temperature", None),
+    TemperatureSensorLocation.OutputA: ("Output A", "output_a", "temperature"),
+    TemperatureSensorLocation.OutputB: ("Output B", "output_b", "temperature"),
+}
+
+# Display name and coordinator value, also the histogram name, of each latency metric
+_LATENCY_METRICS: Final[dict[LatencyMetric, tuple[str, str]]] = {
+    LatencyMetric.Update: ("Poll Latency", "update_latency"),
+    LatencyMetric.Command: ("Command Latency", "command_latency"),
+    LatencyMetric.FanOut: ("State Fan-out Time", "fan_out_time"),
+    LatencyMetric.PollLateness: ("Poll Lateness", "poll_lateness"),
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -61,8 +94,24 @@ async def async_setup_entry(
             TemperatureSensorLocation.PowerSupply,
             entry.title,
         ),
+        KiLightPowerEntity(data.coordinator, data.device, OutputIdentifier.OutputA, entry.title),
+        KiLightEnergyEntity(data.coordinator, data.device, OutputIdentifier.OutputA, entry.title),
+        KiLightPowerEntity(data.coordinator, data.device, None, entry.title),
+        KiLightEnergyEntity(data.coordinator, data.device, None, entry.title),
         KiLightFanSpeedEntity(data.coordinator, data.device, entry.title),
         KiLightFanDrivePercentageEntity(data.coordinator, data.device, entry.title),
+        KiLightUpdateIntervalEntity(data.coordinator, data.device, entry.title),
+        KiLightSkippedStateWritesEntity(data.coordinator, data.device, entry.title),
+        KiLightOptimisticMismatchesEntity(data.coordinator, data.device, entry.title),
+        KiLightThermalLimitEntity(data.coordinator, data.device, entry.title),
+        KiLightLatencyEntity(data.coordinator, data.device, LatencyMetric.Update, entry.title),
+        KiLightLatencyEntity(data.coordinator, data.device, LatencyMetric.Command, entry.title),
+        KiLightLatencyEntity(data.coordinator, data.device, LatencyMetric.FanOut, entry.title),
+        KiLightLatencyEntity(
+            data.coordinator, data.device, LatencyMetric.PollLateness, entry.title
+        ),
+        KiLightTimeoutsEntity(data.coordinator, data.device, entry.title),
+        KiLightReconnectsEntity(data.coordinator, data.device, entry.title),
     ]
 
     if data.device.state.output_b is not None:
@@ -79,11 +128,105 @@ async def async_setup_entry(
                 entry.title,
             )
         )
+        entities_to_add.append(
+            KiLightPowerEntity(data.coordinator, data.device, OutputIdentifier.OutputB, entry.title)
+        )
+        entities_to_add.append(
+            KiLightEnergyEntity(
+                data.coordinator, data.device, OutputIdentifier.OutputB, entry.title
+            )
+        )
 
     async_add_entities(entities_to_add)
 
 
-class KiLightOutputCurrentEntity(KiLightOutputBaseEntity, SensorEntity):
+class KiLightTelemetryEntity(KiLightBaseEntity, SensorEntity, metaclass=ABCMeta):
+    """
+    Base class of sensors whose readings are downsampled before they are published.
+
+    Every reading goes through a TelemetryFilter, configured by the options of the kind of
+    reading, and the state is only written when the filter publishes a new value. A change
+    held back by the minimum interval between published states is published once it ends,
+    even when no further reading arrives.
+    """
+
+    _telemetry_kind: TelemetryKind
+
+    def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
+        """
+        Initialize the telemetry entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._telemetry: TelemetryFilter = TelemetryFilter()
+        self._publish_timer: TimerHandle | None = None
+
+    @callback
+    @abstractmethod
+    def _reading(self) -> float | None:
+        """
+        Get the current reading of the sensor, before it is downsampled.
+
+        Override this in derived classes.
+        """
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the state last published by the telemetry filter."""
+        return self._telemetry.published
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values."""
+        self._attr_native_value = self._telemetry.published
+
+    @callback
+    def _handle_coordinator_update(self, *_: Any) -> None:
+        """Hand the reading to the telemetry filter, writing the state if it publishes one."""
+        now = monotonic()
+        self._telemetry.add(self._reading(), now)
+        self._async_publish_when_due(now)
+        super()._handle_coordinator_update()
+
+    @callback
+    def _async_publish_when_due(self, now: float) -> None:
+        """Publish the filtered reading if it is due, or once the minimum interval ends."""
+        config = self.coordinator.get_telemetry_config(self._telemetry_kind)
+        if (delay := self._telemetry.due_in(now, config)) is None:
+            return
+        if delay == 0:
+            self._async_cancel_publish_timer()
+            self._telemetry.publish(now, config)
+        elif self._publish_timer is None:
+            self._publish_timer = self.hass.loop.call_later(delay, self._async_publish_timer_fired)
+
+    @callback
+    def _async_publish_timer_fired(self) -> None:
+        """Publish a change held back by the minimum interval."""
+        self._publish_timer = None
+        self._async_publish_when_due(monotonic())
+        super()._handle_coordinator_update()
+
+    @callback
+    def _async_cancel_publish_timer(self) -> None:
+        if self._publish_timer is not None:
+            self._publish_timer.cancel()
+            self._publish_timer = None
+
+    async def async_added_to_hass(self) -> None:
+        """Publish the first reading, and register callbacks."""
+        now = monotonic()
+        self._telemetry.add(self._reading(), now)
+        self._telemetry.publish(now, self.coordinator.get_telemetry_config(self._telemetry_kind))
+        self._async_update_attrs()
+        self.async_on_remove(self._async_cancel_publish_timer)
+        await super().async_added_to_hass()
+
+
+class KiLightOutputCurrentEntity(KiLightOutputBaseEntity, KiLightTelemetryEntity):
     """Representation of KiLight light driver output current sensor."""
 
     _attr_name: str | None = None
@@ -95,6 +238,8 @@ class KiLightOutputCurrentEntity(KiLightOutputBaseEntity, SensorEntity):
     _attr_suggested_display_precision = 3
     _attr_icon = "mdi:current-dc"
 
+    _telemetry_kind = TelemetryKind.Current
+
     def __init__(
         self,
         coordinator: KiLightCoordinator,
@@ -111,19 +256,158 @@ class KiLightOutputCurrentEntity(KiLightOutputBaseEntity, SensorEntity):
         :param str name: Name to pass through to the DeviceInfo instance
         """
         super().__init__(coordinator, device, output, name)
+        self._get_current: Callable[[KiLightStateSnapshot], Any] = snapshot_accessor(
+            self._output_field, "current"
+        )
         self._attr_unique_id = f"{self._attr_unique_id}_current"
         self._attr_name = f"Output {OutputIdUtil.letter(output)} Current"
         self._attr_translation_placeholders = {"output_id": OutputIdUtil.letter(output)}
+
+    @callback
+    def _reading(self) -> float | None:
+        """Get the output current this sensor reads."""
+        return self._get_current(self.snapshot)
+
+
+class KiLightPowerEntity(KiLightTelemetryEntity):
+    """
+    Sensor estimating the power drawn by an output of a KiLight, or by all of its outputs.
+
+    The power is the output current at the supply voltage set in the options.
+    """
+
+    _attr_name: str | None = None
+
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfPower.WATT
+    _attr_suggested_display_precision = 1
+    _attr_icon = "mdi:flash"
+
+    _telemetry_kind = TelemetryKind.Power
+
+    def __init__(
+        self,
+        coordinator: KiLightCoordinator,
+        device: Device,
+        output: OutputIdentifier | None,
+        name: str,
+    ) -> None:
+        """
+        Initialize the power entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param OutputIdentifier | None output: Which output this estimates the power of, None
+            for all outputs of the device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        output_fields = (
+            tuple(OUTPUT_FIELDS.values()) if output is None else (OUTPUT_FIELDS[output],)
+        )
+        self._state_fields: tuple[str, ...] = (*output_fields, "supply_voltage")
+        self._get_currents: tuple[Callable[[KiLightStateSnapshot], Any], ...] = tuple(
+            snapshot_accessor(output_field, "current") for output_field in output_fields
+        )
+        if output is None:
+            self._attr_unique_id = f"{self._attr_unique_id}_power"
+            self._attr_translation_key = "power"
+            self._attr_name = "Power"
+        else:
+            self._attr_unique_id = f"{self._attr_unique_id}_{OutputIdentifier.Name(output)}_power"
+            self._attr_translation_key = "output_power"
+            self._attr_name = f"Output {OutputIdUtil.letter(output)} Power"
+            self._attr_translation_placeholders = {"output_id": OutputIdUtil.letter(output)}
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the device state fields and coordinator values this entity depends on."""
+        return self._state_fields
+
+    @callback
+    def _reading(self) -> float | None:
+        """Get the power of the output currents at the supply voltage."""
+        currents = [
+            current
+            for get_current in self._get_currents
+            if (current := get_current(self.snapshot)) is not None
+        ]
+        if not currents:
+            return None
+        return sum(currents) * self.coordinator.supply_voltage
+
+
+class KiLightEnergyEntity(KiLightBaseEntity, RestoreSensor):
+    """
+    Sensor totalling the energy drawn by an output of a KiLight, or by all of its outputs.
+
+    The energy is accumulated by the energy meters of the coordinator, from every state the
+    device reports. The total is restored after a restart, and written once per watt-hour.
+    """
+
+    _attr_name: str | None = None
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_suggested_display_precision = ENERGY_DECIMALS
+
+    def __init__(
+        self,
+        coordinator: KiLightCoordinator,
+        device: Device,
+        output: OutputIdentifier | None,
+        name: str,
+    ) -> None:
+        """
+        Initialize the energy entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param OutputIdentifier | None output: Which output this totals the energy of, None
+            for all outputs of the device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._meter: EnergyMeter = coordinator.get_energy_meter(output)
+        if output is None:
+            self._attr_unique_id = f"{self._attr_unique_id}_energy"
+            self._attr_translation_key = "energy"
+            self._attr_name = "Energy"
+        else:
+            self._attr_unique_id = f"{self._attr_unique_id}_{OutputIdentifier.Name(output)}_energy"
+            self._attr_translation_key = "output_energy"
+            self._attr_name = f"Output {OutputIdUtil.letter(output)} Energy"
+            self._attr_translation_placeholders = {"output_id": OutputIdUtil.letter(output)}
         self._async_update_attrs()
 
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return ("energy",)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the energy this sensor publishes, rounded to a watt-hour."""
+        return round(self._meter.energy, ENERGY_DECIMALS)
+
     @callback
     def _async_update_attrs(self) -> None:
         """Handle updating _attr values."""
-        if self.output_state is not None:
-            self._attr_native_value = self.output_state.current
+        self._attr_native_value = round(self._meter.energy, ENERGY_DECIMALS)
+
+    async def async_added_to_hass(self) -> None:
+        """Add back the energy accumulated before a restart, and register callbacks."""
+        if (
+            last_sensor_data := await self.async_get_last_sensor_data()
+        ) is not None and last_sensor_data.native_value is not None:
+            self._meter.restore(float(last_sensor_data.native_value))
+        self._async_update_attrs()
+        await super().async_added_to_hass()
 
 
-class KiLightTemperatureEntity(KiLightBaseEntity, SensorEntity):
+class KiLightTemperatureEntity(KiLightTelemetryEntity):
     """Representation of a temperature sensor on a KiLight."""
 
     _attr_name: str | None = None
@@ -134,6 +418,8 @@ class KiLightTemperatureEntity(KiLightBaseEntity, SensorEntity):
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
     _attr_suggested_display_precision = 2
 
+    _telemetry_kind = TelemetryKind.Temperature
+
     def __init__(
         self,
         coordinator: KiLightCoordinator,
@@ -150,54 +436,45 @@ class KiLightTemperatureEntity(KiLightBaseEntity, SensorEntity):
         :param str name: Name to pass through to the DeviceInfo instance
         """
         super().__init__(coordinator, device, name)
+        if (sensor := _TEMPERATURE_SENSORS.get(temperature_sensor)) is None:
+            raise UnknownTemperatureSensorError(temperature_sensor)
         self._temperature_sensor = temperature_sensor
+        self._display_name: str
+        state_field: str
+        output_field: str | None
+        self._display_name, state_field, output_field = sensor
+        self._state_fields: tuple[str, ...] = (state_field,)
+        self._get_temperature: Callable[[KiLightStateSnapshot], Any] = snapshot_accessor(
+            state_field, output_field
+        )
         self._attr_unique_id = f"{self._attr_unique_id}_{temperature_sensor.name}_temperature"
         self._attr_name = f"{self.temperature_sensor_display_name} Temperature"
         self._attr_translation_placeholders = {
             "sensor_location_name": self.temperature_sensor_display_name
         }
-        self._async_update_attrs()
 
     @property
     def temperature_sensor_display_name(self) -> str:
         """User-friendly display name of this temperature sensor."""
-        if self._temperature_sensor == TemperatureSensorLocation.Driver:
-            return "Driver"
-
-        if self._temperature_sensor == TemperatureSensorLocation.PowerSupply:
-            return "Power Supply"
+        return self._display_name
 
-        if self._temperature_sensor == TemperatureSensorLocation.OutputA:
-            return "Output A"
-
-        if self._temperature_sensor == TemperatureSensorLocation.OutputB:
-            return "Output B"
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the device state fields this entity depends on."""
+        return self._state_fields
 
-        return self._temperature_sensor.name
+    @property
+    def temperature(self) -> float | None:
+        """Get the temperature of this sensor, in degrees Celsius."""
+        return self._get_temperature(self.snapshot)
 
     @callback
-    def _async_update_attrs(self) -> None:
-        """Handle updating _attr values."""
-        if self._temperature_sensor == TemperatureSensorLocation.Driver:
-            if self.device.state.driver_temperature is not None:
-                self._attr_native_value = self.device.state.driver_temperature.celsius
-        elif self._temperature_sensor == TemperatureSensorLocation.PowerSupply:
-            if self.device.state.power_supply_temperature is not None:
-                self._attr_native_value = self.device.state.power_supply_temperature.celsius
-        elif self._temperature_sensor == TemperatureSensorLocation.OutputA:
-            if self.device.state.output_a.temperature is not None:
-                self._attr_native_value = self.device.state.output_a.temperature.celsius
-        elif self._temperature_sensor == TemperatureSensorLocation.OutputB:
-            if (
-                self.device.state.output_b is not None
-                and self.device.state.output_b.temperature is not None
-            ):
-                self._attr_native_value = self.device.state.output_b.temperature.celsius
-        else:
-            raise UnknownTemperatureSensorError(self._temperature_sensor)
+    def _reading(self) -> float | None:
+        """Get the temperature this sensor reads."""
+        return self.temperature
 
 
-class KiLightFanSpeedEntity(KiLightBaseEntity, SensorEntity):
+class KiLightFanSpeedEntity(KiLightTelemetryEntity):
     """Representation of KiLight internal fan speed in RPM."""
 
     _attr_name: str | None = None
@@ -208,6 +485,8 @@ class KiLightFanSpeedEntity(KiLightBaseEntity, SensorEntity):
     _attr_suggested_display_precision = 0
     _attr_icon = "mdi:fan"
 
+    _telemetry_kind = TelemetryKind.FanSpeed
+
     def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
         """
         Initialize the Fan Speed entity.
@@ -219,15 +498,19 @@ class KiLightFanSpeedEntity(KiLightBaseEntity, SensorEntity):
         super().__init__(coordinator, device, name)
         self._attr_unique_id = f"{self._attr_unique_id}_fan_speed"
         self._attr_name = "Fan Speed"
-        self._async_update_attrs()
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the device state fields this entity depends on."""
+        return ("fan_speed",)
 
     @callback
-    def _async_update_attrs(self) -> None:
-        """Handle updating _attr values."""
-        self._attr_native_value = self.device.state.fan_speed
+    def _reading(self) -> float | None:
+        """Get the fan speed this sensor reads."""
+        return self.snapshot.fan_speed
 
 
-class KiLightFanDrivePercentageEntity(KiLightBaseEntity, SensorEntity):
+class KiLightFanDrivePercentageEntity(KiLightTelemetryEntity):
     """Representation of KiLight internal fan drive percentage."""
 
     _attr_name: str | None = None
@@ -238,6 +521,8 @@ class KiLightFanDrivePercentageEntity(KiLightBaseEntity, SensorEntity):
     _attr_suggested_display_precision = 1
     _attr_icon = "mdi:fan"
 
+    _telemetry_kind = TelemetryKind.FanDrive
+
     def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
         """
         Initialize the Fan Drive Percentage Entity.
@@ -249,9 +534,349 @@ class KiLightFanDrivePercentageEntity(KiLightBaseEntity, SensorEntity):
         super().__init__(coordinator, device, name)
         self._attr_unique_id = f"{self._attr_unique_id}_fan_drive_percentage"
         self._attr_name = "Fan Drive Level"
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the device state fields this entity depends on."""
+        return ("fan_drive_percentage",)
+
+    @callback
+    def _reading(self) -> float | None:
+        """Get the fan drive percentage this sensor reads."""
+        return self.snapshot.fan_drive_percentage
+
+
+class KiLightUpdateIntervalEntity(KiLightBaseEntity, SensorEntity):
+    """Diagnostic sensor showing the current adaptive poll interval of a KiLight."""
+
+    _attr_name: str | None = None
+    _attr_translation_key = "update_interval"
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_display_precision = 0
+    _attr_icon = "mdi:timer-sync-outline"
+
+    def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
+        """
+        Initialize the Poll Interval entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._attr_unique_id = f"{self._attr_unique_id}_update_interval"
+        self._attr_name = "Poll Interval"
         self._async_update_attrs()
 
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return ("poll_interval",)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the poll interval this sensor reads."""
+        return self.coordinator.poll_interval
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values."""
+        self._attr_native_value = self.coordinator.poll_interval.total_seconds()
+
+
+class KiLightSkippedStateWritesEntity(KiLightBaseEntity, SensorEntity):
+    """Diagnostic sensor counting the entity state writes skipped for a KiLight."""
+
+    _attr_name: str | None = None
+    _attr_translation_key = "skipped_state_writes"
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:counter"
+
+    def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
+        """
+        Initialize the Skipped State Writes entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._attr_unique_id = f"{self._attr_unique_id}_skipped_state_writes"
+        self._attr_name = "Skipped State Writes"
+        self._async_update_attrs()
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return ("skipped_state_writes",)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the counter this sensor reads."""
+        return self.coordinator.skipped_state_writes
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values."""
+        self._attr_native_value = self.coordinator.skipped_state_writes
+
+
+class KiLightOptimisticMismatchesEntity(KiLightBaseEntity, SensorEntity):
+    """Diagnostic sensor counting the optimistic light states of a KiLight rolled back."""
+
+    _attr_name: str | None = None
+    _attr_translation_key = "optimistic_mismatches"
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:backup-restore"
+
+    def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
+        """
+        Initialize the Optimistic State Mismatches entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._attr_unique_id = f"{self._attr_unique_id}_optimistic_mismatches"
+        self._attr_name = "Optimistic State Mismatches"
+        self._async_update_attrs()
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return ("optimistic_mismatches",)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the counter this sensor reads."""
+        return self.coordinator.optimistic_mismatches
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values."""
+        self._attr_native_value = self.coordinator.optimistic_mismatches
+
+
+class KiLightThermalLimitEntity(KiLightBaseEntity, SensorEntity):
+    """Diagnostic sensor showing how far thermal protection limits the brightness of a KiLight."""
+
+    _attr_name: str | None = None
+    _attr_translation_key = "thermal_limit"
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_suggested_display_precision = 0
+    _attr_icon = "mdi:thermometer-alert"
+
+    def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
+        """
+        Initialize the Thermal Brightness Limit entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._attr_unique_id = f"{self._attr_unique_id}_thermal_limit"
+        self._attr_name = "Thermal Brightness Limit"
+        self._async_update_attrs()
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return ("thermal_limit",)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the brightness limit this sensor reads."""
+        return self.coordinator.thermal_limit
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values, 100 % while the brightness isn't limited."""
+        limit = self.coordinator.thermal_limit
+        self._attr_native_value = 100.0 if limit is None else limit / 255 * 100
+
+
+class KiLightLatencyEntity(KiLightBaseEntity, SensorEntity):
+    """
+    Diagnostic sensor showing how long an operation on a KiLight recently took.
+
+    The state is the 95th percentile of the latency histogram, with the 50th and 99th
+    percentiles as attributes. The state is only written when one of them changes.
+    """
+
+    _attr_name: str | None = None
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 1
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(
+        self,
+        coordinator: KiLightCoordinator,
+        device: Device,
+        metric: LatencyMetric,
+        name: str,
+    ) -> None:
+        """
+        Initialize the latency entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param LatencyMetric metric: Which operation this shows the latency of
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        if (latency_metric := _LATENCY_METRICS.get(metric)) is None:
+            raise UnknownLatencyMetricError(metric)
+        self._metric: LatencyMetric = metric
+        self._display_name: str
+        metric_field: str
+        self._display_name, metric_field = latency_metric
+        self._state_fields: tuple[str, ...] = (metric_field,)
+        self._get_histogram: Callable[[KiLightDeviceMetrics], LatencyHistogram] = attrgetter(
+            metric_field
+        )
+        self._attr_unique_id = f"{self._attr_unique_id}_{metric_field}"
+        self._attr_translation_key = metric_field
+        self._attr_name = self.metric_display_name
+        self._async_update_attrs()
+
+    @property
+    def metric_display_name(self) -> str:
+        """User-friendly display name of the operation this sensor shows the latency of."""
+        return self._display_name
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return self._state_fields
+
+    @property
+    def histogram(self) -> LatencyHistogram:
+        """Get the latency histogram this sensor shows."""
+        return self._get_histogram(self.coordinator.metrics)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the percentiles this sensor shows."""
+        return self.histogram.percentiles()
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values."""
+        p50, p95, p99 = (
+            percentile * 1000 if percentile is not None else None
+            for percentile in self.histogram.percentiles()
+        )
+        self._attr_native_value = p95
+        self._attr_extra_state_attributes = {"p50": p50, "p99": p99}
+
+
+class KiLightTimeoutsEntity(KiLightBaseEntity, SensorEntity):
+    """Diagnostic sensor counting the reads and writes a KiLight didn't answer in time."""
+
+    _attr_name: str | None = None
+    _attr_translation_key = "timeouts"
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:timer-alert-outline"
+
+    def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
+        """
+        Initialize the Timeouts entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._attr_unique_id = f"{self._attr_unique_id}_timeouts"
+        self._attr_name = "Timeouts"
+        self._async_update_attrs()
+
+    @property
+    def available(self) -> bool:
+        """Stay available while the KiLight is unreachable, since that is when it counts."""
+        return True
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return ("timeouts",)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the counter this sensor reads."""
+        return self.coordinator.metrics.timeouts
+
+    @callback
+    def _async_update_attrs(self) -> None:
+        """Handle updating _attr values."""
+        self._attr_native_value = self.coordinator.metrics.timeouts
+
+
+class KiLightReconnectsEntity(KiLightBaseEntity, SensorEntity):
+    """Diagnostic sensor counting how often the connection to a KiLight was reopened."""
+
+    _attr_name: str | None = None
+    _attr_translation_key = "reconnects"
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:lan-connect"
+
+    def __init__(self, coordinator: KiLightCoordinator, device: Device, name: str) -> None:
+        """
+        Initialize the Reconnects entity.
+
+        :param KiLightCoordinator coordinator: KiLight coordinator
+        :param Device device: KiLight device
+        :param str name: Name to pass through to the DeviceInfo instance
+        """
+        super().__init__(coordinator, device, name)
+        self._attr_unique_id = f"{self._attr_unique_id}_reconnects"
+        self._attr_name = "Reconnects"
+        self._async_update_attrs()
+
+    @property
+    def available(self) -> bool:
+        """Stay available while the KiLight is unreachable, since that is when it counts."""
+        return True
+
+    @property
+    def state_fields(self) -> tuple[str, ...]:
+        """Names of the coordinator values this entity depends on."""
+        return ("reconnects",)
+
+    @callback
+    def _state_snapshot(self) -> Hashable:
+        """Get the counter this sensor reads."""
+        return self.coordinator.metrics.reconnects
+
     @callback
     def _async_update_attrs(self) -> None:
         """Handle updating _attr values."""
-        self._attr_native_value = self.device.state.fan_drive_percentage
+        self._attr_native_value = self.coordinator.metrics.reconnects
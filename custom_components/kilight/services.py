@@ -0,0 +1,285 @@
+"""Services of the KiLight integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Final
+
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_COLOR_TEMP_KELVIN,
+    ATTR_RGBWW_COLOR,
+    DATA_COMPONENT as LIGHT_DATA_COMPONENT,
+)
+from homeassistant.const import ATTR_DEVICE_ID, ATTR_NAME, ATTR_STATE
+from homeassistant.core import HomeAssistant, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from kilight.client import OutputIdentifier
+import voluptuous as vol
+
+from .const import (
+    CAPTURE_DEFAULT_DURATION_SECONDS,
+    CAPTURE_DEFAULT_RATE_HZ,
+    CAPTURE_MAX_DURATION_SECONDS,
+    CAPTURE_MAX_RATE_HZ,
+    DOMAIN,
+    SCENE_MAX_CONCURRENT_DEVICES,
+)
+from .enum import CaptureFormat
+from .exceptions import CaptureInProgressError
+from .light import KiLightOutputLightEntity
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from homeassistant.core import ServiceCall, ServiceResponse
+
+    from .coordinator import KiLightCoordinator
+    from .models import KiLightDeviceData
+
+SERVICE_APPLY_SCENE: Final[str] = "apply_scene"
+SERVICE_SAVE_PRESET: Final[str] = "save_preset"
+SERVICE_CAPTURE_TELEMETRY: Final[str] = "capture_telemetry"
+
+ATTR_ENTITIES: Final[str] = "entities"
+ATTR_RATE: Final[str] = "rate"
+ATTR_DURATION: Final[str] = "duration"
+ATTR_FORMAT: Final[str] = "format"
+
+_LOGGER = logging.getLogger(__name__)
+
+_LIGHT_STATE_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_STATE): cv.boolean,
+        vol.Optional(ATTR_BRIGHTNESS): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+        vol.Exclusive(ATTR_RGBWW_COLOR, "color"): vol.All(
+            vol.Coerce(tuple), vol.ExactSequence((cv.byte,) * 5)
+        ),
+        vol.Exclusive(ATTR_COLOR_TEMP_KELVIN, "color"): cv.positive_int,
+    }
+)
+
+APPLY_SCENE_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITIES): vol.Schema(
+            {
+                cv.entity_id: vol.Any(
+                    # Like scenes, a light may be given as just on or off
+                    vol.All(cv.boolean, lambda state: {ATTR_STATE: state}),
+                    _LIGHT_STATE_SCHEMA,
+                )
+            }
+        ),
+    }
+)
+
+SAVE_PRESET_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Required(ATTR_NAME): vol.All(cv.string, vol.Length(min=1)),
+    }
+)
+
+CAPTURE_TELEMETRY_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_RATE, default=CAPTURE_DEFAULT_RATE_HZ): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=CAPTURE_MAX_RATE_HZ)
+        ),
+        vol.Optional(ATTR_DURATION, default=CAPTURE_DEFAULT_DURATION_SECONDS): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=CAPTURE_MAX_DURATION_SECONDS)
+        ),
+        vol.Optional(ATTR_FORMAT): vol.Coerce(CaptureFormat),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+    semaphore = asyncio.Semaphore(SCENE_MAX_CONCURRENT_DEVICES)
+
+    async def _async_apply_scene(call: ServiceCall) -> ServiceResponse:
+        return await _async_handle_apply_scene(hass, semaphore, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_SCENE,
+        _async_apply_scene,
+        schema=APPLY_SCENE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_save_preset(call: ServiceCall) -> None:
+        await _async_handle_save_preset(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SAVE_PRESET, _async_save_preset, schema=SAVE_PRESET_SCHEMA
+    )
+
+    async def _async_capture_telemetry(call: ServiceCall) -> ServiceResponse:
+        return await _async_handle_capture_telemetry(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CAPTURE_TELEMETRY,
+        _async_capture_telemetry,
+        schema=CAPTURE_TELEMETRY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def _async_handle_apply_scene(
+    hass: HomeAssistant, semaphore: asyncio.Semaphore, call: ServiceCall
+) -> ServiceResponse:
+    """
+    Apply the given states to KiLight lights, writing to every device at the same time.
+
+    Lights are grouped by device. Every device is written to concurrently, at most
+    SCENE_MAX_CONCURRENT_DEVICES at once, and the outputs of one device are written in a
+    single batch, in the order the device received earlier commands. A device that fails
+    doesn't hold up or undo the others.
+    """
+    devices: dict[KiLightCoordinator, list[tuple[KiLightOutputLightEntity, Mapping[str, Any]]]]
+    devices = {}
+    for entity_id, state in call.data[ATTR_ENTITIES].items():
+        light = _get_light(hass, entity_id)
+        devices.setdefault(light.coordinator, []).append((light, state))
+
+    results = await asyncio.gather(
+        *(
+            _async_apply_to_device(semaphore, coordinator, lights)
+            for coordinator, lights in devices.items()
+        )
+    )
+
+    if call.return_response:
+        return {"devices": results}
+
+    if failed := [result["name"] for result in results if not result["success"]]:
+        error_msg = f"Unable to apply the scene to {', '.join(failed)}"
+        raise HomeAssistantError(error_msg)
+    return None
+
+
+async def _async_handle_save_preset(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Save the current settings of every output of a device as a preset."""
+    data = _get_device_data(hass, call.data[ATTR_DEVICE_ID])
+    state = data.device.state
+    outputs = ((OutputIdentifier.OutputA, state.output_a),)
+    if state.output_b is not None:
+        outputs += ((OutputIdentifier.OutputB, state.output_b),)
+    await data.presets.async_save_preset(call.data[ATTR_NAME], outputs)
+
+
+async def _async_handle_capture_telemetry(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """
+    Capture the sensor readings of a device at a high rate, and export them if asked to.
+
+    The call returns once the capture is done. The capture is kept for the diagnostics of
+    the device until the next one, whether it was exported or not.
+    """
+    data = _get_device_data(hass, call.data[ATTR_DEVICE_ID])
+    try:
+        await data.capture.async_capture(call.data[ATTR_RATE], call.data[ATTR_DURATION])
+    except CaptureInProgressError as err:
+        raise ServiceValidationError(str(err)) from err
+    except Exception as err:
+        error_msg = f"Telemetry capture of {data.title} failed: {err}"
+        raise HomeAssistantError(error_msg) from err
+
+    path = None
+    if (export_format := call.data.get(ATTR_FORMAT)) is not None:
+        path = await data.capture.async_export(export_format)
+
+    if not call.return_response:
+        return None
+    return {
+        "samples": len(data.capture.samples),
+        "missed": data.capture.missed,
+        "path": str(path) if path is not None else None,
+    }
+
+
+def _get_device_data(hass: HomeAssistant, device_id: str) -> KiLightDeviceData:
+    """Get the data of the set up KiLight with the given device ID, raising if there is none."""
+    if (device_entry := dr.async_get(hass).async_get(device_id)) is not None:
+        for entry_id in device_entry.config_entries:
+            if (data := hass.data.get(DOMAIN, {}).get(entry_id)) is not None:
+                return data
+    error_msg = f"{device_id} is not a set up KiLight device"
+    raise ServiceValidationError(error_msg)
+
+
+def _get_light(hass: HomeAssistant, entity_id: str) -> KiLightOutputLightEntity:
+    """Get the KiLight light entity with the given ID, raising if there is none."""
+    component = hass.data.get(LIGHT_DATA_COMPONENT)
+    light = component.get_entity(entity_id) if component is not None else None
+    if not isinstance(light, KiLightOutputLightEntity):
+        error_msg = f"{entity_id} is not a KiLight light"
+        raise ServiceValidationError(error_msg)
+    return light
+
+
+async def _async_apply_to_device(
+    semaphore: asyncio.Semaphore,
+    coordinator: KiLightCoordinator,
+    lights: list[tuple[KiLightOutputLightEntity, Mapping[str, Any]]],
+) -> dict[str, Any]:
+    """
+    Apply the states of the lights of one device.
+
+    :param asyncio.Semaphore semaphore: Bounds how many devices are written to at once
+    :param KiLightCoordinator coordinator: Coordinator of the device
+    :param list[tuple[KiLightOutputLightEntity, Mapping[str, Any]]] lights: Lights of the
+        device with the state to apply to each
+    :return: Result of the device for the service response
+    """
+    result: dict[str, Any] = {
+        "name": coordinator.config_entry.title,
+        "entities": [light.entity_id for light, _ in lights],
+        "success": False,
+        "latency": None,
+        "error": None,
+    }
+
+    if not coordinator.last_update_success:
+        # Don't wait on a device that is known to be unreachable
+        result["error"] = "Device is unavailable"
+        return result
+
+    async with semaphore:
+        start_time = monotonic()
+        # Issued in the same loop tick, so the commander writes both outputs in one batch
+        errors = [
+            error
+            for error in await asyncio.gather(
+                *(_async_apply_state(light, state) for light, state in lights),
+                return_exceptions=True,
+            )
+            if error is not None
+        ]
+        result["latency"] = monotonic() - start_time
+
+    if errors:
+        _LOGGER.warning("%s: Unable to apply scene: %s", coordinator.config_entry.title, errors[0])
+        result["error"] = str(errors[0]) or type(errors[0]).__name__
+    else:
+        result["success"] = True
+    return result
+
+
+async def _async_apply_state(light: KiLightOutputLightEntity, state: Mapping[str, Any]) -> None:
+    """Turn a light on with the given attributes, or off."""
+    if not state[ATTR_STATE]:
+        await light.async_turn_off()
+        return
+
+    await light.async_turn_on(
+        **{attribute: value for attribute, value in state.items() if attribute != ATTR_STATE}
+    )
@@ -0,0 +1,105 @@
+"""Compact snapshots of KiLight device states, and the accessors entities read them with."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from kilight.client import DeviceState, OutputState
+    from kilight.client.models import TemperatureState
+
+
+def _celsius(temperature: TemperatureState | None) -> float | None:
+    return temperature.celsius if temperature is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class KiLightOutputSnapshot:
+    """The values of one output that entities show."""
+
+    power_on: bool
+    brightness: int
+    rgbcw: tuple[int, int, int, int, int]
+    current: float
+    temperature: float | None
+
+    @classmethod
+    def from_output_state(cls, output_state: OutputState) -> KiLightOutputSnapshot:
+        """
+        Take the values entities show from the state of an output.
+
+        :param OutputState output_state: State of the output
+        """
+        return cls(
+            output_state.power_on,
+            output_state.brightness,
+            output_state.rgbcw,
+            output_state.current,
+            _celsius(output_state.temperature),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class KiLightStateSnapshot:
+    """
+    The values of a device state that entities show, taken once per state for every entity.
+
+    Unlike the device state of the client library, snapshots have no instance dictionary
+    and no nested temperature objects, so keeping one per device is cheap, and comparing
+    the values an entity shows against its last state write allocates nothing.
+    """
+
+    output_a: KiLightOutputSnapshot
+    output_b: KiLightOutputSnapshot | None
+    driver_temperature: float | None
+    power_supply_temperature: float | None
+    fan_speed: int | None
+    fan_drive_percentage: float | None
+
+    @classmethod
+    def from_state(cls, state: DeviceState) -> KiLightStateSnapshot:
+        """
+        Take the values entities show from a device state.
+
+        :param DeviceState state: State of the device
+        """
+        return cls(
+            KiLightOutputSnapshot.from_output_state(state.output_a),
+            (
+                KiLightOutputSnapshot.from_output_state(state.output_b)
+                if state.output_b is not None
+                else None
+            ),
+            _celsius(state.driver_temperature),
+            _celsius(state.power_supply_temperature),
+            state.fan_speed,
+            state.fan_drive_percentage,
+        )
+
+
+def snapshot_accessor(
+    state_field: str, output_field: str | None = None
+) -> Callable[[KiLightStateSnapshot], Any]:
+    """
+    Get a function reading one value of a snapshot, built once per entity.
+
+    :param str state_field: Name of the snapshot field
+    :param str | None output_field: Name of the output snapshot field to read, when the
+        snapshot field is an output. Reads None while the output is missing.
+    """
+    get_state_field = attrgetter(state_field)
+    if output_field is None:
+        return get_state_field
+
+    get_output_field = attrgetter(output_field)
+
+    def _get_output_field(snapshot: KiLightStateSnapshot) -> Any:
+        if (output := get_state_field(snapshot)) is None:
+            return None
+        return get_output_field(output)
+
+    return _get_output_field
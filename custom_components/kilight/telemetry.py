@@ -0,0 +1,129 @@
+"""Downsampling of the sensor readings of KiLights before they are published."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Final
+
+from .const import TELEMETRY_BUFFER_SAMPLES
+from .enum import TelemetryAggregate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+@dataclass(frozen=True, slots=True)
+class TelemetryConfig:
+    """How the readings of one kind of sensor are published."""
+
+    # Smallest change from the last published state that is published
+    deadband: float = 0.0
+    # Shortest time between two published states, in seconds
+    min_interval: float = 0.0
+    # Time the rolling aggregates cover, in seconds
+    window: float = 0.0
+    # Value of the readings within the window that is published
+    aggregate: TelemetryAggregate = TelemetryAggregate.Latest
+
+
+# Function computing each aggregate from the readings within the window
+_AGGREGATES: Final[dict[TelemetryAggregate, Callable[[list[float]], float]]] = {
+    TelemetryAggregate.Latest: lambda readings: readings[-1],
+    TelemetryAggregate.Mean: lambda readings: sum(readings) / len(readings),
+    TelemetryAggregate.Min: min,
+    TelemetryAggregate.Max: max,
+}
+
+
+class TelemetryFilter:
+    """
+    Decides which readings of a sensor are published.
+
+    Readings are kept in a small ring buffer, and the state published is an aggregate of
+    the ones within the window. It is only published once it moved more than the deadband
+    from the last published state, and no sooner than the minimum interval after it. A
+    change held back by the minimum interval is reported as due later, so it can still be
+    published when no further reading arrives.
+
+    Readings going missing or coming back are published right away, and a missing reading
+    clears the buffer, so the sensor never shows a value from before its readings went away.
+    """
+
+    __slots__ = ("_published", "_published_at", "_readings")
+
+    def __init__(self, samples: int = TELEMETRY_BUFFER_SAMPLES) -> None:
+        """
+        Initialize the filter.
+
+        :param int samples: Number of most recent readings kept for the aggregates
+        """
+        self._readings: deque[tuple[float, float]] = deque(maxlen=samples)
+        self._published: float | None = None
+        self._published_at: float | None = None
+
+    @property
+    def published(self) -> float | None:
+        """The last published state, None before the first one or while readings are missing."""
+        return self._published
+
+    def add(self, reading: float | None, now: float) -> None:
+        """
+        Record a reading.
+
+        :param float | None reading: The reading, None when the sensor has none
+        :param float now: Monotonic time of the reading
+        """
+        if reading is None:
+            self._readings.clear()
+        else:
+            self._readings.append((now, reading))
+
+    def aggregate(self, now: float, config: TelemetryConfig) -> float | None:
+        """
+        Get the aggregate of the readings within the window.
+
+        :param float now: Monotonic time the window ends at
+        :param TelemetryConfig config: How the readings are published
+        """
+        if not self._readings:
+            return None
+        return _AGGREGATES[config.aggregate](self._window_readings(now, config.window))
+
+    def due_in(self, now: float, config: TelemetryConfig) -> float | None:
+        """
+        Get how long until the aggregate should be published.
+
+        :param float now: Monotonic time to check at
+        :param TelemetryConfig config: How the readings are published
+        :return: 0 to publish now, the seconds the minimum interval holds the change back
+            for, or None when there is nothing to publish
+        """
+        if self._published_at is None:
+            return 0.0
+        value = self.aggregate(now, config)
+        if value == self._published:
+            return None
+        if value is None or self._published is None:
+            return 0.0
+        if abs(value - self._published) <= config.deadband:
+            return None
+        return max(self._published_at + config.min_interval - now, 0.0)
+
+    def publish(self, now: float, config: TelemetryConfig) -> float | None:
+        """
+        Publish the aggregate of the readings within the window.
+
+        :param float now: Monotonic time of publishing
+        :param TelemetryConfig config: How the readings are published
+        :return: The published state
+        """
+        self._published = self.aggregate(now, config)
+        self._published_at = now
+        return self._published
+
+    def _window_readings(self, now: float, window: float) -> list[float]:
+        """Get the readings within the window, always including the latest one."""
+        start = now - window
+        within = [reading for read_at, reading in self._readings if read_at >= start]
+        return within or [self._readings[-1][1]]
@@ -0,0 +1,317 @@
+"""Fleet-wide thermal protection for the KiLight integration."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+import numpy as np
+
+from .const import (
+    DOMAIN,
+    THERMAL_DERATE_RATE,
+    THERMAL_DERATING_MARGIN_CELSIUS,
+    THERMAL_EVALUATE_DELAY_SECONDS,
+    THERMAL_MIN_BRIGHTNESS_FACTOR,
+    THERMAL_PREDICTION_SECONDS,
+    THERMAL_RESTORE_RATE,
+    THERMAL_SMOOTHING_SECONDS,
+)
+
+if TYPE_CHECKING:
+    from asyncio import TimerHandle
+
+    from kilight.client import DeviceState
+    from kilight.client.models import TemperatureState
+    from numpy.typing import NDArray
+
+    from .coordinator import KiLightCoordinator
+
+_THERMAL_MANAGER_KEY: Final[HassKey[KiLightThermalManager]] = HassKey(f"{DOMAIN}_thermal")
+
+# Names of the temperature sensors of a device, in the order of the columns of the manager
+THERMAL_SENSORS: Final[tuple[str, ...]] = ("driver", "power_supply", "output_a", "output_b")
+
+# Highest brightness of an output, which a brightness factor of 1 maps to
+_FULL_BRIGHTNESS: Final[int] = 255
+
+# Number of devices the manager makes room for at first, doubled whenever it runs out
+_INITIAL_CAPACITY: Final[int] = 8
+
+# Shortest time between two readings used for a slope, in seconds, so readings arriving in
+# the same instant don't divide by zero
+_MIN_READING_INTERVAL_SECONDS: Final[float] = 0.001
+
+
+@callback
+def async_get_thermal_manager(hass: HomeAssistant) -> KiLightThermalManager:
+    """Get the thermal manager protecting every KiLight, creating it for the first device."""
+    if (thermal := hass.data.get(_THERMAL_MANAGER_KEY)) is None:
+        thermal = hass.data[_THERMAL_MANAGER_KEY] = KiLightThermalManager(hass)
+    return thermal
+
+
+def thermal_readings(state: DeviceState) -> tuple[float, ...]:
+    """
+    Get the temperatures of a device state, in the order of THERMAL_SENSORS.
+
+    :param DeviceState state: The device state
+    :return: The temperatures, NaN for sensors the device doesn't have
+    """
+    output_b = state.output_b
+    return (
+        _celsius(state.driver_temperature),
+        _celsius(state.power_supply_temperature),
+        _celsius(state.output_a.temperature),
+        _celsius(output_b.temperature if output_b is not None else None),
+    )
+
+
+def _celsius(temperature: TemperatureState | None) -> float:
+    return temperature.celsius if temperature is not None else np.nan
+
+
+class KiLightThermalManager:
+    """
+    Reduces the brightness of KiLights ahead of their temperatures reaching their limits.
+
+    Every temperature sensor of every device is followed by a moving average of its
+    readings and of their slope. From those the temperature is predicted a little ahead,
+    and once a prediction comes within the derating margin of its limit, the brightness of
+    the device is reduced in proportion, down to a floor reached at the limit. The hottest
+    sensor of a device decides. Brightness is lowered and raised again at a limited rate,
+    so it fades rather than jumps, and recovers more slowly than it drops.
+
+    The state of the whole fleet is kept in arrays with one row per device, so every
+    device with new readings is evaluated in one pass. Readings only mark their device,
+    and the evaluation runs shortly after the first of them, covering all readings that
+    arrived in the meantime. Only devices whose brightness limit changed are notified.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """
+        Initialize the thermal manager.
+
+        :param HomeAssistant hass: Home Assistant instance
+        """
+        self._hass: HomeAssistant = hass
+        self._rows: dict[KiLightCoordinator, int] = {}
+        self._coordinators: list[KiLightCoordinator | None] = []
+        self._free_rows: list[int] = []
+        self._timer: TimerHandle | None = None
+        sensors = len(THERMAL_SENSORS)
+        # Latest readings and the time they were recorded at, not evaluated yet if pending
+        self._readings: NDArray[np.float64] = np.empty((0, sensors))
+        self._read_at: NDArray[np.float64] = np.empty(0)
+        self._pending: NDArray[np.bool_] = np.empty(0, dtype=np.bool_)
+        # Moving averages of the temperatures and their slopes, in degrees Celsius and
+        # degrees per second, as of the readings evaluated last and the time of those
+        self._averages: NDArray[np.float64] = np.empty((0, sensors))
+        self._slopes: NDArray[np.float64] = np.empty((0, sensors))
+        self._evaluated_at: NDArray[np.float64] = np.empty(0)
+        # Temperature limits, and the share of full brightness and the brightness allowed
+        self._limits: NDArray[np.float64] = np.empty((0, sensors))
+        self._factors: NDArray[np.float64] = np.empty(0)
+        self._brightness_limits: NDArray[np.int_] = np.empty(0, dtype=np.int_)
+        self._allocate(_INITIAL_CAPACITY)
+
+    @property
+    def devices(self) -> int:
+        """Number of devices under thermal protection."""
+        return len(self._rows)
+
+    @callback
+    def async_set_limits(
+        self, coordinator: KiLightCoordinator, limits: tuple[float, ...] | None
+    ) -> None:
+        """
+        Protect a device with the given temperature limits, or stop protecting it.
+
+        A device no longer protected gets any brightness limit lifted.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device
+        :param tuple[float, ...] | None limits: Temperature limit of each sensor, in the
+            order of THERMAL_SENSORS and in degrees Celsius, None to stop protecting it
+        """
+        if limits is None:
+            if (row := self._rows.get(coordinator)) is not None:
+                limited = self._brightness_limits[row] < _FULL_BRIGHTNESS
+                self.async_remove(coordinator)
+                if limited:
+                    coordinator.async_apply_thermal_limit(None)
+            return
+
+        if (row := self._rows.get(coordinator)) is None:
+            row = self._add(coordinator)
+        self._limits[row] = limits
+
+    @callback
+    def async_remove(self, coordinator: KiLightCoordinator) -> None:
+        """
+        Forget a device whose coordinator shut down.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device
+        """
+        if (row := self._rows.pop(coordinator, None)) is None:
+            return
+        self._coordinators[row] = None
+        self._pending[row] = False
+        self._free_rows.append(row)
+        if not self._rows and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    @callback
+    def async_record(self, coordinator: KiLightCoordinator, state: DeviceState) -> None:
+        """
+        Record the temperatures of a device, to be evaluated with the rest of the fleet.
+
+        Readings of a device recorded before its last ones were evaluated replace them.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device
+        :param DeviceState state: The state the device reported
+        """
+        if (row := self._rows.get(coordinator)) is None:
+            return
+        self._readings[row] = thermal_readings(state)
+        self._read_at[row] = self._hass.loop.time()
+        self._pending[row] = True
+        if self._timer is None:
+            self._timer = self._hass.loop.call_later(
+                THERMAL_EVALUATE_DELAY_SECONDS, self._async_evaluate
+            )
+
+    def as_dict(self, coordinator: KiLightCoordinator) -> dict[str, Any] | None:
+        """
+        Get the thermal state of a device as a JSON-serializable dictionary, for diagnostics.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device
+        :return: The thermal state, None when the device isn't protected
+        """
+        if (row := self._rows.get(coordinator)) is None:
+            return None
+        sensors: dict[str, Any] = {}
+        for column, sensor in enumerate(THERMAL_SENSORS):
+            average, slope = self._averages[row, column], self._slopes[row, column]
+            if np.isnan(average):
+                continue
+            headroom = self._limits[row, column] - average
+            sensors[sensor] = {
+                "temperature": float(average),
+                "slope": float(slope),
+                "limit": float(self._limits[row, column]),
+                "seconds_to_limit": float(headroom / slope) if slope > 0 else None,
+            }
+        return {
+            "sensors": sensors,
+            "brightness_factor": float(self._factors[row]),
+            "brightness_limit": self.brightness_limit(coordinator),
+        }
+
+    def brightness_limit(self, coordinator: KiLightCoordinator) -> int | None:
+        """
+        Get the brightness a device is limited to.
+
+        :param KiLightCoordinator coordinator: Coordinator of the device
+        :return: The highest brightness its outputs may be set to, None when not limited
+        """
+        if (row := self._rows.get(coordinator)) is None:
+            return None
+        if (limit := int(self._brightness_limits[row])) >= _FULL_BRIGHTNESS:
+            return None
+        return limit
+
+    def _allocate(self, capacity: int) -> None:
+        """Make room for the given number of devices, keeping the rows already in use."""
+        size = len(self._coordinators)
+
+        def _grow(array: NDArray[Any], fill: float) -> NDArray[Any]:
+            grown = np.full((capacity, *array.shape[1:]), fill, dtype=array.dtype)
+            grown[:size] = array
+            return grown
+
+        self._readings = _grow(self._readings, np.nan)
+        self._averages = _grow(self._averages, np.nan)
+        self._slopes = _grow(self._slopes, np.nan)
+        self._limits = _grow(self._limits, np.inf)
+        self._read_at = _grow(self._read_at, np.nan)
+        self._evaluated_at = _grow(self._evaluated_at, np.nan)
+        self._factors = _grow(self._factors, 1.0)
+        self._brightness_limits = _grow(self._brightness_limits, _FULL_BRIGHTNESS)
+        self._pending = _grow(self._pending, 0)
+        self._coordinators.extend([None] * (capacity - size))
+        self._free_rows.extend(range(capacity - 1, size - 1, -1))
+
+    def _add(self, coordinator: KiLightCoordinator) -> int:
+        """Give a device a row, cleared of whatever device had it before."""
+        if not self._free_rows:
+            self._allocate(len(self._coordinators) * 2)
+        row = self._free_rows.pop()
+        self._rows[coordinator] = row
+        self._coordinators[row] = coordinator
+        self._readings[row] = np.nan
+        self._averages[row] = np.nan
+        self._slopes[row] = np.nan
+        self._read_at[row] = np.nan
+        self._evaluated_at[row] = np.nan
+        self._factors[row] = 1.0
+        self._brightness_limits[row] = _FULL_BRIGHTNESS
+        self._pending[row] = False
+        return row
+
+    @callback
+    def _async_evaluate(self) -> None:
+        """Evaluate every device with new readings, and notify those whose limit changed."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows = np.flatnonzero(self._pending)
+        if not len(rows):
+            return
+        self._pending[rows] = False
+
+        readings = self._readings[rows]
+        read_at = self._read_at[rows]
+        averages = self._averages[rows]
+        # Time since the readings evaluated before, infinite for a device's first readings
+        elapsed = np.maximum(
+            np.nan_to_num(read_at - self._evaluated_at[rows], nan=np.inf),
+            _MIN_READING_INTERVAL_SECONDS,
+        )
+
+        # Moving averages of the temperatures and of their slopes, weighting each reading
+        # by how long it stood for, started over for sensors without earlier readings
+        weight = (1 - np.exp(-elapsed / THERMAL_SMOOTHING_SECONDS))[:, np.newaxis]
+        new_averages = averages + weight * (readings - averages)
+        slopes = self._slopes[rows]
+        new_slopes = slopes + weight * ((new_averages - averages) / elapsed[:, np.newaxis] - slopes)
+        started = np.isnan(averages)
+        self._averages[rows] = np.where(started, readings, new_averages)
+        self._slopes[rows] = np.where(
+            np.isnan(readings), np.nan, np.where(started, 0.0, new_slopes)
+        )
+        self._evaluated_at[rows] = read_at
+
+        # Brightness each sensor allows from its predicted temperature, ignoring cooling
+        predicted = self._averages[rows] + np.maximum(self._slopes[rows], 0.0) * (
+            THERMAL_PREDICTION_SECONDS
+        )
+        headroom = np.clip(
+            (self._limits[rows] - predicted) / THERMAL_DERATING_MARGIN_CELSIUS, 0.0, 1.0
+        )
+        allowed = THERMAL_MIN_BRIGHTNESS_FACTOR + (1 - THERMAL_MIN_BRIGHTNESS_FACTOR) * headroom
+        targets = np.fmin.reduce(allowed, axis=1, initial=1.0)
+
+        # Move towards the brightness the hottest sensor allows, at a limited rate
+        factors = self._factors[rows]
+        steps = np.where(targets < factors, THERMAL_DERATE_RATE, THERMAL_RESTORE_RATE) * elapsed
+        factors = np.clip(targets, factors - steps, factors + steps)
+        self._factors[rows] = factors
+
+        brightness_limits = np.rint(factors * _FULL_BRIGHTNESS).astype(np.int_)
+        changed = brightness_limits != self._brightness_limits[rows]
+        self._brightness_limits[rows] = brightness_limits
+        for row in rows[changed]:
+            if (coordinator := self._coordinators[row]) is not None:
+                coordinator.async_apply_thermal_limit(self.brightness_limit(coordinator))
@@ -0,0 +1,175 @@
+"""Client-side light transitions for KiLight outputs."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import logging
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from .const import TRANSITION_MAX_FRAMES_PER_SECOND
+
+if TYPE_CHECKING:
+    from .color import KiLightColorEngine
+    from .commands import KiLightCommandCoalescer
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TransitionFrame:
+    """Brightness and channel levels of an output at one point of a transition."""
+
+    brightness: int
+    rgbcw: tuple[int, int, int, int, int]
+
+    def interpolate(self, target: TransitionFrame, progress: float) -> TransitionFrame:
+        """
+        Get the frame the given fraction of the way from this frame to the target.
+
+        :param TransitionFrame target: Frame at the end of the transition
+        :param float progress: How far along the transition is, from 0.0 to 1.0
+        """
+        progress = min(max(progress, 0.0), 1.0)
+        return TransitionFrame(
+            brightness=round(self.brightness + (target.brightness - self.brightness) * progress),
+            rgbcw=tuple(
+                round(start + (end - start) * progress)
+                for start, end in zip(self.rgbcw, target.rgbcw, strict=True)
+            ),
+        )
+
+
+class KiLightTransition:
+    """
+    Transition of one output, sent as interpolated frames through its command coalescer.
+
+    Each frame is computed from the elapsed time when the previous frame has been written,
+    so a slow connection results in fewer frames rather than a backlog of stale ones. Frames
+    are sent at most TRANSITION_MAX_FRAMES_PER_SECOND times per second, and never faster
+    than the command window of the output, since the coalescer would merge them anyway.
+    Cancelling the task running the transition stops it after the frame currently being
+    written.
+
+    With a color engine, frame brightness is that of Home Assistant, interpolated before it
+    is mapped through the brightness table of the engine, so fades follow its gamma curve.
+    """
+
+    def __init__(  # noqa: PLR0913 The options past the frames are keyword-only
+        self,
+        commands: KiLightCommandCoalescer,
+        start: TransitionFrame,
+        target: TransitionFrame,
+        duration: float,
+        *,
+        power_on: bool = True,
+        off_brightness: int | None = None,
+        color_engine: KiLightColorEngine | None = None,
+    ) -> None:
+        """
+        Initialize the transition.
+
+        :param KiLightCommandCoalescer commands: Command coalescer of the output
+        :param TransitionFrame start: Frame to start from
+        :param TransitionFrame target: Frame to end at
+        :param float duration: Length of the transition, in seconds
+        :param bool power_on: Whether the output is on at the end of the transition
+        :param int | None off_brightness: Device brightness to leave an output at that is
+            faded out, so turning it back on restores it. Defaults to the start brightness.
+        :param KiLightColorEngine | None color_engine: Color engine mapping frame brightness
+            to device brightness, frame brightness is sent as is without one
+        """
+        self._commands: KiLightCommandCoalescer = commands
+        self._color_engine: KiLightColorEngine | None = color_engine
+        self._start: TransitionFrame = start
+        self._target: TransitionFrame = target
+        self._duration: float = duration
+        self._power_on: bool = power_on
+        self._off_brightness: int = (
+            off_brightness
+            if off_brightness is not None
+            else self._device_brightness(start.brightness)
+        )
+        self._finished: bool = False
+        self._frames_sent: int = 0
+        self._elapsed: float = 0.0
+
+    @property
+    def frames_sent(self) -> int:
+        """Number of frames written to the device so far."""
+        return self._frames_sent
+
+    @property
+    def frame_rate(self) -> float:
+        """Frames per second sustained so far."""
+        if self._elapsed <= 0:
+            return 0.0
+        return self._frames_sent / self._elapsed
+
+    @property
+    def interrupted_fade_out_brightness(self) -> int | None:
+        """
+        Brightness to restore if this is a fade-out that didn't finish.
+
+        The output is left somewhere between its start brightness and off, so the next
+        command has to set the brightness back, unless it sets one itself.
+        """
+        if self._power_on or self._finished:
+            return None
+        return self._off_brightness
+
+    async def async_run(self) -> None:
+        """Send the frames of the transition, ending exactly on the target."""
+        frame_interval = max(1 / TRANSITION_MAX_FRAMES_PER_SECOND, self._commands.command_window)
+        start_time = monotonic()
+        progress = 0.0
+
+        while progress < 1.0:
+            frame_time = monotonic()
+            progress = (frame_time - start_time) / self._duration if self._duration > 0 else 1.0
+            if progress >= 1.0:
+                break
+
+            frame = self._start.interpolate(self._target, progress)
+            await self._commands.async_send(
+                brightness=self._device_brightness(frame.brightness),
+                rgbcw_color=frame.rgbcw,
+                power_on=True,
+            )
+            self._frames_sent += 1
+            self._elapsed = monotonic() - start_time
+
+            next_frame_wait = frame_time + frame_interval - monotonic()
+            if next_frame_wait > 0:
+                await asyncio.sleep(next_frame_wait)
+
+        if self._power_on:
+            await self._commands.async_send(
+                brightness=self._device_brightness(self._target.brightness),
+                rgbcw_color=self._target.rgbcw,
+                power_on=True,
+            )
+        else:
+            # Switch off at the starting brightness so turning back on restores it
+            await self._commands.async_send(
+                brightness=self._off_brightness,
+                rgbcw_color=self._target.rgbcw,
+                power_on=False,
+            )
+        self._finished = True
+        self._frames_sent += 1
+        self._elapsed = monotonic() - start_time
+
+        _LOGGER.debug(
+            "Transition finished after %.2f seconds, %s frames at %.1f frames per second",
+            self._elapsed,
+            self._frames_sent,
+            self.frame_rate,
+        )
+
+    def _device_brightness(self, brightness: int) -> int:
+        """Map the brightness of a frame to the brightness sent to the device."""
+        if self._color_engine is None:
+            return brightness
+        return self._color_engine.device_brightness(brightness)
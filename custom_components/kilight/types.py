@@ -1,6 +1,26 @@
 """File for pure type definitions for KiLight."""
 
+from collections.abc import Awaitable, Callable
+from typing import Protocol, runtime_checkable
+
 from homeassistant.config_entries import ConfigEntry
 from kilight.client import Device
 
 type KiLightConfigEntry = ConfigEntry[Device]
+
+
+@runtime_checkable
+class SupportsStatePush(Protocol):
+    """
+    A device whose firmware can stream state changes over a long-lived connection.
+
+    Once subscribed, the device applies each pushed state delta to its own state and fires
+    its registered callbacks, exactly as it does after a polled update.
+    """
+
+    async def subscribe_state(self) -> Callable[[], Awaitable[None]]:
+        """
+        Start streaming state changes from the device.
+
+        :return: Coroutine function that ends the subscription
+        """
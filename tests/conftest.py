@@ -1,12 +1,90 @@
 """Common fixtures for the KiLight tests."""
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator
+from dataclasses import replace
 from ipaddress import IPv4Address
 from typing import Any
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, PropertyMock, patch
 
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
+from kilight.client import DeviceState, OutputIdentifier, OutputState
+from kilight.client.models import TemperatureState, VersionInfo
 import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.commands import apply_output_updates
+from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.device import KiLightDevice
+
+from .simulator import KiLightSimulator, KiLightSimulatorFleet, SimulatorProfile
+
+MOCK_DEVICE_STATE = DeviceState(
+    hardware_id="mock_hwid",
+    manufacturer_name="ErraticTech",
+    model="KiLight Mock",
+    hardware_version=VersionInfo(1, 0, 0),
+    firmware_version=VersionInfo(1, 2, 3),
+    output_a=OutputState(
+        power_on=True, brightness=128, current=0.5, temperature=TemperatureState(celsius=30.0)
+    ),
+    output_b=OutputState(current=0.0, temperature=TemperatureState(celsius=25.0)),
+    driver_temperature=TemperatureState(celsius=40.0),
+    power_supply_temperature=TemperatureState(celsius=35.0),
+    fan_speed=1000,
+    fan_drive_percentage=20.0,
+)
+
+
+class MockDevice(KiLightDevice):
+    """Device stand-in whose state is set by the test instead of read from the network."""
+
+    def __init__(self, host: str, port: int | None = None, **kwargs: Any) -> None:
+        """Initialize the mock device, reporting MOCK_DEVICE_STATE until told otherwise."""
+        super().__init__(host, port, **kwargs)
+        self.next_state: DeviceState = MOCK_DEVICE_STATE
+        self.output_writes: list[tuple[OutputIdentifier, dict[str, Any]]] = []
+        self.packed_writes: list[tuple[tuple[OutputIdentifier, OutputState], ...]] = []
+
+    async def update_state(self) -> None:
+        """Report the next state as if it had been read from the device."""
+        self._state = self.next_state
+        self._fire_callbacks()
+
+    async def update_output_from_parts(self, output: OutputIdentifier, **kwargs: Any) -> None:
+        """Apply an output write to the state, as if the device had been written and read."""
+        self.output_writes.append((output, kwargs))
+        if output == OutputIdentifier.OutputA:
+            self.next_state = replace(
+                self.next_state, output_a=apply_output_updates(self.next_state.output_a, **kwargs)
+            )
+        elif self.next_state.output_b is not None:
+            self.next_state = replace(
+                self.next_state, output_b=apply_output_updates(self.next_state.output_b, **kwargs)
+            )
+        await self.update_state()
+
+    async def write_outputs(
+        self, outputs: tuple[tuple[OutputIdentifier, OutputState], ...]
+    ) -> None:
+        """Apply output writes sent in one go, as if the device had been written and read."""
+        self.packed_writes.append(outputs)
+        for output, output_state in outputs:
+            if output == OutputIdentifier.OutputA:
+                self.next_state = replace(self.next_state, output_a=output_state)
+            elif self.next_state.output_b is not None:
+                self.next_state = replace(self.next_state, output_b=output_state)
+        await self.update_state()
+
+    def push_state(self, state: DeviceState) -> None:
+        """Report a state as if the device had pushed it."""
+        self.next_state = state
+        self._state = state
+        self._fire_callbacks()
+
+    async def disconnect(self) -> None:
+        """Nothing to disconnect from."""
 
 
 # noinspection PyUnusedLocal
@@ -44,6 +122,66 @@ def mock_device_update_state() -> Generator[AsyncMock]:
         yield mock_device_update_state
 
 
+@pytest.fixture
+def entity_registry_enabled_by_default() -> Generator[None]:
+    """Enable the entities that are disabled by default, like the diagnostic sensors."""
+    with patch(
+        "homeassistant.helpers.entity.Entity.entity_registry_enabled_default",
+        new_callable=PropertyMock,
+        return_value=True,
+    ):
+        yield
+
+
+@pytest.fixture
+def mock_device() -> Generator[MockDevice]:
+    """Use a MockDevice for any device set up by the integration."""
+    device = MockDevice("1.1.1.1", 1234)
+    with patch("custom_components.kilight.KiLightDevice", return_value=device):
+        yield device
+
+
+@pytest.fixture
+async def init_integration(hass: HomeAssistant, mock_device: MockDevice) -> MockConfigEntry:
+    """Set up the integration for the mock device."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Mock Device",
+        unique_id=MOCK_DEVICE_STATE.hardware_id,
+        data={CONF_HOST: "1.1.1.1", CONF_PORT: 1234},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+@pytest.fixture
+async def kilight_simulator(socket_enabled: None) -> AsyncGenerator[KiLightSimulator]:
+    """Run a simulated KiLight with two outputs on an ideal network."""
+    async with KiLightSimulator("sim_hwid") as simulator:
+        yield simulator
+
+
+@pytest.fixture
+async def start_kilight_simulators(
+    socket_enabled: None,
+) -> AsyncGenerator[Callable[..., Awaitable[list[KiLightSimulator]]]]:
+    """Get a function that starts any number of simulated KiLights, stopped after the test."""
+    fleets: list[KiLightSimulatorFleet] = []
+
+    async def _start(count: int, profile: SimulatorProfile | None = None) -> list[KiLightSimulator]:
+        fleet = KiLightSimulatorFleet(count, profile)
+        fleets.append(fleet)
+        await fleet.start()
+        return fleet.simulators
+
+    yield _start
+
+    for fleet in fleets:
+        await fleet.stop()
+
+
 @pytest.fixture
 def mock_zeroconf_devices() -> Generator[dict[str, ZeroconfServiceInfo]]:
     """Mock the list of found zeroconf devices."""
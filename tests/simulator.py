@@ -0,0 +1,418 @@
+"""
+In-process simulator of KiLight devices.
+
+Each simulator is an asyncio TCP server on localhost speaking the same protocol as the
+firmware: protobuf Request and Response messages, each prefixed with its length as a single
+byte, answered one at a time in the order they were received. This lets the integration
+run against real connections, with configurable network conditions, without hardware.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field, replace
+import logging
+import random
+import struct
+from time import monotonic
+from typing import TYPE_CHECKING, Self
+
+from kilight.client import DeviceState, OutputIdentifier, OutputState
+from kilight.client.models import TemperatureState, VersionInfo
+from kilight.protocol import (
+    CommandResult,
+    FanState,
+    GetData,
+    OutputState as ProtocolOutputState,
+    Request,
+    Response,
+    SystemInfo,
+    SystemState,
+    SystemTemperatures,
+    VersionInfo as ProtocolVersionInfo,
+)
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from kilight.protocol import WriteOutput
+
+_LOGGER = logging.getLogger(__name__)
+
+SIMULATOR_HOST = "127.0.0.1"
+
+# Current drawn by an output at full brightness with every channel at full level, in amps
+_FULL_OUTPUT_CURRENT = 4.0
+
+# Temperature range the drifting sensors stay within, in degrees Celsius
+_MIN_TEMPERATURE = 20.0
+_MAX_TEMPERATURE = 90.0
+
+# Fan speed at full drive, in RPM
+_FULL_FAN_SPEED = 3000
+
+# Temperature at which the fan starts spinning up, and at which it reaches full drive
+_FAN_START_TEMPERATURE = 35.0
+_FAN_FULL_TEMPERATURE = 70.0
+
+
+@dataclass(frozen=True)
+class SimulatorProfile:
+    """Network conditions and hardware of a simulated KiLight."""
+
+    # Delay before every response, in seconds
+    latency: float = 0.0
+
+    # Random extra delay of up to this many seconds before every response
+    jitter: float = 0.0
+
+    # Probability of a request being dropped without an answer, like a frame lost for good.
+    # The client only notices through its response timeout.
+    loss: float = 0.0
+
+    # Number of outputs of the device, 1 or 2
+    outputs: int = 2
+
+    # Largest change of each temperature sensor between two state reads, in degrees Celsius
+    sensor_drift: float = 0.0
+
+    # Seed for the randomness of the simulator, so runs can be repeated
+    seed: int | None = None
+
+
+def simulated_device_state(hardware_id: str, outputs: int = 2) -> DeviceState:
+    """
+    Get the state a simulated device starts out with.
+
+    :param str hardware_id: Hardware ID of the device
+    :param int outputs: Number of outputs of the device, 1 or 2
+    """
+    return DeviceState(
+        hardware_id=hardware_id,
+        manufacturer_name="ErraticTech",
+        model="KiLight Simulator",
+        hardware_version=VersionInfo(1, 0, 0),
+        firmware_version=VersionInfo(1, 0, 0),
+        output_a=OutputState(temperature=TemperatureState(celsius=30.0)),
+        output_b=OutputState(temperature=TemperatureState(celsius=30.0)) if outputs > 1 else None,
+        driver_temperature=TemperatureState(celsius=35.0),
+        power_supply_temperature=TemperatureState(celsius=30.0),
+        fan_speed=0,
+        fan_drive_percentage=0.0,
+    )
+
+
+@dataclass
+class SimulatorStats:
+    """Counters of what a simulator has received."""
+
+    connections: int = 0
+    open_connections: int = 0
+    requests: int = 0
+    dropped_requests: int = 0
+    writes: list[tuple[OutputIdentifier, OutputState]] = field(default_factory=list)
+    # Monotonic time the last write was applied at
+    last_write_time: float | None = None
+
+
+class KiLightSimulator:
+    """
+    Simulated KiLight device, listening on a port of its own on localhost.
+
+    Writes change the simulated outputs, with the current each output draws following its
+    brightness and color. If the profile has a sensor drift, every state read moves each
+    temperature by a random amount within it, and the fan follows the hottest one.
+    """
+
+    def __init__(self, hardware_id: str, profile: SimulatorProfile | None = None) -> None:
+        """
+        Initialize the simulator.
+
+        :param str hardware_id: Hardware ID the simulated device reports
+        :param SimulatorProfile | None profile: Network conditions and hardware to simulate,
+            defaults to an ideal network and two outputs
+        """
+        self._profile: SimulatorProfile = profile or SimulatorProfile()
+        self._random: random.Random = random.Random(self._profile.seed)  # noqa: S311 Not used for security
+        self.state: DeviceState = simulated_device_state(hardware_id, self._profile.outputs)
+        self.stats: SimulatorStats = SimulatorStats()
+        self._server: asyncio.Server | None = None
+        self._port: int = 0
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._handlers: set[asyncio.Task[None]] = set()
+
+    @property
+    def profile(self) -> SimulatorProfile:
+        """Network conditions and hardware being simulated."""
+        return self._profile
+
+    @property
+    def host(self) -> str:
+        """Address the simulator listens on."""
+        return SIMULATOR_HOST
+
+    @property
+    def port(self) -> int:
+        """Port the simulator listens on, only known once it was started."""
+        if self._server is None:
+            msg = "Simulator is not running"
+            raise RuntimeError(msg)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        """Start listening on a free port, or on the same port again after a stop."""
+        self._server = await asyncio.start_server(
+            self._async_handle_connection, SIMULATOR_HOST, self._port
+        )
+        self._port = self.port
+
+    async def stop(self) -> None:
+        """Stop listening and close all open connections."""
+        if self._server is None:
+            return
+        self._server.close()
+        await self.drop_connections()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def drop_connections(self) -> None:
+        """Close all open connections, like the device rebooting or leaving the network."""
+        for writer in list(self._writers):
+            writer.close()
+        for handler in list(self._handlers):
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def wait_for_disconnects(self) -> None:
+        """Wait until every client has closed its connection."""
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def __aenter__(self) -> Self:
+        """Start the simulator."""
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Stop the simulator."""
+        await self.stop()
+
+    async def _async_handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        self._writers.add(writer)
+        self.stats.connections += 1
+        self.stats.open_connections += 1
+        try:
+            while True:
+                length = struct.unpack("<B", await reader.readexactly(1))[0]
+                request = Request()
+                request.ParseFromString(await reader.readexactly(length))
+                self.stats.requests += 1
+
+                if self._random.random() < self._profile.loss:
+                    self.stats.dropped_requests += 1
+                    continue
+
+                delay = self._profile.latency + self._random.uniform(0, self._profile.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                response = self._handle_request(request).SerializeToString()
+                writer.write(struct.pack("<B", len(response)) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.stats.open_connections -= 1
+            self._writers.discard(writer)
+            self._handlers.discard(handler)
+            writer.close()
+
+    def _handle_request(self, request: Request) -> Response:
+        if request.HasField("writeOutput"):
+            return Response(commandResult=CommandResult(result=self._write(request.writeOutput)))
+
+        if request.getData == GetData.GetSystemInfo:
+            return Response(systemInfo=self._system_info())
+
+        self._drift_sensors()
+        return Response(systemState=self._system_state())
+
+    def _write(self, write: WriteOutput) -> CommandResult.Result:
+        output_state = OutputState(
+            power_on=write.on,
+            red=write.color.red,
+            green=write.color.green,
+            blue=write.color.blue,
+            cold_white=write.color.coldWhite,
+            warm_white=write.color.warmWhite,
+            brightness=write.brightness,
+        )
+
+        if write.outputId == OutputIdentifier.OutputA:
+            output_state = self._with_current(self.state.output_a, output_state)
+            self.state = replace(self.state, output_a=output_state)
+        elif write.outputId == OutputIdentifier.OutputB and self.state.output_b is not None:
+            output_state = self._with_current(self.state.output_b, output_state)
+            self.state = replace(self.state, output_b=output_state)
+        else:
+            return CommandResult.Result.Error
+
+        self.stats.writes.append((write.outputId, output_state))
+        self.stats.last_write_time = monotonic()
+        return CommandResult.Result.OK
+
+    @staticmethod
+    def _with_current(current_state: OutputState, output_state: OutputState) -> OutputState:
+        """Keep the temperature of the output, and draw current for the new settings."""
+        current = 0.0
+        if output_state.power_on:
+            current = (
+                _FULL_OUTPUT_CURRENT
+                * output_state.brightness
+                / 255
+                * sum(output_state.rgbcw)
+                / (255 * len(output_state.rgbcw))
+            )
+        return replace(output_state, current=current, temperature=current_state.temperature)
+
+    def _drift_sensors(self) -> None:
+        if self._profile.sensor_drift <= 0:
+            return
+
+        self.state = replace(
+            self.state,
+            driver_temperature=self._drift_temperature(self.state.driver_temperature),
+            power_supply_temperature=self._drift_temperature(self.state.power_supply_temperature),
+            output_a=replace(
+                self.state.output_a,
+                temperature=self._drift_temperature(self.state.output_a.temperature),
+            ),
+        )
+        if self.state.output_b is not None:
+            self.state = replace(
+                self.state,
+                output_b=replace(
+                    self.state.output_b,
+                    temperature=self._drift_temperature(self.state.output_b.temperature),
+                ),
+            )
+
+        fan_drive = min(
+            max(
+                (self.state.driver_temperature.celsius - _FAN_START_TEMPERATURE)
+                / (_FAN_FULL_TEMPERATURE - _FAN_START_TEMPERATURE),
+                0.0,
+            ),
+            1.0,
+        )
+        self.state = replace(
+            self.state,
+            fan_drive_percentage=round(fan_drive * 100, 1),
+            fan_speed=round(fan_drive * _FULL_FAN_SPEED),
+        )
+
+    def _drift_temperature(self, temperature: TemperatureState | None) -> TemperatureState | None:
+        if temperature is None or temperature.celsius is None:
+            return temperature
+        drift = self._random.uniform(-self._profile.sensor_drift, self._profile.sensor_drift)
+        celsius = min(max(temperature.celsius + drift, _MIN_TEMPERATURE), _MAX_TEMPERATURE)
+        # The firmware reports hundredths of a degree
+        return TemperatureState(celsius=round(celsius, 2))
+
+    def _system_info(self) -> SystemInfo:
+        return SystemInfo(
+            hardwareId=self.state.hardware_id,
+            model=self.state.model,
+            manufacturer=self.state.manufacturer_name,
+            firmwareVersion=_protocol_version(self.state.firmware_version),
+            hardwareVersion=_protocol_version(self.state.hardware_version),
+        )
+
+    def _system_state(self) -> SystemState:
+        system_state = SystemState(
+            outputA=_protocol_output_state(OutputIdentifier.OutputA, self.state.output_a),
+            temperatures=SystemTemperatures(
+                driver=round(self.state.driver_temperature.celsius * 100)
+            ),
+            fan=FanState(
+                rpm=self.state.fan_speed or 0,
+                outputPerThou=round((self.state.fan_drive_percentage or 0.0) * 10),
+            ),
+        )
+        if self.state.output_b is not None:
+            system_state.outputB.CopyFrom(
+                _protocol_output_state(OutputIdentifier.OutputB, self.state.output_b)
+            )
+        if self.state.power_supply_temperature is not None:
+            system_state.temperatures.powerSupply = round(
+                self.state.power_supply_temperature.celsius * 100
+            )
+        return system_state
+
+
+def _protocol_version(version: VersionInfo) -> ProtocolVersionInfo:
+    return ProtocolVersionInfo(major=version.major, minor=version.minor, patch=version.patch)
+
+
+def _protocol_output_state(output: OutputIdentifier, state: OutputState) -> ProtocolOutputState:
+    protocol_state = ProtocolOutputState(
+        outputId=output,
+        color=state.to_protocol(output).color,
+        brightness=state.brightness,
+        on=state.power_on,
+        current=round(state.current * 1000),
+    )
+    if state.temperature is not None and state.temperature.celsius is not None:
+        protocol_state.temperature = round(state.temperature.celsius * 100)
+    return protocol_state
+
+
+class KiLightSimulatorFleet:
+    """Any number of simulated KiLight devices sharing one profile."""
+
+    def __init__(self, count: int, profile: SimulatorProfile | None = None) -> None:
+        """
+        Initialize the fleet.
+
+        :param int count: Number of devices to simulate
+        :param SimulatorProfile | None profile: Network conditions and hardware of every
+            device. A seed is offset per device, so they don't all drift in lockstep.
+        """
+        profile = profile or SimulatorProfile()
+        self.simulators: list[KiLightSimulator] = [
+            KiLightSimulator(
+                f"sim{index:04d}",
+                replace(profile, seed=None if profile.seed is None else profile.seed + index),
+            )
+            for index in range(count)
+        ]
+
+    async def start(self) -> None:
+        """Start all simulators."""
+        await asyncio.gather(*(simulator.start() for simulator in self.simulators))
+
+    async def stop(self) -> None:
+        """Stop all simulators."""
+        await asyncio.gather(*(simulator.stop() for simulator in self.simulators))
+
+    async def __aenter__(self) -> Self:
+        """Start the fleet."""
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        """Stop the fleet."""
+        await self.stop()
@@ -0,0 +1,121 @@
+"""Test capturing the sensor readings of a KiLight at a high rate."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from homeassistant.const import ATTR_DEVICE_ID, CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import device_registry as dr
+from homeassistant.setup import async_setup_component
+import numpy as np
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.capture import CAPTURE_COLUMNS
+from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.diagnostics import async_get_config_entry_diagnostics
+from custom_components.kilight.services import (
+    ATTR_DURATION,
+    ATTR_FORMAT,
+    ATTR_RATE,
+    SERVICE_CAPTURE_TELEMETRY,
+)
+
+from .simulator import KiLightSimulator, SimulatorProfile
+
+FAN_SPEED_ENTITY_ID = "sensor.simulated_device_fan_speed"
+
+# Rate and duration of the captures, and the samples they take
+_RATE = 20
+_DURATION = 1
+_SAMPLES = _RATE * _DURATION
+
+# Drift of the simulated temperatures, so every sample reads a different state
+_PROFILE = SimulatorProfile(sensor_drift=0.5, seed=1)
+
+
+async def _setup_simulated(hass: HomeAssistant, simulator: KiLightSimulator) -> str:
+    """Set up the simulated device, returning its device ID."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Simulated Device",
+        unique_id=simulator.state.hardware_id,
+        data={CONF_HOST: simulator.host, CONF_PORT: simulator.port},
+    )
+    entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    return dr.async_get(hass).async_get_device({(DOMAIN, simulator.state.hardware_id)}).id
+
+
+@pytest.mark.parametrize("export_format", ["csv", "npz"])
+async def test_capture_telemetry(
+    hass: HomeAssistant,
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+    export_format: str,
+) -> None:
+    """Test a capture samples the device and exports it, without updating the entities."""
+    (simulator,) = await start_kilight_simulators(1, _PROFILE)
+    device_id = await _setup_simulated(hass, simulator)
+    fan_speed = hass.states.get(FAN_SPEED_ENTITY_ID)
+    requests_before = simulator.stats.requests
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_CAPTURE_TELEMETRY,
+        {
+            ATTR_DEVICE_ID: device_id,
+            ATTR_RATE: _RATE,
+            ATTR_DURATION: _DURATION,
+            ATTR_FORMAT: export_format,
+        },
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+
+    assert response["samples"] + response["missed"] == _SAMPLES
+    assert response["samples"] > 0
+    assert simulator.stats.requests - requests_before >= response["samples"]
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).last_updated == fan_speed.last_updated
+
+    path = Path(response["path"])
+    assert path.parent == Path(hass.config.path("kilight_captures"))
+    if export_format == "csv":
+        samples = np.loadtxt(path, delimiter=",", ndmin=2)
+        assert path.read_text().startswith(f"# {','.join(CAPTURE_COLUMNS)}")
+    else:
+        with np.load(path) as capture:
+            samples = capture["samples"]
+            assert tuple(capture["columns"]) == CAPTURE_COLUMNS
+    assert samples.shape == (response["samples"], len(CAPTURE_COLUMNS))
+    assert np.all(np.diff(samples[:, 0]) > 0)
+    # Every sample reads the driver temperature
+    assert not np.isnan(samples[:, CAPTURE_COLUMNS.index("driver_temperature")]).any()
+
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["capture"]["samples"] == response["samples"]
+    assert len(diagnostics["capture"]["rows"]) == response["samples"]
+
+
+async def test_capture_telemetry_once_at_a_time(
+    hass: HomeAssistant,
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+) -> None:
+    """Test a second capture of a device being captured is refused."""
+    (simulator,) = await start_kilight_simulators(1)
+    device_id = await _setup_simulated(hass, simulator)
+    service_data = {ATTR_DEVICE_ID: device_id, ATTR_RATE: _RATE, ATTR_DURATION: _DURATION}
+
+    first = hass.async_create_task(
+        hass.services.async_call(DOMAIN, SERVICE_CAPTURE_TELEMETRY, service_data, blocking=True)
+    )
+    await asyncio.sleep(0)
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_CAPTURE_TELEMETRY, service_data, blocking=True
+        )
+    await first
@@ -0,0 +1,68 @@
+"""Test the KiLight color engine."""
+
+from homeassistant.util.color import color_hs_to_RGB, color_xy_brightness_to_RGB
+from kilight.client import MAX_COLOR_TEMP, MIN_COLOR_TEMP
+from kilight.client.util import color_temp_to_white_levels
+
+from custom_components.kilight.color import get_color_engine
+
+# Largest error of a color temperature read back from white levels, one level spans 15 K
+_KELVIN_TOLERANCE = 8
+
+# Gamma of the engine tested for brightness mapping
+_GAMMA = 2.2
+
+# Brightness of Home Assistant half way up, and the device brightness it maps to at _GAMMA
+_HALF_BRIGHTNESS = 128
+_HALF_DEVICE_BRIGHTNESS = 56
+_FULL_BRIGHTNESS = 255
+
+
+def test_color_temp_matches_client_library() -> None:
+    """Test the kelvin table gives the same white levels as the client library."""
+    color_engine = get_color_engine()
+
+    for kelvin in range(MIN_COLOR_TEMP, MAX_COLOR_TEMP + 1):
+        white_levels = color_temp_to_white_levels(kelvin)
+        rgbcw = color_engine.color_temp_to_rgbcw(kelvin)
+        assert rgbcw == (0, 0, 0, white_levels.cold_white, white_levels.warm_white)
+        assert abs(color_engine.rgbcw_to_color_temp(rgbcw) - kelvin) <= _KELVIN_TOLERANCE
+
+
+def test_hs_and_xy_match_home_assistant() -> None:
+    """Test the hs and xy tables give the same RGB levels as Home Assistant."""
+    color_engine = get_color_engine()
+
+    for hue in range(360):
+        for saturation in range(0, 101, 5):
+            assert color_engine.hs_to_rgbcw((hue, saturation)) == (
+                *color_hs_to_RGB(hue, saturation),
+                0,
+                0,
+            )
+
+    for x in range(0, 257, 4):
+        for y in range(1, 257, 4):
+            assert color_engine.xy_to_rgbcw((x / 256, y / 256)) == (
+                *color_xy_brightness_to_RGB(x / 256, y / 256, 255),
+                0,
+                0,
+            )
+
+
+def test_brightness_gamma() -> None:
+    """Test brightness is mapped through the gamma curve, never turning a lit output dark."""
+    assert [get_color_engine().device_brightness(level) for level in range(256)] == list(range(256))
+
+    color_engine = get_color_engine(brightness_gamma=_GAMMA)
+    assert color_engine.device_brightness(_HALF_BRIGHTNESS) == _HALF_DEVICE_BRIGHTNESS
+    assert color_engine.ha_brightness(_HALF_DEVICE_BRIGHTNESS) == _HALF_BRIGHTNESS
+    assert color_engine.device_brightness(0) == 0
+    assert color_engine.device_brightness(1) == 1
+    assert color_engine.device_brightness(_FULL_BRIGHTNESS) == _FULL_BRIGHTNESS
+
+
+def test_engine_shared_by_calibration() -> None:
+    """Test devices calibrated the same share one engine and its tables."""
+    assert get_color_engine(3000, 6000, _GAMMA) is get_color_engine(3000, 6000, _GAMMA)
+    assert get_color_engine(3000, 6000, _GAMMA) is not get_color_engine()
@@ -0,0 +1,225 @@
+"""Test KiLight output command handling."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.core import HomeAssistant
+from kilight.client import Device, DeviceState, OutputIdentifier, OutputState
+import pytest
+
+from custom_components.kilight.commands import KiLightCommandCoalescer, KiLightDeviceCommander
+from custom_components.kilight.device import KiLightDevice
+from custom_components.kilight.exceptions import MissingOutputError
+from custom_components.kilight.presets import KiLightPreset
+
+PRESET = KiLightPreset(
+    "evening",
+    "Evening",
+    (
+        (OutputIdentifier.OutputA, OutputState(power_on=True, brightness=80, warm_white=255)),
+        (OutputIdentifier.OutputB, OutputState()),
+    ),
+)
+
+
+def _create_device(state: DeviceState | None = None) -> MagicMock:
+    device = MagicMock(spec=KiLightDevice)
+    device.state = state or DeviceState()
+    device.update_output_from_parts = AsyncMock()
+    device.connector.write_update = AsyncMock()
+    device.write_packed = AsyncMock()
+    device.write_outputs = AsyncMock()
+    return device
+
+
+def _create_coalescer(
+    hass: HomeAssistant, device: MagicMock, output: OutputIdentifier = OutputIdentifier.OutputA
+) -> KiLightCommandCoalescer:
+    coordinator = MagicMock(
+        hass=hass, command_window=0, commander=KiLightDeviceCommander(hass, device)
+    )
+    return KiLightCommandCoalescer(coordinator, device, output)
+
+
+async def test_burst_is_coalesced(hass: HomeAssistant) -> None:
+    """Test a burst of updates results in one write in flight plus one merged write."""
+    write_started = asyncio.Event()
+    release_write = asyncio.Event()
+
+    async def slow_write(*_: object, **__: object) -> None:
+        write_started.set()
+        await release_write.wait()
+
+    device = _create_device()
+    device.update_output_from_parts.side_effect = slow_write
+    coalescer = _create_coalescer(hass, device)
+
+    first = hass.async_create_task(coalescer.async_send(brightness=10, power_on=True))
+    await write_started.wait()
+    burst = [
+        hass.async_create_task(coalescer.async_send(brightness=brightness, power_on=True))
+        for brightness in range(20, 100, 10)
+    ]
+    burst.append(hass.async_create_task(coalescer.async_send(color_temp=3000)))
+    burst.append(hass.async_create_task(coalescer.async_send(rgbcw_color=(1, 2, 3, 4, 5))))
+    await asyncio.sleep(0)
+    release_write.set()
+    await asyncio.gather(first, *burst)
+
+    assert [written.kwargs for written in device.update_output_from_parts.await_args_list] == [
+        {"brightness": 10, "power_on": True},
+        {"brightness": 90, "power_on": True, "rgbcw_color": (1, 2, 3, 4, 5)},
+    ]
+
+
+async def test_write_error_reaches_callers(hass: HomeAssistant) -> None:
+    """Test every caller merged into a failed write gets the error."""
+    device = _create_device()
+    device.update_output_from_parts.side_effect = TimeoutError
+    coalescer = _create_coalescer(hass, device)
+
+    results = await asyncio.gather(
+        coalescer.async_send(power_on=True),
+        coalescer.async_send(power_on=False),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, TimeoutError) for result in results)
+    device.update_output_from_parts.assert_awaited_once()
+
+
+async def test_outputs_written_in_one_batch(hass: HomeAssistant) -> None:
+    """Test writes to both outputs in the same tick are sent in one go, read back once."""
+    device = _create_device(DeviceState(output_b=OutputState()))
+    commander = KiLightDeviceCommander(hass, device)
+
+    await asyncio.gather(
+        commander.async_write(OutputIdentifier.OutputA, brightness=50, power_on=True),
+        commander.async_write(OutputIdentifier.OutputB, power_on=False),
+    )
+
+    device.write_outputs.assert_awaited_once_with(
+        (
+            (OutputIdentifier.OutputA, OutputState(brightness=50, power_on=True)),
+            (OutputIdentifier.OutputB, OutputState(power_on=False)),
+        )
+    )
+    device.connector.write_update.assert_not_awaited()
+    device.update_output_from_parts.assert_not_awaited()
+
+
+async def test_plain_device_written_one_output_at_a_time(hass: HomeAssistant) -> None:
+    """Test a batch to a plain Device writes each output, reading the state back once."""
+    device = MagicMock(spec=Device)
+    device.state = DeviceState(output_b=OutputState())
+    device.update_output_from_parts = AsyncMock()
+    device.connector.write_update = AsyncMock()
+    commander = KiLightDeviceCommander(hass, device)
+
+    await asyncio.gather(
+        commander.async_write(OutputIdentifier.OutputA, brightness=50, power_on=True),
+        commander.async_write(OutputIdentifier.OutputB, power_on=False),
+    )
+
+    device.connector.write_update.assert_awaited_once_with(
+        OutputIdentifier.OutputA, OutputState(brightness=50, power_on=True)
+    )
+    device.update_output_from_parts.assert_awaited_once_with(
+        OutputIdentifier.OutputB, power_on=False
+    )
+
+
+async def test_newest_color_wins_in_batch(hass: HomeAssistant) -> None:
+    """Test a color written after a color temperature in the same tick replaces it."""
+    device = _create_device()
+    commander = KiLightDeviceCommander(hass, device)
+
+    await asyncio.gather(
+        commander.async_write(OutputIdentifier.OutputA, color_temp=3000, power_on=True),
+        commander.async_write(OutputIdentifier.OutputA, rgbcw_color=(1, 2, 3, 4, 5)),
+    )
+
+    device.update_output_from_parts.assert_awaited_once_with(
+        OutputIdentifier.OutputA, power_on=True, rgbcw_color=(1, 2, 3, 4, 5)
+    )
+
+
+async def test_missing_output_is_rejected(hass: HomeAssistant) -> None:
+    """Test a batch including an output the device lacks is not written at all."""
+    device = _create_device()
+    commander = KiLightDeviceCommander(hass, device)
+
+    with pytest.raises(MissingOutputError):
+        await asyncio.gather(
+            commander.async_write(OutputIdentifier.OutputA, power_on=True),
+            commander.async_write(OutputIdentifier.OutputB, power_on=True),
+        )
+
+    device.write_outputs.assert_not_awaited()
+    device.update_output_from_parts.assert_not_awaited()
+
+
+async def test_writes_parked_while_link_down(hass: HomeAssistant) -> None:
+    """Test writes issued while the link is down are merged and replayed once it is up."""
+    device = _create_device()
+    connection = MagicMock(link_up=False)
+    commander = KiLightDeviceCommander(hass, device, connection=connection)
+
+    writes = [
+        asyncio.create_task(commander.async_write(OutputIdentifier.OutputA, brightness=10)),
+        asyncio.create_task(commander.async_write(OutputIdentifier.OutputA, color_temp=3000)),
+    ]
+    await asyncio.sleep(0.01)
+    writes.append(
+        asyncio.create_task(
+            commander.async_write(OutputIdentifier.OutputA, rgbcw_color=(1, 2, 3, 4, 5))
+        )
+    )
+    await asyncio.sleep(0.01)
+
+    assert commander.parked
+    assert not any(write.done() for write in writes)
+    device.update_output_from_parts.assert_not_awaited()
+
+    connection.link_up = True
+    commander.async_replay()
+    await asyncio.gather(*writes)
+
+    assert not commander.parked
+    device.update_output_from_parts.assert_awaited_once_with(
+        OutputIdentifier.OutputA, brightness=10, rgbcw_color=(1, 2, 3, 4, 5)
+    )
+
+
+async def test_recalled_preset_written_packed(hass: HomeAssistant) -> None:
+    """Test a recalled preset is sent as its precomputed payload, replacing earlier writes."""
+    device = _create_device(DeviceState(output_b=OutputState()))
+    commander = KiLightDeviceCommander(hass, device)
+
+    await asyncio.gather(
+        commander.async_write(OutputIdentifier.OutputB, brightness=10),
+        commander.async_recall(PRESET),
+    )
+
+    device.write_packed.assert_awaited_once_with(PRESET.payload, len(PRESET.outputs))
+    device.connector.write_update.assert_not_awaited()
+    device.update_output_from_parts.assert_not_awaited()
+
+
+async def test_recall_joined_by_write(hass: HomeAssistant) -> None:
+    """Test a write issued after a recall in the same tick is batched with the preset."""
+    device = _create_device(DeviceState(output_b=OutputState()))
+    commander = KiLightDeviceCommander(hass, device)
+
+    await asyncio.gather(
+        commander.async_recall(PRESET),
+        commander.async_write(OutputIdentifier.OutputB, brightness=10),
+    )
+
+    device.write_packed.assert_not_awaited()
+    device.write_outputs.assert_awaited_once_with(
+        (
+            PRESET.outputs[0],
+            (OutputIdentifier.OutputB, OutputState(power_on=False, brightness=10)),
+        )
+    )
@@ -1,15 +1,79 @@
 """Test the KiLight config flow."""
 
+from collections.abc import Awaitable, Callable
+from ipaddress import IPv4Address
 from unittest.mock import AsyncMock, patch
 
 from homeassistant import config_entries
-from homeassistant.const import CONF_ADDRESS, CONF_HOST, CONF_PORT
+from homeassistant.const import CONF_ADDRESS, CONF_DEVICES, CONF_HOST, CONF_PORT
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
 from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
 from kilight.client.exceptions import NetworkTimeoutError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.const import (
+    CONF_BRIGHTNESS_GAMMA,
+    CONF_COLD_WHITE_KELVIN,
+    CONF_COMMAND_WINDOW,
+    CONF_CURRENT_DEADBAND,
+    CONF_DRIVER_TEMPERATURE_LIMIT,
+    CONF_FAN_DRIVE_DEADBAND,
+    CONF_FAN_SPEED_DEADBAND,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_OPTIMISTIC,
+    CONF_OUTPUT_TEMPERATURE_LIMIT,
+    CONF_POWER_SUPPLY_TEMPERATURE_LIMIT,
+    CONF_SUPPLY_VOLTAGE,
+    CONF_TELEMETRY_AGGREGATE,
+    CONF_TELEMETRY_MIN_INTERVAL,
+    CONF_TELEMETRY_WINDOW,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_THERMAL_PROTECTION,
+    CONF_WARM_WHITE_KELVIN,
+    DEFAULT_BRIGHTNESS_GAMMA,
+    DEFAULT_CURRENT_DEADBAND_AMPERES,
+    DEFAULT_DRIVER_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_FAN_DRIVE_DEADBAND_PERCENT,
+    DEFAULT_FAN_SPEED_DEADBAND_RPM,
+    DEFAULT_POWER_SUPPLY_TEMPERATURE_LIMIT_CELSIUS,
+    DEFAULT_SUPPLY_VOLTAGE,
+    DEFAULT_TELEMETRY_WINDOW_SECONDS,
+    DOMAIN,
+)
+from custom_components.kilight.discovery import async_get_discovery_cache
+
+from .simulator import KiLightSimulator
+
+# Number of simulated devices set up at once in the bulk tests
+_BULK_DEVICES = 3
+
+# Connections made to a device discovered again after the flow that read it was aborted
+_READS_AFTER_ABORT = 2
+
+# White channel temperatures set in the options test
+_WARM_WHITE_KELVIN = 3000
+_COLD_WHITE_KELVIN = 6000
+
+# Telemetry options set in the options test
+_TEMPERATURE_DEADBAND = 1.0
+_TELEMETRY_MIN_INTERVAL = 60
+
+# Thermal option set in the options test
+_OUTPUT_TEMPERATURE_LIMIT = 70.0
+
+
+def _zeroconf_info(simulator: KiLightSimulator) -> ZeroconfServiceInfo:
+    return ZeroconfServiceInfo(
+        hostname="sim.local.",
+        ip_address=IPv4Address(simulator.host),
+        port=simulator.port,
+        ip_addresses=[IPv4Address(simulator.host)],
+        type="_kilight._tcp.local.",
+        name="sim",
+        properties={"hwid": simulator.state.hardware_id},
+    )
 
 
 async def test_form(
@@ -80,3 +144,225 @@ async def test_form_cannot_connect(
         mock_device_update_state,
         mock_zeroconf_devices,
     )
+
+
+async def test_options_flow(hass: HomeAssistant) -> None:
+    """Test the options, rejecting inverted poll intervals and white temperatures."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_HOST: "1.1.1.1", CONF_PORT: 1234})
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {CONF_MIN_UPDATE_INTERVAL: 60, CONF_MAX_UPDATE_INTERVAL: 30, CONF_COMMAND_WINDOW: 100},
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_update_interval"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            CONF_MIN_UPDATE_INTERVAL: 10,
+            CONF_MAX_UPDATE_INTERVAL: 600,
+            CONF_WARM_WHITE_KELVIN: _COLD_WHITE_KELVIN,
+            CONF_COLD_WHITE_KELVIN: _WARM_WHITE_KELVIN,
+        },
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_white_kelvin"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            CONF_MIN_UPDATE_INTERVAL: 10,
+            CONF_MAX_UPDATE_INTERVAL: 600,
+            CONF_COMMAND_WINDOW: 50,
+            CONF_OPTIMISTIC: False,
+            CONF_WARM_WHITE_KELVIN: _WARM_WHITE_KELVIN,
+            CONF_COLD_WHITE_KELVIN: _COLD_WHITE_KELVIN,
+            CONF_TEMPERATURE_DEADBAND: _TEMPERATURE_DEADBAND,
+            CONF_TELEMETRY_MIN_INTERVAL: _TELEMETRY_MIN_INTERVAL,
+            CONF_TELEMETRY_AGGREGATE: "mean",
+            CONF_OUTPUT_TEMPERATURE_LIMIT: _OUTPUT_TEMPERATURE_LIMIT,
+        },
+    )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        CONF_MIN_UPDATE_INTERVAL: 10,
+        CONF_MAX_UPDATE_INTERVAL: 600,
+        CONF_COMMAND_WINDOW: 50,
+        CONF_OPTIMISTIC: False,
+        CONF_WARM_WHITE_KELVIN: _WARM_WHITE_KELVIN,
+        CONF_COLD_WHITE_KELVIN: _COLD_WHITE_KELVIN,
+        CONF_BRIGHTNESS_GAMMA: DEFAULT_BRIGHTNESS_GAMMA,
+        CONF_CURRENT_DEADBAND: DEFAULT_CURRENT_DEADBAND_AMPERES,
+        CONF_TEMPERATURE_DEADBAND: _TEMPERATURE_DEADBAND,
+        CONF_FAN_SPEED_DEADBAND: DEFAULT_FAN_SPEED_DEADBAND_RPM,
+        CONF_FAN_DRIVE_DEADBAND: DEFAULT_FAN_DRIVE_DEADBAND_PERCENT,
+        CONF_TELEMETRY_MIN_INTERVAL: _TELEMETRY_MIN_INTERVAL,
+        CONF_TELEMETRY_WINDOW: DEFAULT_TELEMETRY_WINDOW_SECONDS,
+        CONF_TELEMETRY_AGGREGATE: "mean",
+        CONF_THERMAL_PROTECTION: False,
+        CONF_DRIVER_TEMPERATURE_LIMIT: DEFAULT_DRIVER_TEMPERATURE_LIMIT_CELSIUS,
+        CONF_POWER_SUPPLY_TEMPERATURE_LIMIT: DEFAULT_POWER_SUPPLY_TEMPERATURE_LIMIT_CELSIUS,
+        CONF_OUTPUT_TEMPERATURE_LIMIT: _OUTPUT_TEMPERATURE_LIMIT,
+        CONF_SUPPLY_VOLTAGE: DEFAULT_SUPPLY_VOLTAGE,
+    }
+
+
+async def test_zeroconf_reads_device_once(
+    hass: HomeAssistant,
+    kilight_simulator: KiLightSimulator,
+    mock_setup_entry: AsyncMock,
+    mock_unload_entry: AsyncMock,
+) -> None:
+    """Test a device announced repeatedly is read over one connection, which is closed."""
+    discovery_info = _zeroconf_info(kilight_simulator)
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=discovery_info
+    )
+    assert result["type"] is FlowResultType.FORM
+
+    repeated = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=discovery_info
+    )
+    assert repeated["type"] is FlowResultType.ABORT
+    assert repeated["reason"] == "already_in_progress"
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_ADDRESS: kilight_simulator.state.hardware_id}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["title"] == kilight_simulator.state.model
+    await kilight_simulator.wait_for_disconnects()
+    assert kilight_simulator.stats.connections == 1
+    assert kilight_simulator.stats.open_connections == 0
+
+    configured = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=discovery_info
+    )
+    assert configured["type"] is FlowResultType.ABORT
+    assert configured["reason"] == "already_configured"
+    assert kilight_simulator.stats.connections == 1
+
+    await hass.config_entries.async_remove(result["result"].entry_id)
+
+
+async def test_zeroconf_cannot_connect(
+    hass: HomeAssistant, kilight_simulator: KiLightSimulator
+) -> None:
+    """Test a discovered device that can't be read aborts the flow."""
+    discovery_info = _zeroconf_info(kilight_simulator)
+    await kilight_simulator.stop()
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=discovery_info
+    )
+
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "cannot_connect"
+
+
+async def test_aborted_flow_releases_device(
+    hass: HomeAssistant, kilight_simulator: KiLightSimulator
+) -> None:
+    """Test a device read by a flow that was aborted is read again by the next one."""
+    discovery_info = _zeroconf_info(kilight_simulator)
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=discovery_info
+    )
+    assert result["type"] is FlowResultType.FORM
+    hass.config_entries.flow.async_abort(result["flow_id"])
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=discovery_info
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert kilight_simulator.stats.connections == _READS_AFTER_ABORT
+
+    hass.config_entries.flow.async_abort(result["flow_id"])
+    await kilight_simulator.wait_for_disconnects()
+
+
+async def test_bulk_onboarding(
+    hass: HomeAssistant,
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+    mock_setup_entry: AsyncMock,
+) -> None:
+    """Test several discovered devices are read once each and set up together."""
+    simulators = await start_kilight_simulators(_BULK_DEVICES)
+    discovery_cache = async_get_discovery_cache(hass)
+    for simulator in simulators:
+        discovery_cache.async_announce(simulator.state.hardware_id, _zeroconf_info(simulator))
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    assert result["type"] is FlowResultType.MENU
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "bulk"}
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["description_placeholders"] == {
+        "found": str(_BULK_DEVICES),
+        "unreachable": "0",
+    }
+
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_DEVICES: []})
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "no_devices_selected"}
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {CONF_DEVICES: [simulator.state.hardware_id for simulator in simulators]},
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    entries = hass.config_entries.async_entries(DOMAIN)
+    assert sorted(entry.unique_id for entry in entries) == sorted(
+        simulator.state.hardware_id for simulator in simulators
+    )
+    assert {entry.source for entry in entries} == {config_entries.SOURCE_USER, "onboard"}
+    assert len(mock_setup_entry.mock_calls) == _BULK_DEVICES
+    for simulator in simulators:
+        await simulator.wait_for_disconnects()
+        assert simulator.stats.connections == 1
+        assert simulator.stats.open_connections == 0
+
+
+async def test_bulk_onboarding_skips_unreachable(
+    hass: HomeAssistant,
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+    mock_setup_entry: AsyncMock,
+) -> None:
+    """Test discovered devices that don't answer aren't offered."""
+    reachable, unreachable = await start_kilight_simulators(2)
+    discovery_cache = async_get_discovery_cache(hass)
+    for simulator in (reachable, unreachable):
+        discovery_cache.async_announce(simulator.state.hardware_id, _zeroconf_info(simulator))
+    await unreachable.stop()
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "bulk"}
+    )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["description_placeholders"] == {"found": "1", "unreachable": "1"}
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_DEVICES: [reachable.state.hardware_id]}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["result"].unique_id == reachable.state.hardware_id
+    assert len(mock_setup_entry.mock_calls) == 1
@@ -0,0 +1,134 @@
+"""Test the KiLight connection manager against a simulated device."""
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant.const import CONF_HOST, CONF_PORT, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from kilight.client import OutputIdentifier
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import (
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONNECTION_HEARTBEAT_SECONDS,
+    DOMAIN,
+    UPDATE_EVERY_SECONDS,
+)
+from custom_components.kilight.coordinator import KiLightCoordinator
+
+from .simulator import KiLightSimulator
+
+FAN_SPEED_ENTITY_ID = "sensor.simulated_device_fan_speed"
+
+# Longest a test waits for the link to change, in seconds
+_LINK_TIMEOUT = 5
+
+# Brightness written while the simulated device is unreachable
+_PARKED_BRIGHTNESS = 42
+
+# Time scale of the idle traffic test, which runs an idle minute in a fraction of the time
+_TIME_SCALE = 0.02
+_IDLE_MINUTE = 60 * _TIME_SCALE
+
+# Most requests an idle device polled every 30 seconds may get in a minute: two polls, and
+# a heartbeat between each of them
+_IDLE_REQUESTS_PER_MINUTE = 4
+
+
+async def _setup(
+    hass: HomeAssistant, simulator: KiLightSimulator, options: dict[str, Any] | None = None
+) -> KiLightCoordinator:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Simulated Device",
+        unique_id=simulator.state.hardware_id,
+        data={CONF_HOST: simulator.host, CONF_PORT: simulator.port},
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][entry.entry_id].coordinator
+
+
+async def _wait_for(condition: Callable[[], bool]) -> None:
+    async with asyncio.timeout(_LINK_TIMEOUT):
+        while not condition():  # noqa: ASYNC110 The conditions have no event to wait on
+            await asyncio.sleep(0.01)
+
+
+async def test_warm_reconnect(hass: HomeAssistant, kilight_simulator: KiLightSimulator) -> None:
+    """Test a connection closed by the device is reopened without going unavailable."""
+    coordinator = await _setup(hass, kilight_simulator)
+    assert kilight_simulator.stats.connections == 1
+
+    await kilight_simulator.drop_connections()
+    await _wait_for(lambda: kilight_simulator.stats.connections > 1)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert coordinator.connection.link_up
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).state != STATE_UNAVAILABLE
+
+    assert await hass.config_entries.async_unload(coordinator.config_entry.entry_id)
+
+
+async def test_outage_and_replay(hass: HomeAssistant, kilight_simulator: KiLightSimulator) -> None:
+    """Test an unreachable device goes unavailable within seconds and commands are replayed."""
+    with (
+        patch("custom_components.kilight.connection.RECONNECT_MIN_DELAY_SECONDS", 0.01),
+        patch("custom_components.kilight.connection.RECONNECT_MAX_DELAY_SECONDS", 0.05),
+    ):
+        coordinator = await _setup(hass, kilight_simulator)
+
+        await kilight_simulator.stop()
+        await _wait_for(lambda: not coordinator.connection.link_up)
+        await hass.async_block_till_done()
+
+        assert hass.states.get(FAN_SPEED_ENTITY_ID).state == STATE_UNAVAILABLE
+
+        write = hass.async_create_task(
+            coordinator.commander.async_write(
+                OutputIdentifier.OutputA, power_on=True, brightness=_PARKED_BRIGHTNESS
+            )
+        )
+        await _wait_for(lambda: coordinator.commander.parked)
+        assert not write.done()
+
+        await kilight_simulator.start()
+        async with asyncio.timeout(_LINK_TIMEOUT):
+            await write
+        await _wait_for(lambda: coordinator.last_update_success)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert coordinator.connection.link_up
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).state != STATE_UNAVAILABLE
+    assert kilight_simulator.state.output_a.brightness == _PARKED_BRIGHTNESS
+
+    assert await hass.config_entries.async_unload(coordinator.config_entry.entry_id)
+
+
+async def test_idle_heartbeats_skipped_before_polls(
+    hass: HomeAssistant, kilight_simulator: KiLightSimulator
+) -> None:
+    """Test an idle device gets no heartbeat when its next poll is due soon anyway."""
+    poll_interval = UPDATE_EVERY_SECONDS * _TIME_SCALE
+    with patch(
+        "custom_components.kilight.connection.CONNECTION_HEARTBEAT_SECONDS",
+        CONNECTION_HEARTBEAT_SECONDS * _TIME_SCALE,
+    ):
+        coordinator = await _setup(
+            hass,
+            kilight_simulator,
+            {CONF_MIN_UPDATE_INTERVAL: poll_interval, CONF_MAX_UPDATE_INTERVAL: poll_interval},
+        )
+        requests = kilight_simulator.stats.requests
+        await asyncio.sleep(_IDLE_MINUTE)
+        requests = kilight_simulator.stats.requests - requests
+
+    assert 0 < requests <= _IDLE_REQUESTS_PER_MINUTE
+    assert coordinator.connection.link_up
+
+    assert await hass.config_entries.async_unload(coordinator.config_entry.entry_id)
@@ -0,0 +1,143 @@
+"""Test the KiLight coordinator."""
+
+import asyncio
+from dataclasses import replace
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant
+from kilight.client import Device
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import (
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL_SECONDS,
+    DOMAIN,
+    PUSH_LIVENESS_POLL_SECONDS,
+    UPDATE_EVERY_SECONDS,
+)
+from custom_components.kilight.coordinator import KiLightCoordinator
+from custom_components.kilight.enum import UpdateMode
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+
+class PushDevice(Device):
+    """Device stand-in for firmware that can push its state."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize with a mocked push subscription."""
+        super().__init__(host, port)
+        self.end_subscription = AsyncMock()
+        self.subscribe_state = AsyncMock(return_value=self.end_subscription)
+
+
+def _create_coordinator(hass: HomeAssistant, device: Device) -> KiLightCoordinator:
+    entry = MockConfigEntry(
+        domain=DOMAIN, title="Mock Device", data={CONF_HOST: "1.1.1.1", CONF_PORT: 1234}
+    )
+    entry.add_to_hass(hass)
+    entry.runtime_data = device
+    return KiLightCoordinator(hass, entry)
+
+
+async def test_poll_mode(hass: HomeAssistant, mock_device_update_state: AsyncMock) -> None:
+    """Test a device without push support stays on the regular poll interval."""
+    coordinator = _create_coordinator(hass, Device("1.1.1.1", 1234))
+
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.update_mode is UpdateMode.Poll
+    assert coordinator.poll_interval == timedelta(seconds=UPDATE_EVERY_SECONDS)
+
+
+async def test_push_mode_falls_back_to_polling(
+    hass: HomeAssistant, mock_device_update_state: AsyncMock
+) -> None:
+    """Test a push-capable device switches to push, and back to polling when it drops."""
+    device = PushDevice("1.1.1.1", 1234)
+    coordinator = _create_coordinator(hass, device)
+
+    await coordinator.async_refresh()
+
+    assert coordinator.update_mode is UpdateMode.Push
+    assert coordinator.poll_interval == timedelta(seconds=PUSH_LIVENESS_POLL_SECONDS)
+    device.subscribe_state.assert_awaited_once()
+
+    with patch("kilight.client.Device.update_state", side_effect=TimeoutError):
+        await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert coordinator.update_mode is UpdateMode.Poll
+    assert coordinator.poll_interval == timedelta(seconds=DEFAULT_MIN_UPDATE_INTERVAL_SECONDS)
+    device.end_subscription.assert_awaited_once()
+    device.subscribe_state.reset_mock()
+
+    await coordinator.async_refresh()
+
+    assert coordinator.update_mode is UpdateMode.Push
+    device.subscribe_state.assert_awaited_once()
+
+
+@pytest.fixture
+def mock_push_device(mock_device: MockDevice) -> MockDevice:
+    """Give the mock device push support."""
+    mock_device.end_subscription = AsyncMock()
+    mock_device.subscribe_state = AsyncMock(return_value=mock_device.end_subscription)
+    return mock_device
+
+
+async def test_push_subscribe_timeout(
+    hass: HomeAssistant, mock_device_update_state: AsyncMock
+) -> None:
+    """Test a push subscription that never completes times out and leaves the device polled."""
+    device = PushDevice("1.1.1.1", 1234)
+    device.subscribe_state.side_effect = asyncio.Event().wait
+    coordinator = _create_coordinator(hass, device)
+
+    with patch("custom_components.kilight.coordinator.DEVICE_TIMEOUT_SECONDS", 0.01):
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.update_mode is UpdateMode.Poll
+
+
+async def test_pushed_state_reaches_entities(
+    hass: HomeAssistant, mock_push_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test state pushed by the device is written to the entities without a poll."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    assert coordinator.update_mode is UpdateMode.Push
+
+    mock_push_device.push_state(replace(MOCK_DEVICE_STATE, fan_speed=2500))
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.mock_device_fan_speed").state == "2500"
+
+    assert await hass.config_entries.async_unload(init_integration.entry_id)
+    mock_push_device.end_subscription.assert_awaited_once()
+
+
+async def test_update_options_notifies_interval_sensor(
+    hass: HomeAssistant,
+    entity_registry_enabled_by_default: None,
+    mock_device: MockDevice,
+    init_integration: MockConfigEntry,
+) -> None:
+    """Test changing the interval bounds updates the poll interval sensor right away."""
+    poll_interval = hass.states.get("sensor.mock_device_poll_interval")
+    assert float(poll_interval.state) == UPDATE_EVERY_SECONDS
+
+    min_interval = 60
+    hass.config_entries.async_update_entry(
+        init_integration,
+        options={CONF_MIN_UPDATE_INTERVAL: min_interval, CONF_MAX_UPDATE_INTERVAL: 600},
+    )
+    await hass.async_block_till_done()
+
+    poll_interval = hass.states.get("sensor.mock_device_poll_interval")
+    assert float(poll_interval.state) == min_interval
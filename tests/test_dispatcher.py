@@ -0,0 +1,96 @@
+"""Test the KiLight state dispatcher."""
+
+from dataclasses import replace
+from unittest.mock import MagicMock, Mock
+
+from kilight.client import DeviceState, OutputState
+import pytest
+
+from custom_components.kilight.dispatcher import KiLightStateDispatcher
+from custom_components.kilight.exceptions import UnknownStateFieldError
+
+
+def _create_dispatcher(
+    skipped_callback: Mock | None = None,
+) -> tuple[KiLightStateDispatcher, MagicMock]:
+    device = MagicMock()
+    device.state = DeviceState()
+    dispatcher = KiLightStateDispatcher(device, skipped_callback)
+    device.register_callback.assert_called_once()
+    return dispatcher, device.register_callback.call_args.args[0]
+
+
+def test_dispatch_only_changed_fields() -> None:
+    """Test only callbacks depending on a changed field are invoked."""
+    dispatcher, fire_device_callback = _create_dispatcher()
+    output_a_callback = Mock()
+    fan_speed_callback = Mock()
+    both_callback = Mock()
+    dispatcher.async_register_callback(("output_a",), output_a_callback)
+    dispatcher.async_register_callback(("fan_speed",), fan_speed_callback)
+    dispatcher.async_register_callback(("output_a", "fan_speed"), both_callback)
+
+    state = replace(DeviceState(), fan_speed=1200)
+    fire_device_callback(state)
+
+    output_a_callback.assert_not_called()
+    fan_speed_callback.assert_called_once()
+    both_callback.assert_called_once()
+    fan_speed_callback.reset_mock()
+    both_callback.reset_mock()
+
+    fire_device_callback(replace(state, output_a=OutputState(power_on=True), fan_speed=1300))
+
+    output_a_callback.assert_called_once()
+    fan_speed_callback.assert_called_once()
+    both_callback.assert_called_once()
+
+
+def test_count_skipped_callbacks() -> None:
+    """Test every registered callback not invoked for a state is reported as skipped."""
+    skipped_callback = Mock()
+    dispatcher, fire_device_callback = _create_dispatcher(skipped_callback)
+    dispatcher.async_register_callback(("output_a",), Mock())
+    dispatcher.async_register_callback(("driver_temperature",), Mock())
+    dispatcher.async_register_callback(("output_a", "fan_speed"), Mock())
+    dispatcher.async_register_callback(("skipped_state_writes",), Mock())
+
+    fire_device_callback(replace(DeviceState(), fan_speed=1200))
+
+    skipped_callback.assert_called_once_with(2)
+    skipped_callback.reset_mock()
+
+    fire_device_callback(replace(DeviceState(), fan_speed=1200))
+
+    skipped_callback.assert_called_once_with(3)
+
+
+def test_notify_coordinator_field() -> None:
+    """Test callbacks of a coordinator value are invoked when it is reported changed."""
+    dispatcher, _ = _create_dispatcher()
+    skipped_state_writes_callback = Mock()
+    dispatcher.async_register_callback(("skipped_state_writes",), skipped_state_writes_callback)
+
+    dispatcher.async_notify_changed("skipped_state_writes")
+
+    skipped_state_writes_callback.assert_called_once()
+
+
+def test_unregister_callback() -> None:
+    """Test an unregistered callback is no longer invoked."""
+    dispatcher, fire_device_callback = _create_dispatcher()
+    fan_speed_callback = Mock()
+    unregister = dispatcher.async_register_callback(("fan_speed",), fan_speed_callback)
+
+    unregister()
+    fire_device_callback(replace(DeviceState(), fan_speed=1200))
+
+    fan_speed_callback.assert_not_called()
+
+
+def test_unknown_field() -> None:
+    """Test registering for a field the device state does not have."""
+    dispatcher, _ = _create_dispatcher()
+
+    with pytest.raises(UnknownStateFieldError):
+        dispatcher.async_register_callback(("not_a_field",), Mock())
@@ -0,0 +1,120 @@
+"""Test estimating the power and energy drawn by KiLights."""
+
+from time import monotonic
+from unittest.mock import patch
+
+from homeassistant.const import CONF_HOST, CONF_PORT, UnitOfEnergy
+from homeassistant.core import HomeAssistant, State
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    mock_restore_cache_with_extra_data,
+)
+
+from custom_components.kilight.const import CONF_SUPPLY_VOLTAGE, DEFAULT_SUPPLY_VOLTAGE, DOMAIN
+from custom_components.kilight.energy import EnergyMeter
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+POWER_ENTITY_ID = "sensor.mock_device_power"
+OUTPUT_A_POWER_ENTITY_ID = "sensor.mock_device_output_a_power"
+ENERGY_ENTITY_ID = "sensor.mock_device_energy"
+OUTPUT_A_ENERGY_ENTITY_ID = "sensor.mock_device_output_a_energy"
+
+# Power readings of the meter test an hour apart, in watts, and the energy drawn between
+# them, in kilowatt-hours
+_SECONDS_PER_HOUR = 3600.0
+_FIRST_POWER = 10.0
+_SECOND_POWER = 30.0
+_TRAPEZOID_ENERGY = 0.02
+
+# Energy the device drew before the restart in the restore test, in kilowatt-hours
+_RESTORED_ENERGY = 1.5
+
+# Supply voltage set in the options test
+_SUPPLY_VOLTAGE = 12.0
+
+# Power drawn by output A of the mock device at the default supply voltage, in watts, and
+# the energy it draws in an hour, in kilowatt-hours
+_OUTPUT_A_POWER = MOCK_DEVICE_STATE.output_a.current * DEFAULT_SUPPLY_VOLTAGE
+_OUTPUT_A_HOURLY_ENERGY = _OUTPUT_A_POWER / 1000
+
+
+def test_trapezoidal_accumulation() -> None:
+    """Test energy follows the trapezoidal rule, and isn't accumulated across a gap."""
+    meter = EnergyMeter()
+    meter.add(_FIRST_POWER, 0.0)
+    meter.add(_SECOND_POWER, _SECONDS_PER_HOUR)
+    assert meter.energy == pytest.approx(_TRAPEZOID_ENERGY)
+
+    meter.add(None, 2 * _SECONDS_PER_HOUR)
+    meter.add(_SECOND_POWER, 3 * _SECONDS_PER_HOUR)
+    assert meter.energy == pytest.approx(_TRAPEZOID_ENERGY)
+    assert meter.power == _SECOND_POWER
+
+    # Only the first restore is added
+    meter.restore(_RESTORED_ENERGY)
+    meter.restore(_RESTORED_ENERGY)
+    assert meter.energy == pytest.approx(_TRAPEZOID_ENERGY + _RESTORED_ENERGY)
+
+
+async def test_power_and_energy_sensors(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test power follows the output currents, and energy accumulates between polls."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    assert float(hass.states.get(OUTPUT_A_POWER_ENTITY_ID).state) == _OUTPUT_A_POWER
+    # Output B of the mock device draws no current
+    assert float(hass.states.get(POWER_ENTITY_ID).state) == _OUTPUT_A_POWER
+    energy = hass.states.get(ENERGY_ENTITY_ID)
+    assert energy.attributes["unit_of_measurement"] == UnitOfEnergy.KILO_WATT_HOUR
+    assert float(energy.state) == 0
+
+    with patch(
+        "custom_components.kilight.coordinator.monotonic",
+        return_value=monotonic() + _SECONDS_PER_HOUR,
+    ):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+    assert float(hass.states.get(OUTPUT_A_ENERGY_ENTITY_ID).state) == _OUTPUT_A_HOURLY_ENERGY
+    assert float(hass.states.get(ENERGY_ENTITY_ID).state) == _OUTPUT_A_HOURLY_ENERGY
+
+    hass.config_entries.async_update_entry(
+        init_integration, options={CONF_SUPPLY_VOLTAGE: _SUPPLY_VOLTAGE}
+    )
+    await hass.async_block_till_done()
+    assert float(hass.states.get(POWER_ENTITY_ID).state) == (
+        MOCK_DEVICE_STATE.output_a.current * _SUPPLY_VOLTAGE
+    )
+
+    assert await hass.config_entries.async_unload(init_integration.entry_id)
+
+
+async def test_energy_restored(hass: HomeAssistant, mock_device: MockDevice) -> None:
+    """Test the energy drawn before a restart is carried on from."""
+    mock_restore_cache_with_extra_data(
+        hass,
+        [
+            (
+                State(ENERGY_ENTITY_ID, str(_RESTORED_ENERGY)),
+                {
+                    "native_value": _RESTORED_ENERGY,
+                    "native_unit_of_measurement": UnitOfEnergy.KILO_WATT_HOUR,
+                },
+            )
+        ],
+    )
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Mock Device",
+        unique_id=MOCK_DEVICE_STATE.hardware_id,
+        data={CONF_HOST: "1.1.1.1", CONF_PORT: 1234},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert float(hass.states.get(ENERGY_ENTITY_ID).state) == _RESTORED_ENERGY
+    assert float(hass.states.get(OUTPUT_A_ENERGY_ENTITY_ID).state) == 0
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,106 @@
+"""Test the KiLight entities only write state when something they read changed."""
+
+from dataclasses import replace
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import async_get_platforms
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import DOMAIN
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+# Entities reading device state fields, the lights and every sensor but the diagnostic and
+# energy ones
+_STATE_ENTITIES = 13
+
+# Entities whose state a change of the Output A current changes, its current and power
+# sensors and the device power sensor
+_CURRENT_ENTITIES = 3
+
+# Fan speed reported after the initial state, by the snapshot test
+_CHANGED_FAN_SPEED = 1200
+
+
+async def test_unchanged_poll_skips_state_write(
+    hass: HomeAssistant,
+    entity_registry_enabled_by_default: None,
+    mock_device: MockDevice,
+    init_integration: MockConfigEntry,
+) -> None:
+    """Test identical polls don't write state, and a change only writes what it affects."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    light = hass.states.get("light.mock_device_output_a_light")
+    current = hass.states.get("sensor.mock_device_output_a_current")
+
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("light.mock_device_output_a_light").last_updated == light.last_updated
+    assert hass.states.get("sensor.mock_device_output_a_current").last_updated == (
+        current.last_updated
+    )
+    assert coordinator.skipped_state_writes == 2 * _STATE_ENTITIES
+
+    mock_device.next_state = replace(
+        MOCK_DEVICE_STATE, output_a=replace(MOCK_DEVICE_STATE.output_a, current=0.75)
+    )
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    # The light and the Output A temperature sensor are invoked too, since they read
+    # Output A, but neither of the values they show changed
+    assert hass.states.get("light.mock_device_output_a_light").last_updated == light.last_updated
+    assert hass.states.get("sensor.mock_device_output_a_current").state == "0.75"
+    # Every entity but the current and power sensors skipped its write, either in the
+    # dispatcher or after comparing its snapshot
+    skipped_state_writes = 3 * _STATE_ENTITIES - _CURRENT_ENTITIES
+    assert coordinator.skipped_state_writes == skipped_state_writes
+    assert hass.states.get("sensor.mock_device_skipped_state_writes").state == str(
+        skipped_state_writes
+    )
+
+
+async def test_fan_speed_change_only_writes_fan_speed(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test a change to the fan speed alone only writes the fan speed sensor."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    states_before = {state.entity_id: state for state in hass.states.async_all()}
+
+    mock_device.next_state = replace(MOCK_DEVICE_STATE, fan_speed=1500)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    written = {
+        state.entity_id
+        for state in hass.states.async_all()
+        if state.last_updated != states_before[state.entity_id].last_updated
+    }
+    assert written == {"sensor.mock_device_fan_speed"}
+    assert hass.states.get("sensor.mock_device_fan_speed").state == "1500"
+
+
+async def test_entities_share_device_info_and_snapshot(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test the entities of a device share one device info, and one snapshot per state."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    entities = [
+        entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in platform.entities.values()
+    ]
+    device_info = coordinator.get_device_info(init_integration.title)
+    assert all(entity.device_info is device_info for entity in entities)
+    snapshot = entities[0].snapshot
+    assert all(entity.snapshot is snapshot for entity in entities)
+
+    mock_device.next_state = replace(MOCK_DEVICE_STATE, fan_speed=_CHANGED_FAN_SPEED)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert entities[0].snapshot is not snapshot
+    assert all(entity.snapshot is entities[0].snapshot for entity in entities)
+    assert entities[0].snapshot.fan_speed == _CHANGED_FAN_SPEED
@@ -0,0 +1,179 @@
+"""Test the KiLight fleet poll scheduler."""
+
+import asyncio
+from datetime import timedelta
+from itertools import pairwise
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.kilight.const import DOMAIN, UPDATE_EVERY_SECONDS
+from custom_components.kilight.fleet import KiLightFleetScheduler, async_get_fleet_scheduler
+
+from .conftest import MockDevice
+
+# Poll interval of the fake devices, in seconds
+_INTERVAL = 0.05
+
+# Most polls run at once in the concurrency test, and the number of devices asking
+_MAX_CONCURRENT_POLLS = 2
+_DEVICES = 5
+
+
+class FakeCoordinator:
+    """Coordinator stand-in that records when the fleet polls it."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        polls: list[str],
+        release: asyncio.Event | None = None,
+        *,
+        recently_active: bool = False,
+    ) -> None:
+        """Initialize the fake, recording its polls in the shared list."""
+        self.name = name
+        self.config_entry = MockConfigEntry(domain=DOMAIN, title=name)
+        self.config_entry.add_to_hass(hass)
+        self.recently_active = recently_active
+        self.lateness: list[float] = []
+        self._polls = polls
+        self._release = release
+
+    async def async_fleet_refresh(self, lateness: float) -> None:
+        """Record a regular poll, blocking until released if asked to."""
+        self.lateness.append(lateness)
+        await self.async_refresh()
+
+    async def async_refresh(self) -> None:
+        """Record a poll, blocking until released if asked to."""
+        self._polls.append(self.name)
+        if self._release is not None:
+            await self._release.wait()
+
+
+async def test_polls_spread_out(hass: HomeAssistant) -> None:
+    """Test polls asked for at the same time are started the poll spacing apart."""
+    fleet = KiLightFleetScheduler(hass, max_poll_spacing=_INTERVAL)
+    polls: list[str] = []
+    coordinators = [FakeCoordinator(hass, f"Device {index}", polls) for index in range(4)]
+    start_times: list[float] = []
+
+    with patch.object(FakeCoordinator, "async_refresh", autospec=True) as mock_refresh:
+        mock_refresh.side_effect = lambda _: start_times.append(hass.loop.time())
+        for coordinator in coordinators:
+            fleet.async_schedule(coordinator, 0)
+        await asyncio.sleep(_INTERVAL * len(coordinators))
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert len(start_times) == len(coordinators)
+    assert all(later - earlier >= _INTERVAL * 0.9 for earlier, later in pairwise(start_times))
+
+
+async def test_poll_spacing_follows_fleet_rate(hass: HomeAssistant) -> None:
+    """Test the spacing is the interval divided by the number of devices, up to the maximum."""
+    fleet = KiLightFleetScheduler(hass)
+    polls: list[str] = []
+
+    assert fleet.poll_spacing == 1.0
+    cancels = [
+        fleet.async_schedule(FakeCoordinator(hass, f"Device {index}", polls), 30)
+        for index in range(100)
+    ]
+    assert fleet.poll_spacing == pytest.approx(30 / 100)
+
+    for cancel in cancels:
+        cancel()
+
+
+async def test_concurrent_polls_capped(hass: HomeAssistant) -> None:
+    """Test no more than the maximum polls run at once, and the rest follow."""
+    fleet = KiLightFleetScheduler(
+        hass, max_concurrent_polls=_MAX_CONCURRENT_POLLS, max_poll_spacing=0
+    )
+    release = asyncio.Event()
+    polls: list[str] = []
+    for index in range(_DEVICES):
+        fleet.async_refresh_soon(FakeCoordinator(hass, f"Device {index}", polls, release))
+    await hass.async_block_till_done()
+
+    assert fleet.running == _MAX_CONCURRENT_POLLS
+    assert polls == ["Device 0", "Device 1"]
+
+    release.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert fleet.running == 0
+    assert len(polls) == _DEVICES
+
+
+async def test_active_devices_first(hass: HomeAssistant) -> None:
+    """Test a recently active device waiting for a free poll goes before idle ones."""
+    fleet = KiLightFleetScheduler(hass, max_concurrent_polls=1, max_poll_spacing=0)
+    release = asyncio.Event()
+    polls: list[str] = []
+    fleet.async_refresh_soon(FakeCoordinator(hass, "Busy", polls, release))
+    fleet.async_refresh_soon(FakeCoordinator(hass, "Idle", polls, release))
+    fleet.async_refresh_soon(FakeCoordinator(hass, "Active", polls, release, recently_active=True))
+    await hass.async_block_till_done()
+
+    release.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert polls == ["Busy", "Active", "Idle"]
+
+
+async def test_lateness_recorded(hass: HomeAssistant) -> None:
+    """Test a poll held up by running polls reports how late it started."""
+    fleet = KiLightFleetScheduler(hass, max_concurrent_polls=1, max_poll_spacing=0)
+    release = asyncio.Event()
+    polls: list[str] = []
+    busy = FakeCoordinator(hass, "Busy", polls, release)
+    waiting = FakeCoordinator(hass, "Waiting", polls)
+    fleet.async_schedule(busy, 0)
+    fleet.async_schedule(waiting, 0)
+    await asyncio.sleep(_INTERVAL)
+
+    release.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert polls == ["Busy", "Waiting"]
+    assert busy.lateness[0] < waiting.lateness[0]
+    assert waiting.lateness[0] >= _INTERVAL
+
+
+async def test_cancelled_poll_not_run(hass: HomeAssistant) -> None:
+    """Test a cancelled poll doesn't run, and the polls after it still do."""
+    fleet = KiLightFleetScheduler(hass, max_poll_spacing=0)
+    polls: list[str] = []
+    cancel = fleet.async_schedule(FakeCoordinator(hass, "Cancelled", polls), 0)
+    fleet.async_schedule(FakeCoordinator(hass, "Kept", polls), _INTERVAL)
+    cancel()
+
+    await asyncio.sleep(_INTERVAL * 2)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert polls == ["Kept"]
+
+
+async def test_coordinator_polled_by_fleet(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test a set up device is polled through the fleet, which records its lateness."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    assert async_get_fleet_scheduler(hass).poll_spacing == 1.0
+
+    with patch.object(mock_device, "update_state", wraps=mock_device.update_state) as update:
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=UPDATE_EVERY_SECONDS + 1)
+        )
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    update.assert_awaited_once()
+    assert coordinator.metrics.poll_lateness.count == 1
+
+    assert await hass.config_entries.async_unload(init_integration.entry_id)
@@ -0,0 +1,102 @@
+"""Test setting up the KiLight integration."""
+
+import asyncio
+from dataclasses import asdict, replace
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.const import CONF_HOST, CONF_PORT, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.util import dt as dt_util
+from kilight.client import DeviceState
+from kilight.client.models import VersionInfo
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.kilight.const import (
+    DOMAIN,
+    STATE_CACHE_SAVE_DELAY_SECONDS,
+    STATE_CACHE_VERSION,
+)
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+FAN_SPEED_ENTITY_ID = "sensor.mock_device_fan_speed"
+
+
+def _add_cached_entry(
+    hass: HomeAssistant, hass_storage: dict, cached_state: DeviceState
+) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Mock Device",
+        unique_id=cached_state.hardware_id,
+        data={CONF_HOST: "1.1.1.1", CONF_PORT: 1234},
+    )
+    entry.add_to_hass(hass)
+    hass_storage[f"{DOMAIN}.{entry.unique_id}"] = {
+        "version": STATE_CACHE_VERSION,
+        "key": f"{DOMAIN}.{entry.unique_id}",
+        "data": asdict(cached_state),
+    }
+    return entry
+
+
+async def test_state_is_cached(
+    hass: HomeAssistant,
+    hass_storage: dict,
+    mock_device: MockDevice,
+    init_integration: MockConfigEntry,
+) -> None:
+    """Test the device state read during setup is saved to the state cache."""
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=STATE_CACHE_SAVE_DELAY_SECONDS + 1)
+    )
+    await hass.async_block_till_done()
+
+    assert hass_storage[f"{DOMAIN}.{init_integration.unique_id}"]["data"] == asdict(
+        MOCK_DEVICE_STATE
+    )
+
+
+async def test_fast_start_from_cache(
+    hass: HomeAssistant, hass_storage: dict, mock_device: MockDevice
+) -> None:
+    """Test an unreachable device with a cached state doesn't hold up setup."""
+    entry = _add_cached_entry(hass, hass_storage, MOCK_DEVICE_STATE)
+    mock_device.update_state = asyncio.Event().wait
+
+    with patch("custom_components.kilight.coordinator.STARTUP_PROBE_TIMEOUT_SECONDS", 0.01):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).state == STATE_UNAVAILABLE
+    coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+    assert not coordinator.last_update_success
+
+    del mock_device.update_state
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).state == str(MOCK_DEVICE_STATE.fan_speed)
+
+
+async def test_firmware_change_replaces_cache(
+    hass: HomeAssistant,
+    hass_storage: dict,
+    device_registry: dr.DeviceRegistry,
+    mock_device: MockDevice,
+) -> None:
+    """Test a device with different firmware than cached is reloaded with the new info."""
+    entry = _add_cached_entry(
+        hass, hass_storage, replace(MOCK_DEVICE_STATE, firmware_version=VersionInfo(1, 0, 0))
+    )
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass_storage[f"{DOMAIN}.{entry.unique_id}"]["data"] == asdict(MOCK_DEVICE_STATE)
+    device_entry = device_registry.async_get_device(
+        identifiers={(DOMAIN, MOCK_DEVICE_STATE.hardware_id)}
+    )
+    assert device_entry.sw_version == str(MOCK_DEVICE_STATE.firmware_version)
@@ -0,0 +1,143 @@
+"""Test the KiLight light entities."""
+
+import asyncio
+
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_COLOR_MODE,
+    ATTR_HS_COLOR,
+    ATTR_MAX_COLOR_TEMP_KELVIN,
+    ATTR_MIN_COLOR_TEMP_KELVIN,
+    DOMAIN as LIGHT_DOMAIN,
+    ColorMode,
+)
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
+    STATE_OFF,
+    STATE_ON,
+)
+from homeassistant.core import HomeAssistant
+from kilight.client import OutputIdentifier
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import (
+    CONF_BRIGHTNESS_GAMMA,
+    CONF_COLD_WHITE_KELVIN,
+    CONF_WARM_WHITE_KELVIN,
+    DOMAIN,
+)
+
+from .conftest import MockDevice
+
+LIGHT_ENTITY_ID = "light.mock_device_output_a_light"
+
+# Calibration set in the calibration test
+_GAMMA = 2.2
+_WARM_WHITE_KELVIN = 3000
+_COLD_WHITE_KELVIN = 6000
+
+# Brightness shown for the mock output with _GAMMA, and what sending it back writes: the
+# nearest device brightness the gamma curve reaches, since it skips the mock brightness
+_SHOWN_BRIGHTNESS = 187
+_SENT_BRIGHTNESS = 129
+
+
+async def test_optimistic_state_shown_before_write(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test a command is shown right away, and kept once the device confirms it."""
+    write_started = asyncio.Event()
+    release_write = asyncio.Event()
+    update_output_from_parts = mock_device.update_output_from_parts
+
+    async def slow_write(*args: object, **kwargs: object) -> None:
+        write_started.set()
+        await release_write.wait()
+        await update_output_from_parts(*args, **kwargs)
+
+    mock_device.update_output_from_parts = slow_write
+    turn_off = hass.async_create_task(
+        hass.services.async_call(
+            LIGHT_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: LIGHT_ENTITY_ID}, blocking=True
+        )
+    )
+    await write_started.wait()
+
+    assert mock_device.state.output_a.power_on
+    assert hass.states.get(LIGHT_ENTITY_ID).state == STATE_OFF
+
+    release_write.set()
+    await turn_off
+
+    assert hass.states.get(LIGHT_ENTITY_ID).state == STATE_OFF
+    assert hass.data[DOMAIN][init_integration.entry_id].coordinator.optimistic_mismatches == 0
+
+
+async def test_optimistic_state_rolled_back_on_mismatch(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test a command the device doesn't apply is rolled back to the reported state."""
+
+    async def ignored_write(*_: object, **__: object) -> None:
+        await mock_device.update_state()
+
+    mock_device.update_output_from_parts = ignored_write
+
+    await hass.services.async_call(
+        LIGHT_DOMAIN, SERVICE_TURN_OFF, {ATTR_ENTITY_ID: LIGHT_ENTITY_ID}, blocking=True
+    )
+
+    assert hass.states.get(LIGHT_ENTITY_ID).state == STATE_ON
+    assert hass.data[DOMAIN][init_integration.entry_id].coordinator.optimistic_mismatches == 1
+
+
+async def test_hs_color_sent_to_rgb_channels(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test an hs color is written to the RGB channels and shown in hs mode."""
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: LIGHT_ENTITY_ID, ATTR_HS_COLOR: (120, 100)},
+        blocking=True,
+    )
+
+    assert mock_device.output_writes[-1] == (
+        OutputIdentifier.OutputA,
+        {"rgbcw_color": (0, 255, 0, 0, 0), "power_on": True},
+    )
+    state = hass.states.get(LIGHT_ENTITY_ID)
+    assert state.attributes[ATTR_COLOR_MODE] == ColorMode.HS
+    assert state.attributes[ATTR_HS_COLOR] == (120, 100)
+
+
+async def test_calibration_options(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test the white temperatures and brightness gamma apply to the light right away."""
+    hass.config_entries.async_update_entry(
+        init_integration,
+        options={
+            CONF_WARM_WHITE_KELVIN: _WARM_WHITE_KELVIN,
+            CONF_COLD_WHITE_KELVIN: _COLD_WHITE_KELVIN,
+            CONF_BRIGHTNESS_GAMMA: _GAMMA,
+        },
+    )
+    await hass.async_block_till_done()
+
+    state = hass.states.get(LIGHT_ENTITY_ID)
+    assert state.attributes[ATTR_MIN_COLOR_TEMP_KELVIN] == _WARM_WHITE_KELVIN
+    assert state.attributes[ATTR_MAX_COLOR_TEMP_KELVIN] == _COLD_WHITE_KELVIN
+    assert state.attributes[ATTR_BRIGHTNESS] == _SHOWN_BRIGHTNESS
+
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: LIGHT_ENTITY_ID, ATTR_BRIGHTNESS: _SHOWN_BRIGHTNESS},
+        blocking=True,
+    )
+
+    assert mock_device.output_writes[-1][1]["brightness"] == _SENT_BRIGHTNESS
+    assert hass.states.get(LIGHT_ENTITY_ID).attributes[ATTR_BRIGHTNESS] == _SHOWN_BRIGHTNESS
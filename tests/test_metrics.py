@@ -0,0 +1,145 @@
+"""Test the KiLight hot path instrumentation and diagnostics."""
+
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.diagnostics import async_get_config_entry_diagnostics
+from custom_components.kilight.metrics import KiLightDeviceMetrics, LatencyHistogram
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+# Number of samples in the histogram tests
+_SAMPLES = 100
+
+# Duration of the samples that push older ones out of the histogram window
+_RECENT_SECONDS = 0.002
+
+
+def test_histogram_percentiles_within_bucket_resolution() -> None:
+    """Test percentiles land no more than 10% above the actual sample."""
+    histogram = LatencyHistogram()
+    for millis in range(1, _SAMPLES + 1):
+        histogram.record(millis / 1000)
+
+    for actual, percentile in zip((0.050, 0.095, 0.099), histogram.percentiles(), strict=True):
+        assert actual <= percentile <= actual * 1.1
+    assert histogram.count == _SAMPLES
+    assert histogram.max == _SAMPLES / 1000
+
+
+def test_histogram_only_covers_window() -> None:
+    """Test old samples drop out of the percentiles once the window is full."""
+    histogram = LatencyHistogram(window=_SAMPLES)
+    for _ in range(_SAMPLES):
+        histogram.record(5.0)
+    for _ in range(_SAMPLES):
+        histogram.record(_RECENT_SECONDS)
+
+    assert all(
+        _RECENT_SECONDS <= percentile <= _RECENT_SECONDS * 1.1
+        for percentile in histogram.percentiles()
+    )
+    assert histogram.count == 2 * _SAMPLES
+
+
+def test_histogram_record_reports_percentile_changes() -> None:
+    """Test recording only reports a change when a percentile moved to another bucket."""
+    histogram = LatencyHistogram()
+
+    assert histogram.percentiles() == (None, None, None)
+    assert histogram.record(0.010)
+    assert not histogram.record(0.010)
+    assert histogram.record(1.0)
+
+
+def test_histogram_overflow_uses_max() -> None:
+    """Test a sample above the last bucket is reported as the longest seen."""
+    histogram = LatencyHistogram()
+    histogram.record(600.0)
+
+    assert histogram.percentiles() == (600.0, 600.0, 600.0)
+
+
+def test_metrics_notify_changed_fields() -> None:
+    """Test the metrics report which of their values changed."""
+    changed: list[str] = []
+    metrics = KiLightDeviceMetrics(changed.append)
+
+    metrics.record_update_latency(0.010)
+    metrics.record_update_latency(0.010)
+    metrics.record_command_latency(0.200)
+    metrics.record_fan_out_time(0.001)
+    metrics.record_timeout()
+    metrics.record_connections(1)
+    metrics.record_connections(3)
+
+    assert changed == [
+        "update_latency",
+        "command_latency",
+        "fan_out_time",
+        "timeouts",
+        "reconnects",
+    ]
+    assert metrics.as_dict() == {
+        "update_latency": metrics.update_latency.as_dict(),
+        "command_latency": metrics.command_latency.as_dict(),
+        "fan_out_time": metrics.fan_out_time.as_dict(),
+        "poll_lateness": metrics.poll_lateness.as_dict(),
+        "timeouts": 1,
+        "reconnects": 2,
+    }
+
+
+async def test_latency_sensors(
+    hass: HomeAssistant,
+    entity_registry_enabled_by_default: None,
+    mock_device: MockDevice,
+    init_integration: MockConfigEntry,
+) -> None:
+    """Test the latency sensors show the polls, commands and fan-out of the device."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    poll_latency = hass.states.get("sensor.mock_device_poll_latency")
+    assert poll_latency.state != "unknown"
+    assert poll_latency.attributes["unit_of_measurement"] == "ms"
+    assert "p50" in poll_latency.attributes
+    assert "p99" in poll_latency.attributes
+    assert hass.states.get("sensor.mock_device_state_fan_out_time").state != "unknown"
+    assert hass.states.get("sensor.mock_device_command_latency").state == "unknown"
+    assert hass.states.get("sensor.mock_device_timeouts").state == "0"
+
+
+async def test_timeouts_counted(
+    hass: HomeAssistant,
+    entity_registry_enabled_by_default: None,
+    mock_device: MockDevice,
+    init_integration: MockConfigEntry,
+) -> None:
+    """Test a poll the device doesn't answer in time counts, and the counter stays available."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+
+    with patch.object(mock_device, "update_state", side_effect=TimeoutError):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.metrics.timeouts == 1
+    assert hass.states.get("sensor.mock_device_timeouts").state == "1"
+
+
+async def test_diagnostics_redacts_host(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test the diagnostics include the metrics and leave out where the device is."""
+    diagnostics = await async_get_config_entry_diagnostics(hass, init_integration)
+
+    assert diagnostics["entry"]["data"]["host"] == "**REDACTED**"
+    assert diagnostics["device_state"]["hardware_id"] == "**REDACTED**"
+    assert diagnostics["device_state"]["fan_speed"] == MOCK_DEVICE_STATE.fan_speed
+    assert diagnostics["coordinator"]["last_update_success"]
+    assert diagnostics["metrics"]["update_latency"]["count"] >= 1
+    assert diagnostics["metrics"]["timeouts"] == 0
@@ -0,0 +1,120 @@
+"""Test the KiLight preset scenes."""
+
+from unittest.mock import patch
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.scene import DOMAIN as SCENE_DOMAIN
+from homeassistant.const import (
+    ATTR_DEVICE_ID,
+    ATTR_ENTITY_ID,
+    ATTR_NAME,
+    CONF_HOST,
+    CONF_PORT,
+    SERVICE_TURN_ON,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from kilight.client import OutputIdentifier
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.device import KiLightDevice
+from custom_components.kilight.scene import SERVICE_DELETE_PRESET
+from custom_components.kilight.services import SERVICE_SAVE_PRESET
+
+from .simulator import KiLightSimulator
+
+LIGHT_ENTITY_ID = "light.simulated_device_output_a_light"
+SCENE_ENTITY_ID = "scene.simulated_device_evening"
+
+# Brightness of output A when the preset is saved, and once it was changed after
+_PRESET_BRIGHTNESS = 80
+_CHANGED_BRIGHTNESS = 250
+
+
+async def _setup(hass: HomeAssistant, simulator: KiLightSimulator) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Simulated Device",
+        unique_id=simulator.state.hardware_id,
+        data={CONF_HOST: simulator.host, CONF_PORT: simulator.port},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def _set_brightness(hass: HomeAssistant, brightness: int) -> None:
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: LIGHT_ENTITY_ID, ATTR_BRIGHTNESS: brightness},
+        blocking=True,
+    )
+
+
+async def _save_preset(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    device_entry = dr.async_get(hass).async_get_device({(DOMAIN, entry.unique_id)})
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SAVE_PRESET,
+        {ATTR_DEVICE_ID: device_entry.id, ATTR_NAME: "Evening"},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+
+async def test_preset_recalled_in_one_write(
+    hass: HomeAssistant, kilight_simulator: KiLightSimulator
+) -> None:
+    """Test a saved preset becomes a scene that restores both outputs in one packed write."""
+    entry = await _setup(hass, kilight_simulator)
+    await _set_brightness(hass, _PRESET_BRIGHTNESS)
+    await _save_preset(hass, entry)
+    assert hass.states.get(SCENE_ENTITY_ID) is not None
+
+    await _set_brightness(hass, _CHANGED_BRIGHTNESS)
+    kilight_simulator.stats.writes.clear()
+
+    with patch.object(
+        KiLightDevice, "write_packed", autospec=True, side_effect=KiLightDevice.write_packed
+    ) as write_packed:
+        await hass.services.async_call(
+            SCENE_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: SCENE_ENTITY_ID}, blocking=True
+        )
+        await hass.async_block_till_done()
+
+    write_packed.assert_awaited_once()
+    assert [output for output, _ in kilight_simulator.stats.writes] == [
+        OutputIdentifier.OutputA,
+        OutputIdentifier.OutputB,
+    ]
+    assert kilight_simulator.state.output_a.brightness == _PRESET_BRIGHTNESS
+    assert hass.states.get(LIGHT_ENTITY_ID).attributes[ATTR_BRIGHTNESS] == _PRESET_BRIGHTNESS
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_preset_kept_and_deleted(
+    hass: HomeAssistant, kilight_simulator: KiLightSimulator
+) -> None:
+    """Test a preset survives a reload, and deleting it removes its scene."""
+    entry = await _setup(hass, kilight_simulator)
+    await _save_preset(hass, entry)
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get(SCENE_ENTITY_ID) is not None
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_DELETE_PRESET, {ATTR_ENTITY_ID: SCENE_ENTITY_ID}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get(SCENE_ENTITY_ID) is None
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get(SCENE_ENTITY_ID) is None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,86 @@
+"""Test the KiLight adaptive poll scheduler."""
+
+from dataclasses import replace
+
+from kilight.client import DeviceState, OutputState
+from kilight.client.models import TemperatureState
+
+from custom_components.kilight.const import ACTIVE_WINDOW_SECONDS
+from custom_components.kilight.scheduler import AdaptivePollScheduler
+
+MIN_INTERVAL = 5
+MAX_INTERVAL = 300
+STABLE_STATE = DeviceState(driver_temperature=TemperatureState(celsius=40.0))
+
+
+def test_backs_off_while_stable() -> None:
+    """Test the interval grows up to the maximum while nothing changes."""
+    scheduler = AdaptivePollScheduler(MIN_INTERVAL, MAX_INTERVAL)
+    intervals = []
+    for poll in range(10):
+        scheduler.record_state(STABLE_STATE, now=poll * 100.0)
+        intervals.append(scheduler.interval)
+
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == MAX_INTERVAL
+
+
+def test_activity_polls_fast_for_window() -> None:
+    """Test an output change detected by a poll switches to the minimum interval."""
+    scheduler = AdaptivePollScheduler(MIN_INTERVAL, MAX_INTERVAL)
+    scheduler.record_state(STABLE_STATE, now=0.0)
+    scheduler.record_state(STABLE_STATE, now=1.0)
+    assert scheduler.interval > MIN_INTERVAL
+
+    changed_state = replace(STABLE_STATE, output_a=OutputState(power_on=True))
+    scheduler.record_state(changed_state, now=2.0)
+    assert scheduler.interval == MIN_INTERVAL
+
+    scheduler.record_state(changed_state, now=3.0)
+    assert scheduler.interval == MIN_INTERVAL
+
+    scheduler.record_state(changed_state, now=3.0 + ACTIVE_WINDOW_SECONDS)
+    assert scheduler.interval > MIN_INTERVAL
+
+
+def test_tightens_while_warming() -> None:
+    """Test the interval shrinks while the device temperature rises."""
+    scheduler = AdaptivePollScheduler(MIN_INTERVAL, MAX_INTERVAL)
+    scheduler.record_state(STABLE_STATE, now=0.0)
+    scheduler.record_state(STABLE_STATE, now=1.0)
+    backed_off_interval = scheduler.interval
+
+    warmer_state = replace(STABLE_STATE, driver_temperature=TemperatureState(celsius=45.0))
+    scheduler.record_state(warmer_state, now=2.0)
+
+    assert scheduler.interval < backed_off_interval
+
+
+def test_update_bounds_keeps_active_window() -> None:
+    """Test changing the bounds clamps the interval but keeps the active window running."""
+    scheduler = AdaptivePollScheduler(MIN_INTERVAL, MAX_INTERVAL)
+    scheduler.record_activity(now=0.0)
+
+    scheduler.update_bounds(MIN_INTERVAL * 2, MAX_INTERVAL)
+    assert scheduler.interval == MIN_INTERVAL * 2
+
+    scheduler.record_state(STABLE_STATE, now=1.0)
+    scheduler.record_state(STABLE_STATE, now=2.0)
+    assert scheduler.interval == MIN_INTERVAL * 2
+
+
+def test_retries_back_off_while_unreachable() -> None:
+    """Test failed polls are retried soon, backing off while the device stays unreachable."""
+    scheduler = AdaptivePollScheduler(MIN_INTERVAL, MAX_INTERVAL)
+    intervals = []
+    for _ in range(10):
+        scheduler.record_failure()
+        intervals.append(scheduler.interval)
+
+    assert intervals[0] == MIN_INTERVAL
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == MAX_INTERVAL
+
+    scheduler.record_state(STABLE_STATE, now=0.0)
+    scheduler.record_failure()
+    assert scheduler.interval == MIN_INTERVAL
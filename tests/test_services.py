@@ -0,0 +1,147 @@
+"""Test the KiLight services."""
+
+from collections.abc import Awaitable, Callable
+
+from homeassistant.const import CONF_HOST, CONF_PORT, STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.setup import async_setup_component
+from kilight.client import OutputIdentifier
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import DOMAIN
+from custom_components.kilight.services import ATTR_ENTITIES, SERVICE_APPLY_SCENE
+
+from .conftest import MockDevice
+from .simulator import KiLightSimulator
+
+LIGHT_ENTITY_ID = "light.mock_device_output_a_light"
+
+# Brightness and color temperature set by the scenes
+_SCENE_BRIGHTNESS = 200
+_SCENE_COLOR_TEMP = 3000
+
+# Number of simulated devices the scene is applied to, and of outputs each has
+_DEVICES = 3
+_OUTPUTS = 2
+
+
+async def _setup_simulated(hass: HomeAssistant, simulators: list[KiLightSimulator]) -> None:
+    for index, simulator in enumerate(simulators):
+        MockConfigEntry(
+            domain=DOMAIN,
+            title=f"Simulated Device {index}",
+            unique_id=simulator.state.hardware_id,
+            data={CONF_HOST: simulator.host, CONF_PORT: simulator.port},
+        ).add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+
+async def test_apply_scene(
+    hass: HomeAssistant,
+    start_kilight_simulators: Callable[[int], Awaitable[list[KiLightSimulator]]],
+) -> None:
+    """Test a scene sets every light of every device, and reports on each device."""
+    simulators = await start_kilight_simulators(_DEVICES)
+    await _setup_simulated(hass, simulators)
+    entities = {}
+    for index in range(_DEVICES):
+        entities[f"light.simulated_device_{index}_output_a_light"] = {
+            "state": "on",
+            "brightness": _SCENE_BRIGHTNESS,
+            "color_temp_kelvin": _SCENE_COLOR_TEMP,
+        }
+        entities[f"light.simulated_device_{index}_output_b_light"] = "off"
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_APPLY_SCENE,
+        {ATTR_ENTITIES: entities},
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+
+    assert len(response["devices"]) == _DEVICES
+    for result in response["devices"]:
+        assert result["success"]
+        assert result["latency"] > 0
+        assert result["error"] is None
+        assert len(result["entities"]) == _OUTPUTS
+    for simulator in simulators:
+        assert simulator.state.output_a.power_on
+        assert simulator.state.output_a.brightness == _SCENE_BRIGHTNESS
+        assert not simulator.state.output_b.power_on
+    for entity_id, state in entities.items():
+        assert hass.states.get(entity_id).state == (STATE_OFF if state == "off" else STATE_ON)
+
+
+async def test_apply_scene_batches_outputs_of_device(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test both outputs of a device are written in one batch, read back once."""
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_APPLY_SCENE,
+        {
+            ATTR_ENTITIES: {
+                LIGHT_ENTITY_ID: "off",
+                "light.mock_device_output_b_light": {
+                    "state": "on",
+                    "brightness": _SCENE_BRIGHTNESS,
+                },
+            }
+        },
+        blocking=True,
+    )
+
+    assert not mock_device.output_writes
+    ((output_a, state_a), (output_b, state_b)) = mock_device.packed_writes[0]
+    assert len(mock_device.packed_writes) == 1
+    assert (output_a, state_a.power_on) == (OutputIdentifier.OutputA, False)
+    assert (output_b, state_b.power_on) == (OutputIdentifier.OutputB, True)
+    assert state_b.brightness == _SCENE_BRIGHTNESS
+
+
+async def test_apply_scene_reports_failed_device(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test a device that can't be written to is reported, or raises without a response."""
+
+    async def failing_write(*_: object, **__: object) -> None:
+        error_msg = "Device went away"
+        raise OSError(error_msg)
+
+    mock_device.update_output_from_parts = failing_write
+    data = {ATTR_ENTITIES: {LIGHT_ENTITY_ID: "on"}}
+
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_APPLY_SCENE, data, blocking=True, return_response=True
+    )
+    assert response["devices"] == [
+        {
+            "name": "Mock Device",
+            "entities": [LIGHT_ENTITY_ID],
+            "success": False,
+            "latency": pytest.approx(0, abs=1),
+            "error": "Device went away",
+        }
+    ]
+
+    with pytest.raises(HomeAssistantError, match="Mock Device"):
+        await hass.services.async_call(DOMAIN, SERVICE_APPLY_SCENE, data, blocking=True)
+
+
+async def test_apply_scene_unknown_light(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """Test a light that isn't a KiLight is rejected before anything is written."""
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_APPLY_SCENE,
+            {ATTR_ENTITIES: {"light.not_a_kilight": "on"}},
+            blocking=True,
+        )
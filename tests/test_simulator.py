@@ -0,0 +1,234 @@
+"""Test the integration against simulated KiLight devices."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import replace
+from ipaddress import IPv4Address
+from itertools import pairwise
+from time import monotonic
+from unittest.mock import AsyncMock, patch
+
+from homeassistant import config_entries
+from homeassistant.components.light import ATTR_BRIGHTNESS, DOMAIN as LIGHT_DOMAIN
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_ADDRESS,
+    CONF_HOST,
+    CONF_PORT,
+    SERVICE_TURN_ON,
+    STATE_ON,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
+from kilight.client import Device, OutputIdentifier
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import DOMAIN
+
+from .simulator import KiLightSimulator, SimulatorProfile
+
+LIGHT_ENTITY_ID = "light.simulated_device_output_a_light"
+FAN_SPEED_ENTITY_ID = "sensor.simulated_device_fan_speed"
+
+FLEET_SIZE = 200
+
+
+async def _read(simulator: KiLightSimulator) -> Device:
+    device = Device(simulator.host, simulator.port)
+    try:
+        await device.update_state()
+    finally:
+        await device.disconnect()
+    return device
+
+
+async def test_read_state(kilight_simulator: KiLightSimulator) -> None:
+    """Test the client reads the simulated system info and state."""
+    device = await _read(kilight_simulator)
+
+    assert device.state == kilight_simulator.state
+    assert kilight_simulator.stats.connections == 1
+    assert kilight_simulator.stats.requests == len(("system info", "state"))
+
+
+async def test_write_output(kilight_simulator: KiLightSimulator) -> None:
+    """Test writes change the simulated output, which then draws current."""
+    device = Device(kilight_simulator.host, kilight_simulator.port)
+    try:
+        await device.update_state()
+        await device.update_output_from_parts(
+            OutputIdentifier.OutputB, power_on=True, brightness=255, rgbcw_color=(255,) * 5
+        )
+    finally:
+        await device.disconnect()
+
+    assert device.state.output_b.power_on
+    assert device.state.output_b.current > 0
+    assert device.state == kilight_simulator.state
+    assert [output for output, _ in kilight_simulator.stats.writes] == [OutputIdentifier.OutputB]
+
+
+async def test_single_output(
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+) -> None:
+    """Test a device with one output reports no Output B and rejects writes to it."""
+    (simulator,) = await start_kilight_simulators(1, SimulatorProfile(outputs=1))
+    device = Device(simulator.host, simulator.port)
+
+    try:
+        await device.update_state()
+        await device.connector.write_update(OutputIdentifier.OutputB, device.state.output_a)
+    finally:
+        await device.disconnect()
+
+    assert device.state.output_b is None
+    assert simulator.stats.writes == []
+
+
+async def test_latency(
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+) -> None:
+    """Test every response is delayed by the latency and jitter of the profile."""
+    latency = 0.05
+    (simulator,) = await start_kilight_simulators(
+        1, SimulatorProfile(latency=latency, jitter=0.01, seed=1)
+    )
+
+    start_time = monotonic()
+    await _read(simulator)
+
+    assert monotonic() - start_time >= latency * simulator.stats.requests
+
+
+async def test_loss(
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+) -> None:
+    """Test lost requests are never answered."""
+    (simulator,) = await start_kilight_simulators(1, SimulatorProfile(loss=1.0))
+    device = Device(simulator.host, simulator.port)
+
+    try:
+        async with asyncio.timeout(0.1):
+            await device.update_state()
+    except TimeoutError:
+        pass
+    finally:
+        await device.disconnect()
+
+    assert device.state.model is None
+    assert simulator.stats.dropped_requests == 1
+
+
+async def test_sensor_drift(
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+) -> None:
+    """Test temperatures drift between reads, within the drift of the profile."""
+    drift = 0.5
+    (simulator,) = await start_kilight_simulators(1, SimulatorProfile(sensor_drift=drift, seed=1))
+    device = Device(simulator.host, simulator.port)
+    temperatures = []
+
+    try:
+        for _ in range(10):
+            await device.update_state()
+            temperatures.append(device.state.driver_temperature.celsius)
+    finally:
+        await device.disconnect()
+
+    assert len(set(temperatures)) > 1
+    assert all(
+        abs(temperature - last_temperature) <= drift
+        for last_temperature, temperature in pairwise(temperatures)
+    )
+
+
+async def test_fleet(
+    start_kilight_simulators: Callable[..., Awaitable[list[KiLightSimulator]]],
+) -> None:
+    """Test hundreds of simulated devices can be read at the same time."""
+    simulators = await start_kilight_simulators(
+        FLEET_SIZE, SimulatorProfile(latency=0.01, jitter=0.01, sensor_drift=0.5, seed=1)
+    )
+
+    devices = await asyncio.gather(*(_read(simulator) for simulator in simulators))
+
+    assert [device.state for device in devices] == [simulator.state for simulator in simulators]
+    assert len({device.state.hardware_id for device in devices}) == FLEET_SIZE
+
+
+async def test_integration(hass: HomeAssistant, kilight_simulator: KiLightSimulator) -> None:
+    """Test setting up an entry and controlling a light over a real connection."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Simulated Device",
+        unique_id=kilight_simulator.state.hardware_id,
+        data={CONF_HOST: kilight_simulator.host, CONF_PORT: kilight_simulator.port},
+    )
+    entry.add_to_hass(hass)
+    kilight_simulator.state = replace(kilight_simulator.state, fan_speed=1234)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).state == "1234"
+
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: LIGHT_ENTITY_ID, ATTR_BRIGHTNESS: 100},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+
+    assert kilight_simulator.state.output_a.power_on
+    assert kilight_simulator.state.output_a.brightness == hass.states.get(
+        LIGHT_ENTITY_ID
+    ).attributes.get(ATTR_BRIGHTNESS)
+    assert hass.states.get(LIGHT_ENTITY_ID).state == STATE_ON
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    await kilight_simulator.wait_for_disconnects()
+    assert kilight_simulator.stats.open_connections == 0
+
+
+async def test_config_flow(
+    hass: HomeAssistant,
+    kilight_simulator: KiLightSimulator,
+    mock_setup_entry: AsyncMock,
+    mock_unload_entry: AsyncMock,
+) -> None:
+    """Test adding a discovered device reads it over a real connection."""
+    hardware_id = kilight_simulator.state.hardware_id
+    discovered_devices = {
+        hardware_id: ZeroconfServiceInfo(
+            hostname="sim.local.",
+            ip_address=IPv4Address(kilight_simulator.host),
+            port=kilight_simulator.port,
+            ip_addresses=[IPv4Address(kilight_simulator.host)],
+            type="_kilight._tcp.local.",
+            name="sim",
+            properties={"hwid": hardware_id},
+        )
+    }
+
+    with patch(
+        "custom_components.kilight.config_flow.KiLightConfigFlow.discovered_devices",
+        new=discovered_devices,
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_ADDRESS: hardware_id}
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["title"] == kilight_simulator.state.model
+    assert result["result"].unique_id == hardware_id
+    assert result["data"] == {CONF_HOST: kilight_simulator.host, CONF_PORT: kilight_simulator.port}
+    await kilight_simulator.wait_for_disconnects()
+    assert kilight_simulator.stats.open_connections == 0
+
+    await hass.config_entries.async_remove(result["result"].entry_id)
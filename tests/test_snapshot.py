@@ -0,0 +1,23 @@
+"""Test the KiLight device state snapshots."""
+
+from kilight.client import DeviceState
+
+from custom_components.kilight.snapshot import KiLightStateSnapshot, snapshot_accessor
+
+from .conftest import MOCK_DEVICE_STATE
+
+
+def test_snapshot_accessors() -> None:
+    """Test accessors read snapshot values, and None for an output the device doesn't have."""
+    snapshot = KiLightStateSnapshot.from_state(MOCK_DEVICE_STATE)
+    assert snapshot_accessor("output_a", "temperature")(snapshot) == (
+        MOCK_DEVICE_STATE.output_a.temperature.celsius
+    )
+    assert snapshot_accessor("output_a", "rgbcw")(snapshot) == MOCK_DEVICE_STATE.output_a.rgbcw
+    assert snapshot_accessor("fan_speed")(snapshot) == MOCK_DEVICE_STATE.fan_speed
+    assert snapshot == KiLightStateSnapshot.from_state(MOCK_DEVICE_STATE)
+
+    single_output = KiLightStateSnapshot.from_state(DeviceState())
+    assert single_output.output_b is None
+    assert snapshot_accessor("output_b", "current")(single_output) is None
+    assert snapshot_accessor("power_supply_temperature")(single_output) is None
@@ -0,0 +1,116 @@
+"""Test downsampling the sensor readings of KiLights."""
+
+from dataclasses import replace
+from datetime import timedelta
+from time import monotonic
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.kilight.const import CONF_TELEMETRY_MIN_INTERVAL, DOMAIN
+from custom_components.kilight.enum import TelemetryAggregate
+from custom_components.kilight.telemetry import TelemetryConfig, TelemetryFilter
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+FAN_SPEED_ENTITY_ID = "sensor.mock_device_fan_speed"
+
+# Deadband, minimum interval and window of the filter tests
+_DEADBAND = 1.0
+_MIN_INTERVAL = 60.0
+_WINDOW = 300.0
+
+# Temperatures read by the filter test, the first published, then one within the deadband
+# of it, one beyond it, and one beyond it again within the minimum interval
+_READING = 20.0
+_JITTERED_READING = 20.5
+_CHANGED_READING = 22.0
+_CHANGED_AGAIN_READING = 25.0
+
+# Readings of the aggregate test, the first pushed out of a ring buffer of three
+_AGGREGATE_READINGS = (100.0, 1.0, 2.0, 6.0)
+_AGGREGATE_SAMPLES = 3
+_LATEST = 6.0
+_MEAN = 3.0
+_MIN = 1.0
+
+# Minimum interval between published fan speeds in the entity test, in seconds
+_ENTITY_MIN_INTERVAL = 60
+
+# Fan speeds of the entity test, within and beyond the default deadband of the initial one
+_JITTERED_FAN_SPEED = MOCK_DEVICE_STATE.fan_speed + 20
+_CHANGED_FAN_SPEED = MOCK_DEVICE_STATE.fan_speed + 200
+
+
+def test_deadband_and_min_interval() -> None:
+    """Test readings within the deadband aren't published, and changes are rate limited."""
+    config = TelemetryConfig(deadband=_DEADBAND, min_interval=_MIN_INTERVAL, window=_WINDOW)
+    telemetry = TelemetryFilter()
+
+    telemetry.add(_READING, 0.0)
+    assert telemetry.due_in(0.0, config) == 0
+    assert telemetry.publish(0.0, config) == _READING
+
+    telemetry.add(_JITTERED_READING, 100.0)
+    assert telemetry.due_in(100.0, config) is None
+
+    telemetry.add(_CHANGED_READING, 110.0)
+    assert telemetry.due_in(110.0, config) == 0
+    telemetry.publish(110.0, config)
+
+    telemetry.add(_CHANGED_AGAIN_READING, 120.0)
+    assert telemetry.due_in(120.0, config) == _MIN_INTERVAL - 10.0
+    assert telemetry.published == _CHANGED_READING
+
+    # Missing readings are published right away
+    telemetry.add(None, 130.0)
+    assert telemetry.due_in(130.0, config) == 0
+    assert telemetry.publish(130.0, config) is None
+
+
+def test_aggregates_over_window() -> None:
+    """Test the published state is the configured aggregate of the readings in the window."""
+    telemetry = TelemetryFilter(samples=_AGGREGATE_SAMPLES)
+    for now, reading in enumerate(_AGGREGATE_READINGS):
+        telemetry.add(reading, float(now))
+    now = float(len(_AGGREGATE_READINGS) - 1)
+
+    assert telemetry.aggregate(now, TelemetryConfig(window=_WINDOW)) == _LATEST
+    mean = TelemetryConfig(window=_WINDOW, aggregate=TelemetryAggregate.Mean)
+    assert telemetry.aggregate(now, mean) == _MEAN
+    lowest = TelemetryConfig(window=_WINDOW, aggregate=TelemetryAggregate.Min)
+    assert telemetry.aggregate(now, lowest) == _MIN
+    # Only the latest reading is within a short window
+    assert telemetry.aggregate(now, replace(lowest, window=0.5)) == _LATEST
+
+
+async def test_sensor_publishes_filtered_readings(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test the fan speed sensor skips jitter, and publishes held back changes later."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+    hass.config_entries.async_update_entry(
+        init_integration, options={CONF_TELEMETRY_MIN_INTERVAL: _ENTITY_MIN_INTERVAL}
+    )
+    await hass.async_block_till_done()
+    fan_speed = hass.states.get(FAN_SPEED_ENTITY_ID)
+
+    mock_device.next_state = replace(MOCK_DEVICE_STATE, fan_speed=_JITTERED_FAN_SPEED)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).last_updated == fan_speed.last_updated
+
+    # A change beyond the deadband is held back until the minimum interval since the state
+    # published at startup has passed, and then published without a further reading
+    mock_device.next_state = replace(MOCK_DEVICE_STATE, fan_speed=_CHANGED_FAN_SPEED)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).state == fan_speed.state
+
+    later = monotonic() + _ENTITY_MIN_INTERVAL
+    with patch("custom_components.kilight.sensor.monotonic", return_value=later):
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=_ENTITY_MIN_INTERVAL))
+        await hass.async_block_till_done()
+    assert hass.states.get(FAN_SPEED_ENTITY_ID).state == str(_CHANGED_FAN_SPEED)
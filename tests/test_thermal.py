@@ -0,0 +1,185 @@
+"""Test the thermal protection of KiLights."""
+
+import asyncio
+from dataclasses import replace
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, DOMAIN as LIGHT_DOMAIN, SERVICE_TURN_ON
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant
+from kilight.client import OutputIdentifier
+from kilight.client.models import TemperatureState
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import (
+    CONF_THERMAL_PROTECTION,
+    DOMAIN,
+    THERMAL_DERATING_MARGIN_CELSIUS,
+)
+from custom_components.kilight.thermal import KiLightThermalManager, async_get_thermal_manager
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+LIGHT_ENTITY_ID = "light.mock_device_output_a_light"
+
+# Temperature limits of the driver, power supply and outputs of the manager test
+_LIMITS = (85.0, 75.0, 80.0, 80.0)
+
+# Seconds between the readings of the manager test, and the driver temperatures read,
+# rising by 10 degrees a minute towards the limit and then falling back
+_READING_INTERVAL = 60.0
+_RISING_TEMPERATURES = (60.0, 70.0, 80.0)
+_COOL_TEMPERATURE = 60.0
+
+# Brightness limit applied in the commander test, and the brightness the light is set to
+_BRIGHTNESS_LIMIT = 100
+_FULL_BRIGHTNESS = 255
+
+
+class FakeCoordinator:
+    """Coordinator stand-in that records the brightness limits it is told to apply."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize the fake."""
+        self.name = name
+        self.limits: list[int | None] = []
+
+    def async_apply_thermal_limit(self, limit: int | None) -> None:
+        """Record a brightness limit."""
+        self.limits.append(limit)
+
+
+async def _record(
+    hass: HomeAssistant,
+    thermal: KiLightThermalManager,
+    readings: dict[FakeCoordinator, float],
+    now: float,
+) -> None:
+    """Record driver temperatures as if read at the given loop time, and evaluate them."""
+    real_time = hass.loop.time
+    hass.loop.time = lambda: now
+    try:
+        for coordinator, celsius in readings.items():
+            state = replace(MOCK_DEVICE_STATE, driver_temperature=TemperatureState(celsius=celsius))
+            thermal.async_record(coordinator, state)
+    finally:
+        hass.loop.time = real_time
+    # The readings are recorded in the past, so the evaluation runs right away
+    await asyncio.sleep(0.01)
+
+
+async def test_predictive_derating(hass: HomeAssistant) -> None:
+    """Test brightness is limited ahead of a rising temperature, and restored gradually."""
+    thermal = KiLightThermalManager(hass)
+    heating = FakeCoordinator("Heating")
+    idle = FakeCoordinator("Idle")
+    thermal.async_set_limits(heating, _LIMITS)
+    thermal.async_set_limits(idle, _LIMITS)
+    start = hass.loop.time() - 10 * _READING_INTERVAL
+
+    for step, celsius in enumerate(_RISING_TEMPERATURES):
+        await _record(
+            hass,
+            thermal,
+            {heating: celsius, idle: _COOL_TEMPERATURE},
+            start + step * _READING_INTERVAL,
+        )
+
+    # Derated on the prediction, while the smoothed temperature is still short of the margin
+    (limit,) = heating.limits
+    assert limit is not None
+    assert limit < _FULL_BRIGHTNESS
+    diagnostics = thermal.as_dict(heating)
+    driver = diagnostics["sensors"]["driver"]
+    assert driver["temperature"] < _LIMITS[0] - THERMAL_DERATING_MARGIN_CELSIUS
+    assert driver["seconds_to_limit"] is not None
+    assert idle.limits == []
+
+    # Cooling down restores the brightness at a limited rate
+    cooling_start = start + len(_RISING_TEMPERATURES) * _READING_INTERVAL
+    await _record(hass, thermal, {heating: _COOL_TEMPERATURE}, cooling_start)
+    assert limit < heating.limits[-1] < _FULL_BRIGHTNESS
+    await _record(
+        hass, thermal, {heating: _COOL_TEMPERATURE}, cooling_start + 3 * _READING_INTERVAL
+    )
+    assert heating.limits[-1] is None
+
+    # Turning protection off lifts a limit
+    await _record(hass, thermal, {idle: _LIMITS[0]}, cooling_start + 4 * _READING_INTERVAL)
+    assert idle.limits[-1] is not None
+    thermal.async_set_limits(idle, None)
+    assert idle.limits[-1] is None
+    assert thermal.as_dict(idle) is None
+
+    thermal.async_remove(heating)
+    assert thermal.devices == 0
+
+
+async def test_devices_beyond_capacity(hass: HomeAssistant) -> None:
+    """Test a fleet larger than the initial arrays is evaluated in one pass."""
+    thermal = KiLightThermalManager(hass)
+    coordinators = [FakeCoordinator(f"Device {index}") for index in range(20)]
+    for coordinator in coordinators:
+        thermal.async_set_limits(coordinator, _LIMITS)
+
+    await _record(
+        hass,
+        thermal,
+        dict.fromkeys(coordinators[::2], _LIMITS[0]),
+        hass.loop.time() - _READING_INTERVAL,
+    )
+
+    assert all(coordinator.limits for coordinator in coordinators[::2])
+    assert not any(coordinator.limits for coordinator in coordinators[1::2])
+    for coordinator in coordinators:
+        thermal.async_remove(coordinator)
+
+
+async def test_protection_opt_in(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test a device is only protected once thermal protection is enabled in the options."""
+    thermal = async_get_thermal_manager(hass)
+    assert thermal.devices == 0
+
+    hass.config_entries.async_update_entry(
+        init_integration, options={CONF_THERMAL_PROTECTION: True}
+    )
+    await hass.async_block_till_done()
+    assert thermal.devices == 1
+
+    assert await hass.config_entries.async_unload(init_integration.entry_id)
+    assert thermal.devices == 0
+
+
+async def test_brightness_capped_and_restored(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test a limit caps the outputs and later writes, and lifting it restores what was asked."""
+    coordinator = hass.data[DOMAIN][init_integration.entry_id].coordinator
+
+    coordinator.async_apply_thermal_limit(_BRIGHTNESS_LIMIT)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert coordinator.thermal_limit == _BRIGHTNESS_LIMIT
+    assert mock_device.output_writes[-1] == (
+        OutputIdentifier.OutputA,
+        {"brightness": _BRIGHTNESS_LIMIT},
+    )
+
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: LIGHT_ENTITY_ID, ATTR_BRIGHTNESS: _FULL_BRIGHTNESS},
+        blocking=True,
+    )
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert mock_device.output_writes[-1][1]["brightness"] == _BRIGHTNESS_LIMIT
+    assert coordinator.optimistic_mismatches == 0
+
+    coordinator.async_apply_thermal_limit(None)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert mock_device.output_writes[-1] == (
+        OutputIdentifier.OutputA,
+        {"brightness": coordinator.color_engine.device_brightness(_FULL_BRIGHTNESS)},
+    )
+
+    assert await hass.config_entries.async_unload(init_integration.entry_id)
@@ -0,0 +1,101 @@
+"""Test KiLight client-side light transitions."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.components.light import ATTR_TRANSITION, DOMAIN as LIGHT_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_TURN_OFF, SERVICE_TURN_ON
+from homeassistant.core import HomeAssistant
+from kilight.client import DeviceState
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kilight.const import TRANSITION_MAX_FRAMES_PER_SECOND
+from custom_components.kilight.transition import KiLightTransition, TransitionFrame
+
+from .conftest import MOCK_DEVICE_STATE, MockDevice
+
+START = TransitionFrame(brightness=0, rgbcw=(0, 0, 0, 255, 0))
+TARGET = TransitionFrame(brightness=200, rgbcw=(100, 50, 0, 0, 255))
+LIGHT_ENTITY_ID = "light.mock_device_output_a_light"
+
+
+def test_interpolate() -> None:
+    """Test frames are interpolated per channel and clamped to the transition."""
+    assert START.interpolate(TARGET, 0.5) == TransitionFrame(
+        brightness=100, rgbcw=(50, 25, 0, 128, 128)
+    )
+    assert START.interpolate(TARGET, 2.0) == TARGET
+    assert START.interpolate(TARGET, -1.0) == START
+
+
+async def test_transition_ends_on_target() -> None:
+    """Test a transition is rate limited and ends exactly on the target."""
+    commands = MagicMock(command_window=0)
+    commands.async_send = AsyncMock()
+    duration = 0.25
+    transition = KiLightTransition(commands, START, TARGET, duration)
+
+    await transition.async_run()
+
+    assert commands.async_send.await_args.kwargs == {
+        "brightness": TARGET.brightness,
+        "rgbcw_color": TARGET.rgbcw,
+        "power_on": True,
+    }
+    assert transition.frames_sent == commands.async_send.await_count
+    assert transition.frames_sent <= duration * TRANSITION_MAX_FRAMES_PER_SECOND + 2
+
+
+async def test_transition_frames_follow_command_window() -> None:
+    """Test frames are not sent faster than the command window allows."""
+    commands = MagicMock(command_window=0.1)
+    commands.async_send = AsyncMock()
+    duration = 0.25
+    transition = KiLightTransition(commands, START, TARGET, duration)
+
+    await transition.async_run()
+
+    assert transition.frames_sent <= duration / commands.command_window + 2
+
+
+async def test_transition_off_restores_brightness() -> None:
+    """Test fading out switches the output off at its starting brightness."""
+    commands = MagicMock(command_window=0)
+    commands.async_send = AsyncMock()
+    transition = KiLightTransition(commands, TARGET, START, 0, power_on=False)
+
+    await transition.async_run()
+
+    commands.async_send.assert_awaited_once_with(
+        brightness=TARGET.brightness, rgbcw_color=START.rgbcw, power_on=False
+    )
+
+
+async def test_interrupted_fade_out_restores_brightness(
+    hass: HomeAssistant, mock_device: MockDevice, init_integration: MockConfigEntry
+) -> None:
+    """Test turning on during a fade-out goes back to the brightness before the fade."""
+    start_brightness = MOCK_DEVICE_STATE.output_a.brightness
+    fading = asyncio.Event()
+
+    def _check_fading(state: DeviceState) -> None:
+        if state.output_a.brightness != start_brightness:
+            fading.set()
+
+    cancel_check_fading = mock_device.register_callback(_check_fading)
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_OFF,
+        {ATTR_ENTITY_ID: LIGHT_ENTITY_ID, ATTR_TRANSITION: 10},
+        blocking=True,
+    )
+    await fading.wait()
+    cancel_check_fading()
+
+    await hass.services.async_call(
+        LIGHT_DOMAIN, SERVICE_TURN_ON, {ATTR_ENTITY_ID: LIGHT_ENTITY_ID}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    assert mock_device.state.output_a.power_on
+    assert mock_device.state.output_a.brightness == start_brightness